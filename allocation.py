@@ -0,0 +1,80 @@
+import heapq
+from collections import namedtuple
+
+from mrp_engine import OPEN_STATUS, to_day
+
+
+# An approvable order: pending, product approved, with material requirements
+PendingOrder = namedtuple('PendingOrder', 'order_id deadline priority order_date lines')
+# approved: order ids in allocation order; blocked: [(order_id, {mat_id: missing qty})];
+# stock_left: {mat_id: volume} after the approved orders
+Allocation = namedtuple('Allocation', 'approved blocked stock_left')
+
+# Ranking keys, smallest first: earliest deadline (undated last), highest client priority, oldest order
+RANK_KEYS = {
+    'deadline': lambda order: order.deadline,
+    'priority': lambda order: -order.priority,
+    'age': lambda order: order.order_date,
+}
+
+# Named policies: which key decides first, the others break ties
+POLICIES = {
+    'Earliest deadline': ('deadline', 'priority', 'age'),
+    'Client priority': ('priority', 'deadline', 'age'),
+    'Oldest order': ('age', 'deadline', 'priority'),
+}
+DEFAULT_POLICY = 'Earliest deadline'
+
+
+def load_pending(conn, status=OPEN_STATUS):
+    """Return ([PendingOrder], {mat_id: volume}) for every order allocate() may approve"""
+    lines = {}
+    for order_id, mat_id, qty in conn.execute("""
+        SELECT r.order_id, r.mat_id, r.qty
+        FROM order_material_requirements r
+        JOIN orders o ON o.order_id = r.order_id
+        WHERE o.status_quo = ?
+    """, (status,)):
+        lines.setdefault(order_id, []).append((mat_id, qty))
+
+    rows = [row for row in conn.execute("""
+        SELECT o.order_id, o.deadline, COALESCE(c.priority, 0), o.order_date
+        FROM orders o
+        JOIN products p ON p.product_id = o.product_id
+        LEFT JOIN clients c ON c.client_id = o.client_id
+        WHERE o.status_quo = ? AND p.status_quo = 'Approved'
+    """, (status,)) if row[0] in lines]
+    deadlines = to_day(row[1] for row in rows).tolist()
+    orders = [PendingOrder(order_id, deadline, priority, order_date or '', lines[order_id])
+              for (order_id, _, priority, order_date), deadline in zip(rows, deadlines)]
+
+    stock = dict(conn.execute("SELECT mat_id, COALESCE(mat_volume, 0) FROM raw_mats").fetchall())
+    return orders, stock
+
+
+def allocate(orders, stock, policy=DEFAULT_POLICY):
+    """Greedily hand stock to orders in `policy` order; nothing is written, so this is the dry run
+
+    Orders come off a heap ranked by the policy's keys. Each one is approved if what is
+    left covers all its lines, otherwise it is blocked with the quantities it is missing
+    and takes nothing, so smaller orders further down can still be served.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown allocation policy '{policy}'")
+    keys = [RANK_KEYS[name] for name in POLICIES[policy]]
+
+    heap = [(tuple(key(order) for key in keys), order.order_id, i) for i, order in enumerate(orders)]
+    heapq.heapify(heap)
+
+    left = dict(stock)
+    approved, blocked = [], []
+    while heap:
+        order = orders[heapq.heappop(heap)[2]]
+        missing = {mat_id: qty - left.get(mat_id, 0) for mat_id, qty in order.lines if left.get(mat_id, 0) < qty}
+        if missing:
+            blocked.append((order.order_id, missing))
+            continue
+        for mat_id, qty in order.lines:
+            left[mat_id] -= qty
+        approved.append(order.order_id)
+    return Allocation(approved, blocked, left)
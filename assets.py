@@ -0,0 +1,97 @@
+import io
+import os
+import logging
+from collections import OrderedDict
+from PIL import Image
+from customtkinter import CTkImage
+
+
+# Decoded, resized images and the CTkImages built on them, least recently used evicted first
+MAX_IMAGES = 64
+# Keep resized copies on disk next to the originals, so the next start skips decoding them
+DISK_CACHE = True
+DISK_CACHE_DIR = '.resized'
+
+_pil_cache = OrderedDict()  # (path, size) -> PIL.Image
+_ctk_cache = OrderedDict()  # (path, size, display_size) -> CTkImage
+_blob_cache = OrderedDict()  # key -> (version, CTkImage)
+
+
+def _remember(cache, key, value):
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > MAX_IMAGES:
+        cache.popitem(last=False)
+    return value
+
+
+def _disk_path(path, size):
+    folder, name = os.path.split(path)
+    stem = os.path.splitext(name)[0]
+    return os.path.join(folder, DISK_CACHE_DIR, f"{stem}_{size[0]}x{size[1]}.png")
+
+
+def load_image(path, size):
+    """Return `path` decoded and resized to `size` as a PIL image, decoding it at most once"""
+    key = (path, tuple(size))
+    image = _pil_cache.get(key)
+    if image is not None:
+        _pil_cache.move_to_end(key)
+        return image
+
+    cached = _disk_path(path, size) if DISK_CACHE else None
+    if cached and os.path.exists(cached) and os.path.getmtime(cached) >= os.path.getmtime(path):
+        with Image.open(cached) as img:
+            image = img.copy()
+    else:
+        with Image.open(path) as img:
+            image = img.resize(tuple(size))
+        if cached:
+            try:
+                os.makedirs(os.path.dirname(cached), exist_ok=True)
+                image.save(cached, 'PNG')
+            except OSError as e:
+                logging.warning(f"Could not cache resized {path}: {e}")
+    return _remember(_pil_cache, key, image)
+
+
+def get_image(path, size, display_size=None):
+    """Shared CTkImage of `path` resized to `size`, drawn at `display_size` (default `size`)"""
+    display_size = tuple(display_size or size)
+    key = (path, tuple(size), display_size)
+    image = _ctk_cache.get(key)
+    if image is not None:
+        _ctk_cache.move_to_end(key)
+        return image
+    return _remember(_ctk_cache, key, CTkImage(load_image(path, size), size=display_size))
+
+
+def get_blob_image(key, version, load, size):
+    """Shared CTkImage of image bytes stored under `key`, e.g. a user's profile thumbnail
+
+    `load()` returns the bytes and is only called when nothing is cached for `key` at
+    `version`, so an unchanged image costs neither a fetch nor a decode. Returns None
+    (and forgets `key`) if there is no image.
+    """
+    cached = _blob_cache.get(key)
+    if cached is not None and cached[0] == version:
+        _blob_cache.move_to_end(key)
+        return cached[1]
+    data = load() if version is not None else None
+    if not data:
+        forget(key)
+        return None
+    with Image.open(io.BytesIO(data)) as img:
+        image = img.copy()
+    return _remember(_blob_cache, key, (version, CTkImage(image, size=tuple(size))))[1]
+
+
+def forget(key):
+    _blob_cache.pop(key, None)
+
+
+def clear():
+    """Forget every cached image (the on-disk copies are kept)"""
+    _pil_cache.clear()
+    _ctk_cache.clear()
+    _blob_cache.clear()
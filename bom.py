@@ -0,0 +1,95 @@
+import logging
+
+
+def install_bom_components(conn):
+    """Sub-assembly lines (products made from other products) and the flattened BOM cache"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS product_components (
+            product_id TEXT NOT NULL REFERENCES products(product_id) ON DELETE CASCADE,
+            component_id TEXT NOT NULL REFERENCES products(product_id),
+            qty_per_unit REAL NOT NULL CHECK (qty_per_unit > 0),
+            PRIMARY KEY (product_id, component_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_product_components_component ON product_components(component_id)")
+
+    # Raw materials per unit of each product with every sub-assembly multiplied out
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS bom_explosion (
+            product_id TEXT NOT NULL REFERENCES products(product_id) ON DELETE CASCADE,
+            mat_id TEXT NOT NULL REFERENCES raw_mats(mat_id),
+            qty_per_unit REAL NOT NULL,
+            PRIMARY KEY (product_id, mat_id)
+        ) WITHOUT ROWID
+    """)
+    # Every existing BOM is single level, so it already is its own explosion
+    conn.execute("""
+        INSERT OR REPLACE INTO bom_explosion (product_id, mat_id, qty_per_unit)
+        SELECT product_id, mat_id, qty_per_unit FROM product_materials
+    """)
+
+
+def users_of(conn, product_id):
+    """`product_id` and every product built from it, directly or through other sub-assemblies"""
+    return [row[0] for row in conn.execute("""
+        WITH RECURSIVE up(product_id) AS (
+            SELECT ?
+            UNION
+            SELECT pc.product_id FROM product_components pc JOIN up ON pc.component_id = up.product_id
+        )
+        SELECT product_id FROM up
+    """, (product_id,))]
+
+
+def check_no_cycle(conn, product_id, component_ids):
+    """Raise ValueError if building `product_id` from `component_ids` would make it contain itself"""
+    above = set(users_of(conn, product_id))
+    for component_id in component_ids:
+        if component_id == product_id:
+            raise ValueError("A product cannot be a component of itself")
+        if component_id in above:
+            name = conn.execute("SELECT product_name FROM products WHERE product_id = ?", (component_id,)).fetchone()
+            raise ValueError(f"'{name[0] if name else component_id}' already contains this product, "
+                             f"so it cannot be one of its components")
+
+
+def explode(conn, product_id, stale, memo):
+    """{mat_id: qty per unit} for one unit of `product_id`, sub-assemblies multiplied out
+
+    Products outside `stale` are read from bom_explosion as they are; stale ones are rebuilt
+    from their BOM lines. `memo` holds every product worked out so far, so a sub-assembly
+    shared by several products is only exploded once.
+    """
+    if product_id in memo:
+        return memo[product_id]
+    if product_id not in stale:
+        flat = dict(conn.execute("SELECT mat_id, qty_per_unit FROM bom_explosion WHERE product_id = ?",
+                                 (product_id,)).fetchall())
+    else:
+        flat = dict(conn.execute("SELECT mat_id, qty_per_unit FROM product_materials WHERE product_id = ?",
+                                 (product_id,)).fetchall())
+        components = conn.execute("SELECT component_id, qty_per_unit FROM product_components WHERE product_id = ?",
+                                  (product_id,)).fetchall()
+        for component_id, qty in components:
+            for mat_id, per_unit in explode(conn, component_id, stale, memo).items():
+                flat[mat_id] = flat.get(mat_id, 0) + qty * per_unit
+    memo[product_id] = flat
+    return flat
+
+
+def refresh_explosion(conn, product_id):
+    """Rebuild bom_explosion for `product_id` and the products built from it, after its BOM changed
+
+    Nothing else is touched: every other product's explosion is still valid. Caller owns the
+    transaction. Returns the product ids that were rebuilt.
+    """
+    stale = users_of(conn, product_id)
+    stale_set, memo = set(stale), {}
+    rows = []
+    for pid in stale:
+        rows.extend((pid, mat_id, qty) for mat_id, qty in explode(conn, pid, stale_set, memo).items())
+    conn.executemany("DELETE FROM bom_explosion WHERE product_id = ?", [(pid,) for pid in stale])
+    conn.executemany("INSERT INTO bom_explosion (product_id, mat_id, qty_per_unit) VALUES (?, ?, ?)", rows)
+    if len(stale) > 1:
+        logging.info(f"BOM of {product_id} changed, re-exploded {len(stale)} products")
+    return stale
@@ -0,0 +1,146 @@
+import sqlite3
+import logging
+
+
+# Tables whose row changes are recorded in change_log: table -> primary key column.
+# Only ever add tables through a new migration, since the triggers are created once.
+TRACKED_TABLES = {
+    'orders': 'order_id',
+    'raw_mats': 'mat_id',
+    'products': 'product_id',
+    'clients': 'client_id',
+    'messages': 'message_id',
+}
+
+# change_log rows older than this are pruned when a watcher starts
+RETENTION = '-1 day'
+
+
+def install_change_log(conn):
+    """Create change_log and the AFTER INSERT/UPDATE/DELETE triggers that append to it"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_key TEXT,
+            op TEXT NOT NULL CHECK (op IN ('insert', 'update', 'delete')),
+            changed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    for table, key in TRACKED_TABLES.items():
+        for op, ref in (('insert', 'new'), ('update', 'new'), ('delete', 'old')):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_change_{op} AFTER {op.upper()} ON {table} BEGIN
+                    INSERT INTO change_log (table_name, row_key, op) VALUES ('{table}', {ref}.{key}, '{op}');
+                END
+            """)
+
+
+class ChangeWatcher:
+    """Tells subscribers which tables and rows changed, without re-running their queries
+
+    Polls `PRAGMA data_version` on a private connection from Tk's event loop. That pragma
+    only changes when another connection commits, and every write in the app goes through
+    the pool, so an idle database costs one pragma per tick. When it moves, the new
+    change_log rows are read and each subscriber gets `callback({table: {row_key, ...}})`
+    for the tables it asked about, once per tick however many rows changed.
+
+    Every pool connection also carries a TEMP trigger that reports the change_log rows it
+    writes, so rows committed by this process can be told apart from other terminals'.
+    Subscribers that already hear local writes through the EventBus pass `local=False`.
+    """
+
+    def __init__(self, db, widget, interval_ms=500):
+        self.db = db
+        self.widget = widget
+        self.interval_ms = interval_ms
+        self._conn = None
+        self._version = None
+        self._last_id = 0
+        self._job = None
+        self._subscribers = {}  # token -> (tables or None, local, callback)
+        self._next_token = 0
+        self._local_ids = set()  # change_ids committed through this process's pool, not yet polled
+
+    def subscribe(self, callback, tables=None, local=True):
+        """Call `callback(changes)` when any of `tables` (default all) change; returns a token.
+        With `local=False` only changes committed by other processes are passed on."""
+        self._next_token += 1
+        self._subscribers[self._next_token] = (set(tables) if tables else None, local, callback)
+        return self._next_token
+
+    def unsubscribe(self, token):
+        self._subscribers.pop(token, None)
+
+    def start(self):
+        if self._job is not None:
+            return
+        self._conn = sqlite3.connect(self.db.db_name, isolation_level=None, check_same_thread=False)
+        self.db.pool.on_connect(self._mark_local_writes)
+        self._version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        self._last_id = self._conn.execute("SELECT COALESCE(MAX(change_id), 0) FROM change_log").fetchone()[0]
+        try:
+            with self.db.transaction() as conn:
+                conn.execute("DELETE FROM change_log WHERE changed_at < datetime('now', ?)", (RETENTION,))
+        except sqlite3.Error as e:
+            logging.warning(f"Could not prune change_log: {e}")
+        self._job = self.widget.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _mark_local_writes(self, conn):
+        """Have `conn` report the change_ids it writes; they only count once its transaction commits"""
+        pool = self.db.pool
+        conn.create_function('mark_local_change', 1,
+                             lambda change_id: pool.after_commit(lambda: self._local_ids.add(change_id)))
+        conn.execute("""
+            CREATE TEMP TRIGGER IF NOT EXISTS mark_local_change AFTER INSERT ON main.change_log BEGIN
+                SELECT mark_local_change(new.change_id);
+            END
+        """)
+
+    def poll(self):
+        """Check for changes now; returns {table: {row_key, ...}} (empty if nothing changed)"""
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._version:
+            return {}
+        self._version = version
+
+        rows = self._conn.execute(
+            "SELECT change_id, table_name, row_key FROM change_log WHERE change_id > ? ORDER BY change_id",
+            (self._last_id,)).fetchall()
+        changes, remote = {}, {}
+        for change_id, table, key in rows:
+            changes.setdefault(table, set()).add(key)
+            if change_id in self._local_ids:
+                self._local_ids.discard(change_id)
+            else:
+                remote.setdefault(table, set()).add(key)
+            self._last_id = change_id
+        if changes:
+            self._notify(changes, remote)
+        return changes
+
+    def _notify(self, changes, remote):
+        for tables, local, callback in list(self._subscribers.values()):
+            seen = changes if local else remote
+            wanted = seen if tables is None else {t: keys for t, keys in seen.items() if t in tables}
+            if not wanted:
+                continue
+            try:
+                callback(wanted)
+            except Exception as e:
+                logging.error(f"Change subscriber {callback} failed: {e}")
+
+    def _tick(self):
+        try:
+            self.poll()
+        except sqlite3.Error as e:
+            logging.warning(f"Change watcher poll failed: {e}")
+        self._job = self.widget.after(self.interval_ms, self._tick)
@@ -4,8 +4,7 @@ import time
 from datetime import datetime
 from tkinter import ttk, messagebox
 import customtkinter as ctk
-from customtkinter import CTkLabel, CTkEntry, CTkButton, CTkFrame, CTkImage
-from PIL import Image
+from customtkinter import CTkLabel, CTkEntry, CTkButton, CTkFrame
 import sqlite3
 import os
 import logging
@@ -13,7 +12,10 @@ import sys
 sys.path.append("C:/capstone")
 
 from pages_handler import FrameNames
+from assets import get_image
 from global_func import on_show, handle_logout
+from tree_paging import PagedTreeLoader
+from virtual_tree import VirtualTreeview
 
 
 class ClientsPage(tk.Frame):
@@ -41,9 +43,7 @@ class ClientsPage(tk.Frame):
         self.client_act_error = logging.getLogger('CLIENT_ACT_ERROR')
         self.client_act_error.setLevel(logging.ERROR)
 
-        novus_logo = Image.open('C:/capstone/labels/novus_logo1.png')
-        novus_logo = novus_logo.resize((50, 50))
-        self.novus_photo = CTkImage(novus_logo, size=(50, 50))
+        self.novus_photo = get_image('C:/capstone/labels/novus_logo1.png', (50, 50))
 
         # Buttons Images
         self.clients_btn = self._images_buttons('C:/capstone/labels/client_btn.png', size=(100,100))
@@ -76,7 +76,7 @@ class ClientsPage(tk.Frame):
         tree_frame = tk.Frame(self)
         tree_frame.place(x=120, y=105, width=1100, height=475)
 
-        self.client_tree = ttk.Treeview(        
+        self.client_tree = VirtualTreeview(        
             tree_frame,
             columns=('client_id', 'client_name', 'client_email', 'client_add', 'client_num'),
             show='headings',
@@ -108,6 +108,8 @@ class ClientsPage(tk.Frame):
         tree_frame.grid_rowconfigure(0, weight=1)
         tree_frame.grid_columnconfigure(0, weight=1)
 
+        clients = self.controller.repos.clients
+        self.client_pages = PagedTreeLoader(self.client_tree, self.scrollbar, clients.list_page, clients.page_key)
         self.load_clients_from_db()
 
     def on_show(self):
@@ -122,19 +124,10 @@ class ClientsPage(tk.Frame):
 
     def load_clients_from_db(self):
         try:
-            conn = sqlite3.connect("main.db")
-            cursor = conn.cursor()
-            cursor.execute("SELECT client_id, client_name, client_email, client_address, client_contactnum FROM clients")
-            rows = cursor.fetchall()
-            for i in self.client_tree.get_children():
-                self.client_tree.delete(i)
-            for row in rows:
-                self.client_tree.insert("", "end", values=row)
+            self.client_pages.refresh()
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", str(e))
             self.client_act_error.error(f"Error loading clients from DB: {e}, Time: {datetime.now(pytz.timezone('Asia/Manila')).strftime('%Y-%m-%d %H:%M:%S')}")
-        finally:
-            conn.close()
 
     def add_clients(self):
         #Information Fill up for adding a new client
@@ -143,7 +136,7 @@ class ClientsPage(tk.Frame):
                 self.add_window.lift()
                 return
             self.add_window = tk.Toplevel()
-            self.add_window.geometry('500x400')
+            self.add_window.geometry('500x460')
             self.add_window.title('Add Client')
             self.add_window.config(bg='white')
             labels = ["Client ID:", "Client Name:", "Client Email:", "Client Address:", "Client Number:"]
@@ -155,6 +148,13 @@ class ClientsPage(tk.Frame):
                 entry.grid(row=i, column=1, padx=10, pady=10, sticky='w')
                 self.entries.append(entry)
 
+            # Allocation priority: when stock is short, higher priority clients' orders are served first
+            CTkLabel(self.add_window, text="Priority:", font=('Futura', 13, 'bold')).grid(
+                row=len(labels), column=0, padx=15, pady=10, sticky='e')
+            priority_entry = CTkEntry(self.add_window, height=28, width=220, border_width=2, border_color='#6a9bc3')
+            priority_entry.insert(0, '0')
+            priority_entry.grid(row=len(labels), column=1, padx=10, pady=10, sticky='w')
+
             #Client Insertion to DB
             def client_to_db():
                 user_id = self.controller.session.get('user_id')
@@ -172,30 +172,26 @@ class ClientsPage(tk.Frame):
                     messagebox.showerror("Input Error", "Client Number must be numeric.")
                     return
                 try:
-                    conn = sqlite3.connect('main.db')
-                    c = conn.cursor()
-                    c.execute("""
-                        INSERT INTO clients (client_id, client_name, client_email, client_address, client_contactnum)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, tuple(client_data))
-                    conn.commit()
+                    priority = int(priority_entry.get().strip() or 0)
+                except ValueError:
+                    messagebox.showerror("Input Error", "Priority must be a whole number.")
+                    return
+                try:
+                    repos = self.controller.repos
+                    with repos.transaction():
+                        repos.clients.add(*client_data, priority=priority)
+                        repos.logs.add(user_id, f"ADDED CLIENT {data_dict['client_id']}", timestamp)
                     messagebox.showinfo("Success", "Client registered successfully!")
-                    c.execute("""
-                        INSERT INTO user_logs (user_id, action, timestamp) VALUES (?, ?, ?)""",
-                        (user_id, f"ADDED CLIENT {data_dict['client_id']}", timestamp))
-                    conn.commit()
                     self.load_clients_from_db()
                     self.add_window.destroy()
                     self.client_act.info(f"Client {data_dict['client_id']} added successfully, Time: {timestamp}")
                 except sqlite3.Error as e:
                     messagebox.showerror("Database Error", str(e))
                     self.client_act_error.error(f"Error adding client: {e}, Time: {timestamp}")
-                finally:
-                    conn.close()
             submit_btn = CTkButton(self.add_window, text='Submit All', font=("Arial", 12), width=120, height=30,
                                 bg_color='white', fg_color='blue', corner_radius=10, border_width=2,
                                 border_color='black', command=client_to_db)
-            submit_btn.grid(row=len(labels), column=0, columnspan=3, pady=20)
+            submit_btn.grid(row=len(labels) + 1, column=0, columnspan=3, pady=20)
         except Exception as e:
             print(f"Error while creating Add Client window: {e}")
             self.client_act_error.error(f"Error while creating Add Client window: {e}, Time: {datetime.now(pytz.timezone('Asia/Manila')).strftime('%Y-%m-%d %H:%M:%S')}")
@@ -203,27 +199,10 @@ class ClientsPage(tk.Frame):
     def srch_clients(self):
         search_client = self.search_entry.get().strip().lower()
         try:
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-            # Search across multiple fields using LIKE for partial matches
-            query = """
-                SELECT client_id, client_name, client_email, client_address, client_contactnum
-                FROM clients
-                WHERE LOWER(client_id) LIKE ?
-                   OR LOWER(client_name) LIKE ?
-                   OR LOWER(client_email) LIKE ?
-                   OR LOWER(client_address) LIKE ?
-                   OR LOWER(client_contactnum) LIKE ?
-            """
-            param = f"%{search_client}%"
-            c.execute(query, (param, param, param, param, param))
-            rows = c.fetchall()
-            for i in self.client_tree.get_children():
-                self.client_tree.delete(i)
-            if rows:
-                for row in rows:
-                    self.client_tree.insert("", "end", values=row)
-            else:
+            # Ranked prefix search across every field
+            rows = self.controller.repos.clients.search(search_client)
+            self.client_pages.show(rows)
+            if not rows:
                 messagebox.showinfo("Not Found", f"No client found matching '{search_client}'")
                 self.load_clients_from_db()
                 self.client_act_warning.warning(
@@ -234,8 +213,6 @@ class ClientsPage(tk.Frame):
             self.client_act_error.error(
                 f"Error searching client: {e}, Time: {datetime.now(pytz.timezone('Asia/Manila')).strftime('%Y-%m-%d %H:%M:%S')}"
             )
-        finally:
-            conn.close()
 
     def del_clients(self):
         user_id = self.controller.session.get('user_id')
@@ -250,18 +227,14 @@ class ClientsPage(tk.Frame):
             confirm = messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete client ID '{client_id}'?")
             if not confirm:
                 return
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-            c.execute("SELECT * FROM clients WHERE client_id = ?", (client_id,))
-            row = c.fetchone()
-            if row:
-                c.execute("DELETE FROM clients WHERE client_id = ?", (client_id,))
-                conn.commit()
+            repos = self.controller.repos
+            with repos.transaction():
+                deleted = repos.clients.delete(client_id)
+                if deleted:
+                    repos.logs.add(user_id, f"DELETED CLIENT {client_id}", timestamp)
+            if deleted:
                 messagebox.showinfo("Deleted", f"Client ID '{client_id}' has been deleted.")
                 self.load_clients_from_db()
-                c.execute(""" INSERT INTO user_logs (user_id, action, timestamp) VALUES (?, ?, ?)""",
-                        (user_id, f"DELETED CLIENT {client_id}", timestamp))
-                conn.commit()
                 self.client_act.info(f"Client {client_id} deleted successfully, Time: {timestamp}")
             else:
                 messagebox.showinfo("Not Found", f"No client found with ID '{client_id}'")
@@ -269,8 +242,6 @@ class ClientsPage(tk.Frame):
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", str(e))
             self.client_act_error.error(f"Error deleting client: {e}, Time: {timestamp}")
-        finally:
-            conn.close()
 
     def upd_clients(self):
         user_id = self.controller.session.get('user_id')
@@ -283,7 +254,7 @@ class ClientsPage(tk.Frame):
         original_id = values[0]
         top = tk.Toplevel(self)
         top.title("Update Client")
-        top.geometry("500x400")
+        top.geometry("500x460")
         top.config(bg="white")
         fields = ['Client ID', "Client Name", "Client Email", "Client Address", "Client Phone"]
         entries = []
@@ -303,67 +274,75 @@ class ClientsPage(tk.Frame):
                 return
             col_names = ['client_id', 'client_name', 'client_email', 'client_address', 'client_contactnum']
             col = col_names[idx]
+            if col == 'client_id':
+                messagebox.showinfo("Info", "Client ID cannot be changed.")
+                return
             try:
-                conn = sqlite3.connect('main.db')
-                c = conn.cursor()
-                c.execute('PRAGMA foreign_keys = ON;')
-                if col == 'client_id':
-                    messagebox.showinfo("Info", "Client ID cannot be changed.")
-                    return
-                c.execute(f"UPDATE clients SET {col} = ? WHERE client_id = ?", (new_value, original_id))
-                conn.commit()
+                repos = self.controller.repos
+                with repos.transaction():
+                    repos.clients.update_field(original_id, col, new_value)
+                    repos.logs.add(user_id, f"UPDATED {col.replace('_', ' ').upper()} OF CLIENT {original_id} TO {new_value}", timestamp)
                 messagebox.showinfo("Success", f"{fields[idx]} updated!")
-                c.execute("""INSERT INTO user_logs (user_id, action, timestamp) VALUES (?, ?, ?)""",
-                        (user_id, f"UPDATED {col.replace('_', ' ').upper()} OF CLIENT {original_id} TO {new_value}", timestamp))
-                conn.commit()
                 self.load_clients_from_db()
                 self.client_act.info(f"Client {original_id} updated {col.replace('_', ' ').upper()} to {new_value}, Time: {timestamp}")
             except sqlite3.Error as e:
                 messagebox.showerror("Database Error", str(e))
                 self.client_act_error.error(f"Error updating client {original_id}: {e}, Time: {timestamp}")
-            finally:
-                conn.close()
         for i in range(1, len(fields)):
             btn = CTkButton(top, text="Update", width=70, command=lambda idx=i: update_field(idx))
             btn.grid(row=i, column=2, padx=5, pady=10)
+
+        # Allocation priority is not in the list, so it is read and saved on its own
+        CTkLabel(top, text="Priority:", font=('Futura', 13, 'bold')).grid(row=len(fields), column=0, padx=15, pady=10, sticky='e')
+        priority_entry = CTkEntry(top, height=28, width=220, border_width=2, border_color='#6a9bc3')
+        try:
+            priority_entry.insert(0, str(self.controller.repos.clients.get_priority(original_id)))
+        except sqlite3.Error as e:
+            self.client_act_error.error(f"Error reading priority of client {original_id}: {e}, Time: {timestamp}")
+        priority_entry.grid(row=len(fields), column=1, padx=10, pady=10, sticky='w')
+        def update_priority():
+            try:
+                priority = int(priority_entry.get().strip())
+            except ValueError:
+                messagebox.showerror("Input Error", "Priority must be a whole number.")
+                return
+            try:
+                repos = self.controller.repos
+                with repos.transaction():
+                    repos.clients.set_priority(original_id, priority)
+                    repos.logs.add(user_id, f"UPDATED PRIORITY OF CLIENT {original_id} TO {priority}", timestamp)
+                messagebox.showinfo("Success", "Priority updated!")
+                self.client_act.info(f"Client {original_id} updated PRIORITY to {priority}, Time: {timestamp}")
+            except sqlite3.Error as e:
+                messagebox.showerror("Database Error", str(e))
+                self.client_act_error.error(f"Error updating priority of client {original_id}: {e}, Time: {timestamp}")
+        CTkButton(top, text="Update", width=70, command=update_priority).grid(row=len(fields), column=2, padx=5, pady=10)
         def update_all():
             all_values = [entry.get().strip() for entry in entries]
             if not all(all_values):
                 messagebox.showerror("Input Error", "All fields are required.")
                 return
             try:
-                conn = sqlite3.connect('main.db')
-                c = conn.cursor()
-                c.execute('''UPDATE clients SET client_name=?, client_email=?, client_address=?, client_contactnum=? WHERE client_id=?
-                ''', (all_values[1], all_values[2], all_values[3], all_values[4], original_id))
-                conn.commit()
+                repos = self.controller.repos
+                with repos.transaction():
+                    repos.clients.update(original_id, *all_values[1:5])
+                    #User Log Actions if Updated ALL values in the client DATA
+                    repos.logs.add(user_id, f"UPDATED ALL FIELDS OF CLIENT {original_id} TO {', '.join(all_values[1:])}", timestamp)
                 messagebox.showinfo("Success", "All fields updated!")
-                #User Log Actions if Updated ALL values in the client DATA
-                c.execute('''INSERT INTO user_logs (user_id, action, timestamp) VALUES (?, ?, ?)''',
-                        (user_id, f"UPDATED ALL FIELDS OF CLIENT {original_id} TO {', '.join(all_values[1:])}", timestamp))
-                conn.commit()
                 self.load_clients_from_db()
                 self.client_act.info(f"Client {original_id} updated all fields to {', '.join(all_values[1:])}, Time: {timestamp}")
                 top.destroy()
             except sqlite3.Error as e:
                 messagebox.showerror("Database Error", str(e))
                 self.client_act_error.error(f"Error updating all fields of client {original_id}: {e}, Time: {timestamp}")
-            finally:
-                conn.close()
         update_all_btn = CTkButton(top, text="Update All", width=120, fg_color="#6a9bc3", command=update_all)
-        update_all_btn.grid(row=len(fields), column=0, columnspan=3, pady=20)
+        update_all_btn.grid(row=len(fields) + 1, column=0, columnspan=3, pady=20)
 
     def clients_to_order(self):
         search_id = self.search_entry.get().strip().lower()
-        conn = sqlite3.connect('main.db')
-        c = conn.cursor()
         try:
-            c.execute('''SELECT * FROM orders WHERE client_id = ?''', (search_id,))
-            rows = c.fetchall() 
-            for i in self.client_tree.get_children():
-                self.client_tree.delete(i)
-            for row in rows:
-                self.client_tree.insert("", "end", values=row)
+            rows = self.controller.repos.orders.list_by_client(search_id)
+            self.client_pages.show(rows)
             if not rows:
                 messagebox.showinfo("No results", "No orders found for this client ID.")
                 self.load_clients_from_db()
@@ -373,8 +352,6 @@ class ClientsPage(tk.Frame):
             self.load_clients_from_db()
             self.client_act_error.error(f"Error fetching orders for client ID '{search_id}': {e}, Time: {datetime.now(pytz.timezone('Asia/Manila')).strftime('%Y-%m-%d %H:%M:%S')}")
             return
-        finally:
-            conn.close()
 
     def show_client_details(self, event):
         selected = self.client_tree.focus()
@@ -386,14 +363,7 @@ class ClientsPage(tk.Frame):
 
 
         try:
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-
-            client_history = c.execute("""
-                SELECT o.order_id, o.product_id, o.order_date, o.deadline
-                FROM orders o
-                WHERE o.client_id = ?
-                """, (values[0],)).fetchall()
+            client_history = self.controller.repos.orders.client_history(values[0])
             
             if not client_history:
                 messagebox.showinfo("No History", "No order history found for this client.")
@@ -419,8 +389,6 @@ class ClientsPage(tk.Frame):
             messagebox.showerror(f'Unexpected Error {e}')
             print(e)
             return
-        finally:
-            conn.close()
 
 
     def _column_heads(self, columns, text):
@@ -433,6 +401,4 @@ class ClientsPage(tk.Frame):
         button.pack(side="top", padx=5, pady=15)
     
     def _images_buttons(self, image_path, size=(40, 40)):
-        image = Image.open(image_path)
-        image = image.resize(size)
-        return CTkImage(image)
+        return get_image(image_path, size, display_size=(20, 20))
@@ -1,14 +1,77 @@
 import sqlite3
 import random
 import string
+import re
 import pytz
 import logging
 from datetime import datetime
 import json
 
+from db_pool import get_pool
+from stock_engine import deduct_materials, deduct_for_orders, take_snapshot
+from search_service import install_search_indexes, narrow_search_update_triggers
+from change_feed import install_change_log
+from event_bus import OrderChanged, OrderApproved, StockChanged, ProductChanged
+from timestamps import now_timestamp, to_db_date, to_db_timestamp
+from profile_images import ORIGINAL, make_thumbnails
+from bom import install_bom_components, check_no_cycle, refresh_explosion
+
+
+# Rows per page for the list views
+PAGE_SIZE = 200
+
+# A material is low when its volume is under its own low_count, or under DEFAULT_LOW_COUNT
+# when it has none. The partial index idx_raw_mats_low is declared with this exact
+# expression, so queries filtering on it read only the low rows; changing it needs a migration.
+DEFAULT_LOW_COUNT = 100
+LOW_STOCK = f"COALESCE(mat_volume, 0) < COALESCE(low_count, {DEFAULT_LOW_COUNT})"
+
+
+def keyset_page(query, order_by, after=None, limit=PAGE_SIZE, descending=False, params=()):
+    """Return (sql, params) for the page of `query` that comes after the row keyed `after`
+
+    `order_by` is the sort columns ending with a unique key, e.g. ('o.order_date', 'o.order_id');
+    `after` is those columns' values from the last row already shown (None for the first page).
+    Seeking with a row-value comparison instead of OFFSET keeps every page an index range scan,
+    so page 1000 costs the same as page 1. `query` must not have its own WHERE or ORDER BY.
+    """
+    direction = 'DESC' if descending else 'ASC'
+    cols = ', '.join(order_by)
+    if after is not None:
+        op = '<' if descending else '>'
+        marks = ', '.join('?' * len(order_by))
+        query += f" WHERE ({cols}) {op} ({marks})"
+        params = tuple(params) + tuple(after)
+    query += " ORDER BY " + ', '.join(f"{col} {direction}" for col in order_by) + " LIMIT ?"
+    return query, tuple(params) + (limit,)
+
+
+def parse_materials(materials):
+    """Parse "wood - 4; door knob - 1" (or a list of "name - qty" entries) into {name: qty}.
+    Repeated names are summed, entries without a quantity raise ValueError."""
+    if not materials:
+        return {}
+    items = materials if isinstance(materials, (list, tuple)) else re.split(r'[;,\n]', materials)
+
+    parsed = {}
+    for item in items:
+        item = item.strip()
+        if not item:
+            continue
+        match = re.fullmatch(r'(.+?)\s*[-:]\s*(\d+(?:\.\d+)?)', item)
+        if not match:
+            raise ValueError(f"Material '{item}' must look like 'name - quantity'")
+        name = match.group(1).strip()
+        qty = float(match.group(2))
+        parsed[name] = parsed.get(name, 0) + (int(qty) if qty.is_integer() else qty)
+    return parsed
+
+
 class DatabaseManager:
-    def __init__(self, db_name='main.db'):
+    def __init__(self, db_name='main.db', pool_size=8):
         self.db_name = db_name
+        self.pool_size = pool_size
+        self.events = None  # EventBus set by the app; None means nobody is listening
         self.init_database()
 
     #Loggers
@@ -18,21 +81,275 @@ class DatabaseManager:
     #Global Time Var
     timezone = datetime.now(pytz.timezone('Asia/Manila')).strftime('%Y-%m-%d %H:%M:%S')
 
+    @property
+    def pool(self):
+        """Shared connection pool for this database file"""
+        return get_pool(self.db_name, max_connections=self.pool_size)
+
     def get_connection(self):
-        """Get database connection with foreign keys enabled"""
-        conn = sqlite3.connect(self.db_name)
-        conn.execute("PRAGMA foreign_keys = ON;")
-        return conn
+        """Get this thread's pooled connection (foreign keys already enabled).
+        The pool owns it, so callers must not close it."""
+        return self.pool.connection()
+
+    def transaction(self, immediate=False):
+        """Context manager: commit on success, roll back on error"""
+        return self.pool.transaction(immediate=immediate)
+
+    def publish(self, event):
+        """Hand `event` to the event bus once the current transaction commits"""
+        if self.events is not None:
+            self.pool.after_commit(lambda: self.events.publish(event))
     
     def init_database(self):
-        """Initialize the database with the provided schema"""
-        conn = self.get_connection()
-        c = conn.cursor()
-        
+        """Open the pooled connection and apply any pending schema migrations"""
+        migrations = self._migrations()
+        version = self.get_connection().execute("PRAGMA user_version").fetchone()[0]
+        if version >= len(migrations):
+            return
+
+        with self.transaction(immediate=True) as conn:
+            # Re-read under the write lock in case another terminal just migrated
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for step, migrate in enumerate(migrations[version:], start=version + 1):
+                migrate(conn)
+                conn.execute(f"PRAGMA user_version = {step}")
+                logging.info(f'Applied migration {step} ({migrate.__name__}), Time: {self.timezone}')
 
-        conn.commit()
-        conn.close()
+    # Schema migrations, applied in order. PRAGMA user_version stores how many have run,
+    # so only ever append to this list.
+    def _migrations(self):
+        return [
+            self._migrate_product_materials,
+            self._migrate_order_requirements,
+            self._migrate_inventory_transactions,
+            install_search_indexes,
+            self._migrate_paging_indexes,
+            install_change_log,
+            self._migrate_low_stock_index,
+            self._migrate_iso_dates,
+            self._migrate_user_images,
+            self._migrate_inventory_ledger,
+            install_bom_components,
+            self._migrate_client_priority,
+            self._migrate_client_last_updated,
+            narrow_search_update_triggers,
+        ]
+
+    def _migrate_product_materials(self, conn):
+        """Bill of materials table, backfilled from the products.materials strings"""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS product_materials (
+                product_id TEXT NOT NULL REFERENCES products(product_id) ON DELETE CASCADE,
+                mat_id TEXT NOT NULL REFERENCES raw_mats(mat_id),
+                qty_per_unit REAL NOT NULL CHECK (qty_per_unit > 0),
+                PRIMARY KEY (product_id, mat_id)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_product_materials_mat ON product_materials(mat_id)")
+
+        mat_ids = {name.strip().lower(): mat_id for mat_id, name in conn.execute("SELECT mat_id, mat_name FROM raw_mats")}
+        for product_id, materials in conn.execute("SELECT product_id, materials FROM products").fetchall():
+            try:
+                parsed = parse_materials(materials)
+            except ValueError as e:
+                logging.warning(f'Product {product_id}: {e}, materials left out of its BOM')
+                continue
+            for name, qty in parsed.items():
+                mat_id = mat_ids.get(name.lower())
+                if mat_id is None:
+                    logging.warning(f"Product {product_id}: material '{name}' is not in raw_mats, left out of its BOM")
+                    continue
+                conn.execute("""
+                    INSERT OR REPLACE INTO product_materials (product_id, mat_id, qty_per_unit)
+                    VALUES (?, ?, ?)
+                """, (product_id, mat_id, qty))
     
+    def _migrate_order_requirements(self, conn):
+        """Per-order material requirements, backfilled from orders.mats_need (or the BOM when missing)"""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS order_material_requirements (
+                order_id TEXT NOT NULL REFERENCES orders(order_id) ON DELETE CASCADE,
+                mat_id TEXT NOT NULL REFERENCES raw_mats(mat_id),
+                qty REAL NOT NULL CHECK (qty > 0),
+                PRIMARY KEY (order_id, mat_id)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_order_requirements_mat ON order_material_requirements(mat_id)")
+
+        mat_ids = {name.strip().lower(): mat_id for mat_id, name in conn.execute("SELECT mat_id, mat_name FROM raw_mats")}
+        for order_id, mats_need in conn.execute("SELECT order_id, mats_need FROM orders").fetchall():
+            try:
+                needed = json.loads(mats_need) if mats_need else {}
+            except json.JSONDecodeError:
+                needed = {}
+            rows = [(order_id, mat_ids[name.strip().lower()], qty) for name, qty in needed.items()
+                    if name.strip().lower() in mat_ids and float(qty) > 0]
+            if rows:
+                conn.executemany("""
+                    INSERT OR REPLACE INTO order_material_requirements (order_id, mat_id, qty)
+                    VALUES (?, ?, ?)
+                """, rows)
+                continue
+
+            # From the single level BOM, as the schema stands at this migration. Not
+            # _write_order_requirements: later migrations change what that reads
+            conn.execute("""
+                INSERT OR REPLACE INTO order_material_requirements (order_id, mat_id, qty)
+                SELECT o.order_id, pm.mat_id, pm.qty_per_unit * o.quantity
+                FROM orders o
+                JOIN product_materials pm ON pm.product_id = o.product_id
+                WHERE o.order_id = ? AND o.quantity > 0
+            """, (order_id,))
+            needed = dict(conn.execute("""
+                SELECT m.mat_name, r.qty
+                FROM order_material_requirements r
+                JOIN raw_mats m ON m.mat_id = r.mat_id
+                WHERE r.order_id = ?
+                ORDER BY m.mat_name
+            """, (order_id,)).fetchall())
+            conn.execute("UPDATE orders SET mats_need = ? WHERE order_id = ?", (json.dumps(needed), order_id))
+
+    def _migrate_inventory_transactions(self, conn):
+        """Stock movement history (same schema as update_db.py) plus lookup indexes"""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS inventory_transactions (
+                transaction_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                mat_id TEXT,
+                product_id TEXT,
+                quantity INTEGER NOT NULL,
+                transaction_type TEXT NOT NULL CHECK(transaction_type IN ('purchase', 'sale', 'adjustment', 'transfer', 'waste')),
+                reference_id TEXT,
+                notes TEXT,
+                performed_by TEXT NOT NULL,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (mat_id) REFERENCES raw_mats(mat_id) ON DELETE SET NULL,
+                FOREIGN KEY (product_id) REFERENCES products(product_id) ON DELETE SET NULL,
+                FOREIGN KEY (performed_by) REFERENCES users(user_id)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_inventory_txn_mat ON inventory_transactions(mat_id, transaction_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_inventory_txn_reference ON inventory_transactions(reference_id)")
+
+    def _migrate_paging_indexes(self, conn):
+        """Indexes matching the keyset sort order of the order and product lists"""
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_date_id ON orders(order_date, order_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_products_created_id ON products(created_date, product_id)")
+
+    def _migrate_low_stock_index(self, conn):
+        """Partial index holding only the materials that are low on stock"""
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_raw_mats_low ON raw_mats(mat_id) WHERE {LOW_STOCK}")
+
+    def _migrate_iso_dates(self, conn):
+        """Rewrite deadlines as YYYY-MM-DD and order/product dates as YYYY-MM-DD HH:MM:SS,
+        index deadlines for range scans and reject non-canonical deadlines from now on"""
+        for table, key, column, convert in (('orders', 'order_id', 'deadline', to_db_date),
+                                             ('orders', 'order_id', 'order_date', to_db_timestamp),
+                                             ('products', 'product_id', 'created_date', to_db_timestamp)):
+            rows = conn.execute(f"SELECT {key}, {column} FROM {table} WHERE {column} IS NOT NULL").fetchall()
+            updates = []
+            for row_key, value in rows:
+                try:
+                    canonical = convert(value)
+                except ValueError:
+                    logging.warning(f"{table} {row_key}: {column} '{value}' is not a date, left as is")
+                    continue
+                if canonical != value:
+                    updates.append((canonical, row_key))
+            conn.executemany(f"UPDATE {table} SET {column} = ? WHERE {key} = ?", updates)
+
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_deadline ON orders(deadline, status_quo)")
+        for op in ('INSERT', 'UPDATE OF deadline'):
+            name = 'orders_deadline_iso_' + op.split()[0].lower()
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {name} BEFORE {op} ON orders
+                WHEN NEW.deadline IS NOT date(NEW.deadline)
+                BEGIN
+                    SELECT RAISE(ABORT, 'orders.deadline must be YYYY-MM-DD');
+                END
+            """)
+
+    def _migrate_user_images(self, conn):
+        """Move profile images out of users into user_images, one row per original and thumbnail"""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS user_images (
+                user_id TEXT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+                size INTEGER NOT NULL,
+                image BLOB NOT NULL,
+                version INTEGER NOT NULL DEFAULT 1,
+                PRIMARY KEY (user_id, size)
+            )
+        """)
+        rows = conn.execute("SELECT user_id, userimage FROM users WHERE typeof(userimage) = 'blob'").fetchall()
+        for user_id, data in rows:
+            images = {ORIGINAL: data}
+            try:
+                images.update(make_thumbnails(data))
+            except ValueError as e:
+                logging.warning(f"No thumbnails for user {user_id}: {e}")
+            conn.executemany("INSERT OR REPLACE INTO user_images (user_id, size, image) VALUES (?, ?, ?)",
+                             [(user_id, size, image) for size, image in images.items()])
+        conn.execute("UPDATE users SET userimage = NULL WHERE typeof(userimage) = 'blob'")
+
+    def _migrate_inventory_ledger(self, conn):
+        """Running balances on inventory_transactions, Manila timestamps, and balance snapshots
+
+        Existing rows were stamped in UTC by CURRENT_TIMESTAMP; they are moved to Manila time
+        like every other stored date, and their balances are worked back from today's volumes.
+        """
+        conn.execute("ALTER TABLE inventory_transactions ADD COLUMN balance_after INTEGER")
+        conn.execute("UPDATE inventory_transactions SET timestamp = datetime(timestamp, '+8 hours')")
+
+        volumes = dict(conn.execute("SELECT mat_id, COALESCE(mat_volume, 0) FROM raw_mats").fetchall())
+        rows = conn.execute("""
+            SELECT transaction_id, mat_id, quantity FROM inventory_transactions
+            WHERE mat_id IS NOT NULL ORDER BY transaction_id DESC
+        """).fetchall()
+        balances = []
+        for transaction_id, mat_id, quantity in rows:
+            if mat_id in volumes:
+                balances.append((volumes[mat_id], transaction_id))
+                volumes[mat_id] -= quantity
+        conn.executemany("UPDATE inventory_transactions SET balance_after = ? WHERE transaction_id = ?", balances)
+
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_inventory_txn_mat_time
+            ON inventory_transactions(mat_id, timestamp, transaction_id)
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS inventory_snapshots (
+                taken_at TEXT NOT NULL,
+                mat_id TEXT NOT NULL REFERENCES raw_mats(mat_id) ON DELETE CASCADE,
+                balance INTEGER NOT NULL,
+                transaction_id INTEGER NOT NULL,
+                PRIMARY KEY (taken_at, mat_id)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_inventory_snapshots_mat ON inventory_snapshots(mat_id, taken_at)")
+        take_snapshot(conn)
+
+    def _migrate_client_priority(self, conn):
+        """Client priority for stock allocation, higher is served first"""
+        conn.execute("ALTER TABLE clients ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+
+    def _migrate_client_last_updated(self, conn):
+        """clients.last_updated, which the update_client_timestamp trigger writes but this table never had
+
+        Without the column every UPDATE on clients failed inside that trigger. The trigger is
+        rebuilt to stamp Manila time like every other stored date, and to leave alone an update
+        that sets last_updated itself.
+        """
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(clients)")}
+        if 'last_updated' not in columns:
+            conn.execute("ALTER TABLE clients ADD COLUMN last_updated DATETIME")
+        conn.execute("DROP TRIGGER IF EXISTS update_client_timestamp")
+        conn.execute("""
+            CREATE TRIGGER update_client_timestamp AFTER UPDATE ON clients
+            FOR EACH ROW WHEN NEW.last_updated IS OLD.last_updated
+            BEGIN
+                UPDATE clients SET last_updated = datetime('now', '+8 hours') WHERE client_id = NEW.client_id;
+            END
+        """)
+
     def generate_product_id(self):
         """Generate a more unique order ID using timestamp and randomness"""
         timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
@@ -48,188 +365,379 @@ class DatabaseManager:
     
     def order_id_exists(self, order_id):
         """Check if an order ID already exists"""
-        conn = self.get_connection()
-        try:
-            c = conn.cursor()
-            c.execute("SELECT 1 FROM orders WHERE order_id = ?", (order_id,))
-            return c.fetchone() is not None
-        finally:
-            conn.close()
+        c = self.get_connection().cursor()
+        c.execute("SELECT 1 FROM orders WHERE order_id = ?", (order_id,))
+        return c.fetchone() is not None
 
     
+    # Bill of materials
+    def _resolve_materials(self, conn, materials):
+        """Turn "name - qty" entries into ([(mat_id, qty_per_unit)], [(component_id, qty_per_unit)])
+
+        A name is looked up among raw materials first, then among products (a sub-assembly).
+        ValueError on unknown or ambiguous names.
+        """
+        parsed = parse_materials(materials)
+        if not parsed:
+            raise ValueError("A product needs at least one material")
+
+        raw, components = [], []
+        for name, qty in parsed.items():
+            if qty <= 0:
+                raise ValueError(f"Quantity for '{name}' must be positive")
+            row = conn.execute("SELECT mat_id FROM raw_mats WHERE mat_name = ? COLLATE NOCASE", (name,)).fetchone()
+            if row is not None:
+                raw.append((row[0], qty))
+                continue
+            products = conn.execute("SELECT product_id FROM products WHERE product_name = ? COLLATE NOCASE",
+                                    (name,)).fetchall()
+            if not products:
+                raise ValueError(f"'{name}' is neither a material in the inventory nor a product")
+            if len(products) > 1:
+                raise ValueError(f"More than one product is named '{name}'")
+            components.append((products[0][0], qty))
+        return raw, components
+
+    def _write_bom(self, conn, product_id, materials):
+        """Replace a product's BOM rows and re-explode it and everything built from it;
+        caller owns the transaction. Returns the product ids whose explosion changed."""
+        raw, components = self._resolve_materials(conn, materials)
+        check_no_cycle(conn, product_id, [component_id for component_id, _ in components])
+        conn.execute("DELETE FROM product_materials WHERE product_id = ?", (product_id,))
+        conn.executemany(
+            "INSERT INTO product_materials (product_id, mat_id, qty_per_unit) VALUES (?, ?, ?)",
+            [(product_id, mat_id, qty) for mat_id, qty in raw])
+        conn.execute("DELETE FROM product_components WHERE product_id = ?", (product_id,))
+        conn.executemany(
+            "INSERT INTO product_components (product_id, component_id, qty_per_unit) VALUES (?, ?, ?)",
+            [(product_id, component_id, qty) for component_id, qty in components])
+        return refresh_explosion(conn, product_id)
+
+    def get_product_bom(self, product_id):
+        """Return [(mat_id, mat_name, qty_per_unit, unit_measurement)] for a product"""
+        c = self.get_connection().cursor()
+        c.execute("""
+            SELECT pm.mat_id, rm.mat_name, pm.qty_per_unit, rm.unit_measurement
+            FROM product_materials pm
+            JOIN raw_mats rm ON rm.mat_id = pm.mat_id
+            WHERE pm.product_id = ?
+            ORDER BY rm.mat_name
+        """, (product_id,))
+        return c.fetchall()
+
+    def get_all_boms(self):
+        """Return {product_id: {mat_name: qty_per_unit}} for every product, sub-assemblies flattened"""
+        c = self.get_connection().cursor()
+        c.execute("""
+            SELECT pm.product_id, rm.mat_name, pm.qty_per_unit
+            FROM bom_explosion pm
+            JOIN raw_mats rm ON rm.mat_id = pm.mat_id
+        """)
+        boms = {}
+        for product_id, mat_name, qty in c.fetchall():
+            boms.setdefault(product_id, {})[mat_name] = qty
+        return boms
+
+    def calculate_requirements(self, product_id, quantity):
+        """Return [(mat_id, mat_name, required, available)] to build `quantity` units"""
+        c = self.get_connection().cursor()
+        c.execute("""
+            SELECT pm.mat_id, rm.mat_name, pm.qty_per_unit * ?, COALESCE(rm.mat_volume, 0)
+            FROM bom_explosion pm
+            JOIN raw_mats rm ON rm.mat_id = pm.mat_id
+            WHERE pm.product_id = ?
+            ORDER BY rm.mat_name
+        """, (quantity, product_id))
+        return c.fetchall()
+
+    def check_feasibility(self, product_id, quantity=1):
+        """Return the shortages [(mat_id, mat_name, required, available)]; empty means buildable"""
+        c = self.get_connection().cursor()
+        c.execute("""
+            SELECT pm.mat_id, rm.mat_name, pm.qty_per_unit * ?, COALESCE(rm.mat_volume, 0)
+            FROM bom_explosion pm
+            JOIN raw_mats rm ON rm.mat_id = pm.mat_id
+            WHERE pm.product_id = ? AND COALESCE(rm.mat_volume, 0) < pm.qty_per_unit * ?
+        """, (quantity, product_id, quantity))
+        return c.fetchall()
+
     # Product-related database operations
+    def _write_order_requirements(self, conn, order_id):
+        """Recompute an order's material requirements from its product BOM and quantity
+
+        Keeps orders.mats_need in step for the screens that still display it.
+        Returns {mat_name: qty}.
+        """
+        conn.execute("DELETE FROM order_material_requirements WHERE order_id = ?", (order_id,))
+        conn.execute("""
+            INSERT INTO order_material_requirements (order_id, mat_id, qty)
+            SELECT o.order_id, pm.mat_id, pm.qty_per_unit * o.quantity
+            FROM orders o
+            JOIN bom_explosion pm ON pm.product_id = o.product_id
+            WHERE o.order_id = ? AND o.quantity > 0
+        """, (order_id,))
+        needed = dict(conn.execute("""
+            SELECT m.mat_name, r.qty
+            FROM order_material_requirements r
+            JOIN raw_mats m ON m.mat_id = r.mat_id
+            WHERE r.order_id = ?
+            ORDER BY m.mat_name
+        """, (order_id,)).fetchall())
+        conn.execute("UPDATE orders SET mats_need = ? WHERE order_id = ?", (json.dumps(needed), order_id))
+        return needed
+
+    def get_order_requirements(self, order_id):
+        """Return [(mat_id, mat_name, qty, mat_volume)] needed by one order"""
+        c = self.get_connection().cursor()
+        c.execute("""
+            SELECT r.mat_id, m.mat_name, r.qty, COALESCE(m.mat_volume, 0)
+            FROM order_material_requirements r
+            JOIN raw_mats m ON m.mat_id = r.mat_id
+            WHERE r.order_id = ?
+            ORDER BY m.mat_name
+        """, (order_id,))
+        return c.fetchall()
+
+    def get_open_material_demand(self, status='Pending'):
+        """Return [(mat_id, mat_name, total_needed, mat_volume, order_count)] across all orders in `status`"""
+        c = self.get_connection().cursor()
+        c.execute("""
+            SELECT r.mat_id, m.mat_name, SUM(r.qty), COALESCE(m.mat_volume, 0), COUNT(*)
+            FROM orders o
+            JOIN order_material_requirements r ON r.order_id = o.order_id
+            JOIN raw_mats m ON m.mat_id = r.mat_id
+            WHERE o.status_quo = ?
+            GROUP BY r.mat_id
+            ORDER BY m.mat_name
+        """, (status,))
+        return c.fetchall()
+
     def create_product(self, product_name, materials_list):
-        """Create a new product in the database"""
-        conn = self.get_connection()
-        c = conn.cursor()
-        
+        """Create a new product and its bill of materials"""
         product_id = self.generate_product_id()
         materials_str = "; ".join(materials_list)
         
-        c.execute("""
-            INSERT INTO products (product_id, product_name, materials, created_date)
-            VALUES (?, ?, ?, ?)
-        """, (product_id, product_name, materials_str, self.timezone))
+        with self.transaction() as conn:
+            conn.execute("""
+                INSERT INTO products (product_id, product_name, materials, created_date)
+                VALUES (?, ?, ?, ?)
+            """, (product_id, product_name, materials_str, now_timestamp()))
+            self._write_bom(conn, product_id, materials_list)
+            self.publish(ProductChanged(product_id))
         
-        conn.commit()
-        conn.close()
         logging.info(f'Product {product_id} created succesfully, Time: {self.timezone}')
         return product_id
     
     def get_all_products(self):
         """Get all products from the database"""
-        conn = self.get_connection()
-        c = conn.cursor()
-        
+        c = self.get_connection().cursor()
         c.execute("SELECT * FROM products ORDER BY created_date DESC")
-        products = c.fetchall()
-        
-        conn.close()
-        return products
+        return c.fetchall()
     
+    def get_products_page(self, after=None, limit=PAGE_SIZE):
+        """Newest products first, one keyset page; pass (created_date, product_id) of the last row as `after`"""
+        sql, params = keyset_page("SELECT * FROM products", ('created_date', 'product_id'),
+                                  after, limit, descending=True)
+        return self.get_connection().execute(sql, params).fetchall()
+
     def get_product_by_id(self, product_id):
         """Get a specific product by ID"""
-        conn = self.get_connection()
-        c = conn.cursor()
-        
+        c = self.get_connection().cursor()
         c.execute("SELECT * FROM products WHERE product_id = ?", (product_id,))
-        product = c.fetchone()
-        
-        conn.close()
-        return product
+        return c.fetchone()
     
     def get_product_materials(self, product_id):
         """Get materials for a specific product"""
-        conn = self.get_connection()
-        c = conn.cursor()
-        
+        c = self.get_connection().cursor()
         c.execute("SELECT materials FROM products WHERE product_id = ?", (product_id,))
         result = c.fetchone()
-        
-        conn.close()
         return result[0] if result else None
     
     def update_product(self, product_id, product_name, materials):
-        """Update an existing product"""
-        conn = self.get_connection()
-        c = conn.cursor()
-        
-        c.execute("""
-            UPDATE products 
-            SET product_name = ?, materials = ?
-            WHERE product_id = ?
-        """, (product_name, materials, product_id))
+        """Update an existing product and rebuild its bill of materials"""
+        with self.transaction() as conn:
+            conn.execute("""
+                UPDATE products 
+                SET product_name = ?, materials = ?
+                WHERE product_id = ?
+            """, (product_name, materials, product_id))
+            for changed_id in self._write_bom(conn, product_id, materials):
+                self.publish(ProductChanged(changed_id))
         
-        conn.commit()
-        conn.close()
         logging.info(f'Product {product_id} updated successfully, Time: {self.timezone}')
     
     #To Be Implemented
     def approved_status(self, product_id, status):
         """Update the status of a product"""
-        conn = self.get_connection()
-        c = conn.cursor()
-
         status = 'Approved'
         
-        c.execute("UPDATE products SET status_quo = ? WHERE product_id = ?", (status, product_id))
+        with self.transaction() as conn:
+            conn.execute("UPDATE products SET status_quo = ? WHERE product_id = ?", (status, product_id))
+            self.publish(ProductChanged(product_id))
         
-        conn.commit()
-        conn.close()
         logging.info(f'Product {product_id} status updated to {status}. Time: {self.timezone}')
 
+    def approve_orders(self, order_ids, performed_by):
+        """Approve many orders in one write transaction and report on each
+
+        Orders are taken in the given sequence; each one is approved only if what is left
+        after the earlier ones still covers it, otherwise it is skipped and stays Pending.
+        The combined demand of the approved orders is then deducted in one pass
+        (stock_engine.deduct_for_orders), so stock is checked against a single locked
+        snapshot instead of once per order.
+        Returns [(order_id, approved, message)] in the given sequence.
+        """
+        if not performed_by:
+            raise ValueError("Log in before approving orders")
+
+        order_ids = list(dict.fromkeys(order_ids))
+        ids_json = json.dumps(order_ids)
+        report = {}
+
+        with self.transaction(immediate=True) as conn:
+            orders = {row[0]: row[1:] for row in conn.execute("""
+                SELECT o.order_id, o.status_quo, p.product_id, p.status_quo
+                FROM orders o
+                JOIN products p ON o.product_id = p.product_id
+                WHERE o.order_id IN (SELECT value FROM json_each(?))
+            """, (ids_json,))}
+
+            requirements = {}
+            for order_id, mat_id, qty in conn.execute("""
+                SELECT order_id, mat_id, qty FROM order_material_requirements
+                WHERE order_id IN (SELECT value FROM json_each(?))
+            """, (ids_json,)):
+                requirements.setdefault(order_id, []).append((mat_id, qty))
+
+            stock = {}
+            for mat_id, name, volume in conn.execute("""
+                SELECT m.mat_id, m.mat_name, COALESCE(m.mat_volume, 0) FROM raw_mats m
+                WHERE m.mat_id IN (
+                    SELECT mat_id FROM order_material_requirements
+                    WHERE order_id IN (SELECT value FROM json_each(?)))
+            """, (ids_json,)):
+                stock[mat_id] = [name, volume]
+
+            accepted = {}
+            for order_id in order_ids:
+                if order_id not in orders:
+                    report[order_id] = (False, "Order cannot be found")
+                    continue
+                order_status, product_id, product_status = orders[order_id]
+                needs = requirements.get(order_id)
+                if order_status != "Pending":
+                    report[order_id] = (False, f"Order is {order_status}")
+                elif product_status != "Approved":
+                    report[order_id] = (False, f"Product {product_id} is {product_status}")
+                elif not needs:
+                    report[order_id] = (False, "Order has no material requirements")
+                else:
+                    short = [f"{stock[mat_id][0]} (Need: {qty:g}, Have: {stock[mat_id][1]:g})"
+                             for mat_id, qty in needs if stock[mat_id][1] < qty]
+                    if short:
+                        report[order_id] = (False, "Not enough " + ", ".join(short))
+                        continue
+                    for mat_id, qty in needs:
+                        stock[mat_id][1] -= qty
+                    accepted[order_id] = (product_id, needs)
+                    report[order_id] = (True, "Approved")
+
+            if accepted:
+                deduct_for_orders(conn, accepted, performed_by)
+                conn.executemany("UPDATE orders SET status_quo = 'Approved' WHERE order_id = ?",
+                                 [(order_id,) for order_id in accepted])
+                self.publish(OrderApproved(tuple(accepted)))
+                self.publish(StockChanged(tuple({mat_id for _, needs in accepted.values() for mat_id, _ in needs})))
+
+        logging.info(f"Bulk approval: {len(accepted)} of {len(order_ids)} orders approved, Time: {self.timezone}")
+        return [(order_id, *report[order_id]) for order_id in order_ids]
+
+    def approve_product(self, product_id):
+        """Approve a product if one unit of its BOM is in stock, otherwise leave it Pending
+
+        Returns (product_name, shortages) where shortages is [(mat_name, needed, available)].
+        """
+        with self.transaction() as conn:
+            product = conn.execute("SELECT product_name FROM products WHERE product_id = ?", (product_id,)).fetchone()
+            if not product:
+                raise ValueError(f"Product ID {product_id} not found in the database.")
+            bom = conn.execute("""
+                SELECT m.mat_name, pm.qty_per_unit, COALESCE(m.mat_volume, 0)
+                FROM bom_explosion pm
+                JOIN raw_mats m ON m.mat_id = pm.mat_id
+                WHERE pm.product_id = ?
+            """, (product_id,)).fetchall()
+            if not bom:
+                raise ValueError(f"Product ID {product_id} has no bill of materials.")
+            shortages = [row for row in bom if row[2] < row[1]]
+            status = 'Pending' if shortages else 'Approved'
+            conn.execute('UPDATE products SET status_quo = ? WHERE product_id = ?', (status, product_id))
+            self.publish(ProductChanged(product_id))
+
+        logging.info(f"Product {product_id} set to {status}, Time: {self.timezone}")
+        return product[0], shortages
+
     def cancel_status(self, product_id, status):
         """Soft Deletion of a product(Cancel - possibility to be approved later)"""
-        conn = self.get_connection()
-        c = conn.cursor()
-
         status = 'Cancelled'
 
-        c.execute("UPDATE products SET stauts_quo = ? WHERE product_id = ?", (status, product_id))
+        with self.transaction() as conn:
+            conn.execute("UPDATE products SET status_quo = ? WHERE product_id = ?", (status, product_id))
+            self.publish(ProductChanged(product_id))
 
-        conn.commit()
-        conn.close()
         logging.info(f"Product {product_id} has been cancelled. Time: {self.timezone}")
     
     
     def delete_product(self, product_id):
-        """Delete a product from the database"""
-        conn = self.get_connection()
-        c = conn.cursor()
-        
-        c.execute("DELETE FROM products WHERE product_id = ?", (product_id,))
+        """Delete a product from the database; ValueError if other products are built from it"""
+        with self.transaction() as conn:
+            used_in = conn.execute("""
+                SELECT p.product_name FROM product_components pc
+                JOIN products p ON p.product_id = pc.product_id
+                WHERE pc.component_id = ?
+            """, (product_id,)).fetchall()
+            if used_in:
+                raise ValueError("It is a component of " + ", ".join(name for name, in used_in))
+            conn.execute("DELETE FROM products WHERE product_id = ?", (product_id,))
+            self.publish(ProductChanged(product_id))
         logging.warning(f'Product {product_id} deleted from database. Time: {self.timezone}')
-        
-        conn.commit()
-        conn.close()
     
     def check_product_in_orders(self, product_id):
         """Check if a product is used in any orders"""
-        conn = self.get_connection()
-        c = conn.cursor()
-        
+        c = self.get_connection().cursor()
         c.execute("SELECT COUNT(*) FROM orders WHERE product_id = ?", (product_id,))
-        count = c.fetchone()[0]
-        
-        conn.close()
-        return count
+        return c.fetchone()[0]
     
     def get_products_for_dropdown(self):
         """Get products formatted for dropdown display"""
-        conn = self.get_connection()
-        c = conn.cursor()
-        
+        c = self.get_connection().cursor()
         c.execute("SELECT product_id, product_name FROM products ORDER BY product_name")
         products = c.fetchall()
-        
-        conn.close()
         return [f"{product[1]} ({product[0]})" for product in products]
     
     # Client-related database operations
     def get_all_clients(self):
         """Get all clients from the database"""
-        conn = self.get_connection()
-        c = conn.cursor()
-        
+        c = self.get_connection().cursor()
         c.execute("SELECT client_id, client_name, client_email, client_address, client_contactnum FROM clients ORDER BY client_name")
-        clients = c.fetchall()
-        
-        conn.close()
-        return clients
+        return c.fetchall()
     
     def get_clients_for_dropdown(self):
         """Get clients formatted for dropdown display"""
-        conn = self.get_connection()
-        c = conn.cursor()
-        
+        c = self.get_connection().cursor()
         c.execute("SELECT client_id, client_name FROM clients ORDER BY client_name")
         clients = c.fetchall()
-        
-        conn.close()
         return [f"{client[1]} ({client[0]})" for client in clients]
     
 
-    def create_order(self, order_name, product_id, client_id, quantity, deadline, total_mats_dict):
-        """Create a new order with robust error handling"""
-        conn = None
-        try:
-            # Validate materials data
-            if not isinstance(total_mats_dict, dict):
-                if isinstance(total_mats_dict, str):
-                    try:
-                        total_mats_dict = json.loads(total_mats_dict)
-                    except json.JSONDecodeError:
-                        raise ValueError("Materials data must be a dictionary or valid JSON string")
-                else:
-                    raise ValueError("Materials data must be a dictionary")
+    def create_order(self, order_name, product_id, client_id, quantity, deadline, total_mats_dict=None):
+        """Create a new order with robust error handling
 
-            # Convert quantities to numbers
-            validated_materials = {}
-            for material, qty in total_mats_dict.items():
-                try:
-                    validated_materials[material] = float(qty) if '.' in str(qty) else int(qty)
-                except (ValueError, TypeError):
-                    raise ValueError(f"Invalid quantity for {material}")
+        Material requirements are computed from the product BOM inside the insert
+        transaction; `total_mats_dict` is only kept for older callers.
+        """
+        try:
+            deadline = to_db_date(deadline)
 
             # Generate unique order ID
             max_attempts = 3
@@ -243,40 +751,30 @@ class DatabaseManager:
                 raise RuntimeError("Failed to generate unique order ID after 3 attempts")
 
             # Create order with transaction
-            conn = self.get_connection()
-            c = conn.cursor()
-            
-            c.execute("BEGIN TRANSACTION")
-            c.execute("""
-                INSERT INTO orders (order_id, order_name, product_id, client_id, 
-                                quantity, deadline, order_date, mats_need)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (order_id, order_name, product_id, client_id, 
-                quantity, deadline, self.timezone, json.dumps(validated_materials)))
+            with self.transaction() as conn:
+                conn.execute("""
+                    INSERT INTO orders (order_id, order_name, product_id, client_id, 
+                                    quantity, deadline, order_date)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (order_id, order_name, product_id, client_id, 
+                    quantity, deadline, now_timestamp()))
+                if not self._write_order_requirements(conn, order_id):
+                    raise ValueError(f"Product {product_id} has no bill of materials")
+                self.publish(OrderChanged(order_id))
             
-            conn.commit()
             logging.info(f'Order {order_id} created successfully')
             return order_id
 
         except sqlite3.IntegrityError as e:
-            if conn:
-                conn.rollback()
             logging.error(f"Database integrity error: {str(e)}")
             raise ValueError("Order creation failed - possible duplicate ID") from e
         except Exception as e:
-            if conn:
-                conn.rollback()
             logging.error(f"Order creation error: {str(e)}")
             raise
-        finally:
-            if conn:
-                conn.close()
 
     def get_all_orders(self):
         """Get all orders with related product and client information"""
-        conn = self.get_connection()
-        c = conn.cursor()
-        
+        c = self.get_connection().cursor()
         c.execute("""
             SELECT o.order_id, o.order_name, p.product_name, c.client_name, 
                    o.quantity, o.mats_need, o.deadline, o.order_date, o.product_id, o.client_id, o.status_quo
@@ -285,91 +783,115 @@ class DatabaseManager:
             LEFT JOIN clients c ON o.client_id = c.client_id
             ORDER BY o.order_date DESC
         """)
-        orders = c.fetchall()
-        
-        conn.close()
-        return orders
+        return c.fetchall()
     
+    def get_orders_page(self, after=None, limit=PAGE_SIZE):
+        """Same rows as get_all_orders, one keyset page; pass (order_date, order_id) of the last row as `after`"""
+        sql, params = keyset_page("""
+            SELECT o.order_id, o.order_name, p.product_name, c.client_name,
+                   o.quantity, o.mats_need, o.deadline, o.order_date, o.product_id, o.client_id, o.status_quo
+            FROM orders o
+            LEFT JOIN products p ON o.product_id = p.product_id
+            LEFT JOIN clients c ON o.client_id = c.client_id
+        """, ('o.order_date', 'o.order_id'), after, limit, descending=True)
+        return self.get_connection().execute(sql, params).fetchall()
+
     def get_order_by_id(self, order_id):
         """Get a specific order by ID"""
-        conn = self.get_connection()
-        c = conn.cursor()
-        
+        c = self.get_connection().cursor()
         c.execute("""
             SELECT o.order_id, o.order_name, o.product_id, o.client_id, 
                    o.quantity, o.deadline, o.order_date, o.status_quo
             FROM orders o
-            WHERE o.order_id
+            WHERE o.order_id = ?
         """, (order_id,))
-        order = c.fetchone()
-        
-        conn.close()
-        return order
+        return c.fetchone()
     
     def update_order(self, order_id, order_name, product_id, client_id, quantity, deadline):
         """Update an existing order"""
-        conn = self.get_connection()
-        c = conn.cursor()
+        deadline = to_db_date(deadline)
+        with self.transaction() as conn:
+            conn.execute("""
+                UPDATE orders 
+                SET order_name = ?, product_id = ?, client_id = ?, 
+                    quantity = ?, deadline = ?
+                WHERE order_id = ?
+            """, (order_name, product_id, client_id, quantity, deadline, order_id))
+            self._write_order_requirements(conn, order_id)
+            self.publish(OrderChanged(order_id))
         
-        c.execute("""
-            UPDATE orders 
-            SET order_name = ?, product_id = ?, client_id = ?, 
-                quantity = ?, deadline = ?
-            WHERE order_id = ?
-        """, (order_name, product_id, client_id, quantity, deadline, order_id))
-        
-        conn.commit()
-        conn.close()
         logging.info(f'Order {order_id} updated. Time: {self.timezone}')
 
-    #To be Implemented
-    def approve_order(self, order_id):
-        """Update the stauts of the pending order"""
-        conn = self.get_connection()
-        c = conn.cursor()
+    def approve_order(self, order_id, performed_by):
+        """Approve a pending order and deduct its materials, all in one write transaction
+
+        Requirements are read by primary key from order_material_requirements under the
+        write lock and deducted with conditional updates (see stock_engine.deduct_materials),
+        so nothing is deducted unless every material is in stock. Each deduction is logged
+        to inventory_transactions as a 'sale' by `performed_by` (a users.user_id).
+        Raises ValueError with a user-facing message when the order cannot be approved
+        (InsufficientStockError, a ValueError, on shortage).
+        Returns [(mat_id, qty_deducted, volume_left)].
+        """
+        if not performed_by:
+            raise ValueError("Log in before approving orders")
 
-        status = "Approved"
+        with self.transaction(immediate=True) as conn:
+            order = conn.execute("""
+                SELECT o.status_quo, p.product_id, p.status_quo
+                FROM orders o
+                JOIN products p ON o.product_id = p.product_id
+                WHERE o.order_id = ?
+            """, (order_id,)).fetchone()
+            if not order:
+                raise ValueError(f"Order ID: {order_id} cannot be found")
+            order_status, product_id, product_status = order
+            if order_status != "Pending":
+                raise ValueError(f"Order ID: {order_id} is {order_status}, only pending orders can be approved")
+            if product_status != "Approved":
+                raise ValueError(f"Order ID: {order_id}, Product ID {product_id} Status: {product_status}")
 
-        c.execute('UPDATE orders SET status_quo WHERE order_id = ?', (status, order_id))
+            requirements = conn.execute(
+                "SELECT mat_id, qty FROM order_material_requirements WHERE order_id = ?", (order_id,)).fetchall()
+            if not requirements:
+                raise ValueError(f"Order ID: {order_id} has no material requirements")
+
+            deducted = deduct_materials(conn, requirements, performed_by, reference_id=order_id,
+                                        product_id=product_id, notes=f"Order {order_id} approved")
+            conn.execute("UPDATE orders SET status_quo = 'Approved' WHERE order_id = ?", (order_id,))
+            self.publish(OrderApproved((order_id,)))
+            self.publish(StockChanged(tuple(mat_id for mat_id, _, _ in deducted)))
 
-        conn.commit()
-        conn.close()
         logging.info(f"Order {order_id} has been approved, Time: {self.timezone}")
+        return deducted
 
     #To Be Implemented
     def cancel_order(self, order_id):
         """Soft Deletion of an order (Cancel - possibility to be approved later)"""
-        conn = self.get_connection()
-        c = conn.cursor()
-
         status = "Cancelled"
 
-        c.execute("UPDATE orders SET status_quo = ? WHERE order_id = ?", (status, order_id))
+        with self.transaction() as conn:
+            conn.execute("UPDATE orders SET status_quo = ? WHERE order_id = ?", (status, order_id))
+            self.publish(OrderChanged(order_id))
         
-        conn.commit()
-        conn.close()
         logging.info(f"Order {order_id} has been cancelled, Time: {self.timezone}")
     
     def delete_order(self, order_id):
         """Delete an order from the database"""
-        conn = self.get_connection()
-        c = conn.cursor()
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM orders WHERE order_id = ?", (order_id,))
+            self.publish(OrderChanged(order_id))
         
-        c.execute("DELETE FROM orders WHERE order_id = ?", (order_id,))
-        
-        conn.commit()
-        conn.close()
         logging.info(f"Order {order_id} deleted from Database, Time: {self.timezone}")
     
     # Utility methods
     def close_connection(self):
-        """Close database connection (if needed for cleanup)"""
-        pass  # SQLite connections are closed automatically in our implementation
+        """Close every pooled connection (call once on application exit)"""
+        self.pool.close_all()
     
     def execute_custom_query(self, query, params=None):
         """Execute a custom query (for advanced operations)"""
-        conn = self.get_connection()
-        c = conn.cursor()
+        c = self.get_connection().cursor()
         
         if params:
             c.execute(query, params)
@@ -377,10 +899,5 @@ class DatabaseManager:
             c.execute(query)
         
         if query.strip().upper().startswith('SELECT'):
-            result = c.fetchall()
-        else:
-            conn.commit()
-            result = c.rowcount
-        
-        conn.close()
-        return result
+            return c.fetchall()
+        return c.rowcount
@@ -0,0 +1,90 @@
+import queue
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import messagebox
+
+
+def show_db_error(error):
+    messagebox.showerror("Database Error", str(error))
+
+
+class DbExecutor:
+    """Runs database work on worker threads and hands results back to the Tk thread
+
+    submit() returns a concurrent.futures.Future straight away. When the job finishes,
+    `on_done(result)` or `on_error(exception)` is called on the Tk thread: finished futures
+    go into a queue that is drained with `after()` polling, which only runs while jobs are
+    in flight. Each worker gets its own pooled connection, so a locked database or a large
+    fetchall() stalls a worker instead of the window.
+
+    Callbacks registered with on_busy(callback) get True when the first job starts and
+    False when the last one finishes, for a busy cursor or status label.
+    """
+
+    def __init__(self, widget, workers=2, poll_ms=30, events=None):
+        self.widget = widget
+        self.poll_ms = poll_ms
+        self.events = events
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='db-worker')
+        self._finished = queue.SimpleQueue()
+        self._in_flight = 0
+        self._polling = False
+        self._busy_callbacks = []
+
+    def submit(self, fn, *args, on_done=None, on_error=show_db_error, **kwargs):
+        """Run `fn(*args, **kwargs)` on a worker; must be called from the Tk thread"""
+        future = self._executor.submit(fn, *args, **kwargs)
+        self._in_flight += 1
+        if self._in_flight == 1:
+            self._set_busy(True)
+        future.add_done_callback(lambda f: self._finished.put((f, on_done, on_error)))
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_ms, self._drain)
+        return future
+
+    def on_busy(self, callback):
+        self._busy_callbacks.append(callback)
+
+    @property
+    def busy(self):
+        return self._in_flight > 0
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _drain(self):
+        while True:
+            try:
+                future, on_done, on_error = self._finished.get_nowait()
+            except queue.Empty:
+                break
+            self._in_flight -= 1
+            try:
+                error = future.exception()
+                if error is None:
+                    if on_done:
+                        on_done(future.result())
+                elif on_error:
+                    on_error(error)
+                else:
+                    logging.error(f"Background database job failed: {error}")
+            except Exception as e:
+                logging.error(f"Completion callback failed: {e}")
+
+        # Events published on a worker are delivered here, on the Tk thread
+        if self.events is not None:
+            self.events.flush()
+
+        if self._in_flight:
+            self.widget.after(self.poll_ms, self._drain)
+        else:
+            self._polling = False
+            self._set_busy(False)
+
+    def _set_busy(self, busy):
+        for callback in self._busy_callbacks:
+            try:
+                callback(busy)
+            except Exception as e:
+                logging.error(f"Busy callback failed: {e}")
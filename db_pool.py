@@ -0,0 +1,221 @@
+import sqlite3
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+
+class PoolExhaustedError(sqlite3.OperationalError):
+    """Raised when no connection slot frees up before the pool timeout"""
+
+
+class ConnectionPool:
+    """Keeps one long-lived SQLite connection per thread.
+
+    Connections are opened lazily the first time a thread asks for one and are
+    reused for every later query on that thread, so the PRAGMA setup and the
+    file open only happen once. `max_connections` caps how many threads may
+    hold a connection at the same time; connections owned by threads that have
+    exited are reclaimed automatically.
+    """
+
+    def __init__(self, db_name='main.db', max_connections=8, timeout=10.0,
+                 health_check_interval=30.0, cached_statements=256):
+        self.db_name = db_name
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.cached_statements = cached_statements
+
+        self._local = threading.local()
+        self._connections = {}  # thread ident -> sqlite3.Connection
+        self._hooks = []  # on_connect() callbacks, in registration order
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def _connect(self):
+        """Open a new connection with the pragmas every caller expects"""
+        conn = sqlite3.connect(
+            self.db_name,
+            timeout=self.timeout,
+            isolation_level=None,  # explicit BEGIN/COMMIT through transaction()
+            check_same_thread=False,  # only so close_all() can run from any thread
+            cached_statements=self.cached_statements,
+        )
+        conn.execute("PRAGMA foreign_keys = ON;")
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("PRAGMA synchronous = NORMAL;")
+        conn.execute(f"PRAGMA busy_timeout = {int(self.timeout * 1000)};")
+        return conn
+
+    def _prune_dead_threads(self):
+        """Close connections whose owning thread is gone. Caller holds self._cond"""
+        alive = {t.ident for t in threading.enumerate()}
+        for ident in [i for i in self._connections if i not in alive]:
+            try:
+                self._connections.pop(ident).close()
+            except sqlite3.Error:
+                pass
+
+    def _is_healthy(self, conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def connection(self):
+        """Return the connection owned by the current thread, opening it if needed"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool has been closed")
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            now = time.monotonic()
+            if now - self._local.checked_at < self.health_check_interval:
+                return self._run_hooks(conn)
+            if self._is_healthy(conn):
+                self._local.checked_at = now
+                return self._run_hooks(conn)
+            logging.warning(f"Discarding unhealthy connection to {self.db_name}")
+            self.release()
+
+        ident = threading.get_ident()
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while len(self._connections) >= self.max_connections:
+                self._prune_dead_threads()
+                if len(self._connections) < self.max_connections:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolExhaustedError(
+                        f"No free connection to {self.db_name} after {self.timeout}s "
+                        f"({self.max_connections} in use)")
+                self._cond.wait(remaining)
+
+            conn = self._connect()
+            self._connections[ident] = conn
+
+        self._local.conn = conn
+        self._local.checked_at = time.monotonic()
+        self._local.depth = 0
+        self._local.hooked = 0
+        return self._run_hooks(conn)
+
+    def on_connect(self, callback):
+        """Run `callback(conn)` once on every connection, the ones already open included.
+        Each thread runs it on its own connection the next time it asks for it outside a
+        transaction, so the callback never lands inside (or is rolled back with) someone's work."""
+        with self._cond:
+            self._hooks.append(callback)
+
+    def _run_hooks(self, conn):
+        while self._local.hooked < len(self._hooks) and not self._local.depth:
+            callback = self._hooks[self._local.hooked]
+            self._local.hooked += 1
+            try:
+                callback(conn)
+            except sqlite3.Error as e:
+                logging.error(f"Connection hook {callback} failed on {self.db_name}: {e}")
+        return conn
+
+    def release(self):
+        """Close the current thread's connection and free its slot"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._cond:
+            self._connections.pop(threading.get_ident(), None)
+            self._cond.notify()
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    @contextmanager
+    def transaction(self, immediate=False):
+        """Run the enclosed block in a transaction on this thread's connection.
+
+        Commits on success and rolls back on any exception. Nested calls become
+        savepoints, so a helper that opens its own transaction can be called
+        from inside a larger one. `immediate=True` takes the write lock up
+        front (BEGIN IMMEDIATE) instead of on the first write.
+        """
+        conn = self.connection()
+        depth = getattr(self._local, 'depth', 0)
+        savepoint = f"sp_{depth}"
+
+        if depth == 0:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            self._local.on_commit = []
+        else:
+            conn.execute(f"SAVEPOINT {savepoint}")
+        self._local.depth = depth + 1
+        pending = len(self._local.on_commit)
+
+        try:
+            yield conn
+        except BaseException:
+            # Callbacks registered inside the rolled back block must never run
+            del self._local.on_commit[pending:]
+            try:
+                if depth == 0:
+                    conn.execute("ROLLBACK")
+                else:
+                    conn.execute(f"ROLLBACK TO {savepoint}")
+                    conn.execute(f"RELEASE {savepoint}")
+            except sqlite3.Error as e:
+                logging.error(f"Rollback failed on {self.db_name}: {e}")
+            raise
+        else:
+            if depth == 0:
+                conn.execute("COMMIT")
+            else:
+                conn.execute(f"RELEASE {savepoint}")
+        finally:
+            self._local.depth = depth
+
+        if depth == 0:
+            callbacks, self._local.on_commit = self._local.on_commit, []
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    logging.error(f"After-commit callback {callback} failed: {e}")
+
+    def after_commit(self, callback):
+        """Run `callback()` once this thread's open transaction commits, or now if none is open.
+        It is dropped if the transaction (or the savepoint it was registered in) rolls back."""
+        if getattr(self._local, 'depth', 0):
+            self._local.on_commit.append(callback)
+        else:
+            callback()
+
+    def close_all(self):
+        """Close every pooled connection (call on application exit)"""
+        with self._cond:
+            self._closed = True
+            for conn in self._connections.values():
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+            self._cond.notify_all()
+        self._local = threading.local()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_name='main.db', **kwargs):
+    """Return the shared pool for `db_name`, creating it on first use"""
+    with _pools_lock:
+        pool = _pools.get(db_name)
+        if pool is None or pool._closed:
+            pool = ConnectionPool(db_name, **kwargs)
+            _pools[db_name] = pool
+        return pool
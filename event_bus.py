@@ -0,0 +1,71 @@
+import logging
+import threading
+from collections import namedtuple
+
+
+# Events published by the repositories once their transaction has committed
+OrderChanged = namedtuple('OrderChanged', 'order_id')        # created, edited, cancelled or deleted
+OrderApproved = namedtuple('OrderApproved', 'order_ids')
+StockChanged = namedtuple('StockChanged', 'mat_ids')
+ProductChanged = namedtuple('ProductChanged', 'product_id')
+ClientUpdated = namedtuple('ClientUpdated', 'client_id')
+SupplierUpdated = namedtuple('SupplierUpdated', 'supplier_id')
+MessageSent = namedtuple('MessageSent', 'receiver_id')
+
+
+class EventBus:
+    """Publish/subscribe between pages, hosted on the app as `controller.events`
+
+    Handlers subscribe to one or more event types and receive a list of events. Publishing
+    only queues the event; the queue is flushed once Tk is idle, and each handler is called
+    once per flush with every matching event, so a bulk write that publishes hundreds of
+    events refreshes each view once. Events published on a worker thread wait for the
+    next flush on the Tk thread (DbExecutor flushes after every finished job).
+    """
+
+    def __init__(self, widget):
+        self.widget = widget
+        self._handlers = {}  # token -> (event types, handler)
+        self._next_token = 0
+        self._pending = []
+        self._scheduled = False
+        self._lock = threading.Lock()
+
+    def subscribe(self, event_types, handler):
+        """Call `handler(events)` for events of `event_types` (a type or tuple); returns a token"""
+        if not isinstance(event_types, tuple):
+            event_types = (event_types,)
+        with self._lock:
+            self._next_token += 1
+            self._handlers[self._next_token] = (event_types, handler)
+            return self._next_token
+
+    def unsubscribe(self, token):
+        with self._lock:
+            self._handlers.pop(token, None)
+
+    def publish(self, event):
+        with self._lock:
+            self._pending.append(event)
+            if self._scheduled or threading.current_thread() is not threading.main_thread():
+                return
+            self._scheduled = True
+        self.widget.after_idle(self.flush)
+
+    def flush(self):
+        """Deliver everything queued so far"""
+        with self._lock:
+            events, self._pending = self._pending, []
+            self._scheduled = False
+            handlers = list(self._handlers.values())
+        if not events:
+            return
+
+        for event_types, handler in handlers:
+            matching = [event for event in events if isinstance(event, event_types)]
+            if not matching:
+                continue
+            try:
+                handler(matching)
+            except Exception as e:
+                logging.error(f"Event handler {handler} failed: {e}")
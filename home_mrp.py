@@ -7,22 +7,25 @@ from tkinter import ttk
 from tkinter import messagebox, filedialog
 import customtkinter
 import customtkinter as ctk
-from customtkinter import CTkLabel, CTkEntry, CTkButton, CTkFrame, CTkImage, CTkToplevel
-from PIL import Image
-import sqlite3
+from customtkinter import CTkLabel, CTkEntry, CTkButton, CTkFrame, CTkToplevel
 import time
 from datetime import datetime
 import pytz
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-import pandas as pd
 import sys
 sys.path.append('C:/capstone')
 
 
 from pages_handler import FrameNames
+from assets import get_image
 from global_func import on_show, handle_logout
 from product import ProductManagementSystem
+from event_bus import OrderChanged, OrderApproved, StockChanged, ProductChanged, ClientUpdated
+from timestamps import display_date, seconds_until_tomorrow
+
+# Deadline bucket of the material shortage plan: 'day' or 'week'
+PLAN_BUCKET = 'week'
+# Slack after midnight before the date-based values are recomputed
+ROLLOVER_DELAY_MS = 1000
 
 class MainMRP(tk.Frame):
     def __init__(self, parent, controller):
@@ -38,9 +41,7 @@ class MainMRP(tk.Frame):
         self.main_desc = CTkFrame(self, fg_color="#84a8db", height=50, corner_radius=0)
         self.main_desc.pack(side="top", fill="x", padx=(0, 0), pady=(0, 5))  # Sticks to the top, fills X
 
-        novus_logo = Image.open('C:/capstone/labels/novus_logo1.png')
-        novus_logo = novus_logo.resize((50, 50))
-        self.novus_photo = CTkImage(novus_logo, size=(50, 50))
+        self.novus_photo = get_image('C:/capstone/labels/novus_logo1.png', (50, 50))
 
         #Buttons Images
         self.clients_btn = self._images_buttons('C:/capstone/labels/client_btn.png', size=(100,100))
@@ -84,28 +85,48 @@ class MainMRP(tk.Frame):
         # Red dot indicator (small and neat)
         self.red_dot = tk.Canvas(self.low_count_btn_frame, width=14, height=14, bg="#84a8db", highlightthickness=0)
         self.red_dot.pack(side="left", pady=8)
-        self.update_low_count_dot()
+
+        # --- MATERIAL SHORTAGES BUTTON (time-phased plan of all pending orders) ---
+        self.plan = None
+        self._plan_building = False
+        self._plan_pending = (set(), set())  # order ids, mat ids changed while the plan is being built
+        self.shortage_btn = CTkButton(
+            self.main_desc,
+            text="Material Shortages",
+            fg_color="#e67e22",
+            hover_color="#d35400",
+            text_color="white",
+            font=('Segoe UI', 12, 'bold'),
+            command=self.show_shortage_window,
+            width=180,
+            height=36,
+            corner_radius=8
+        )
+        self.shortage_btn.pack(side="right", padx=10, pady=8)
 
         # --- DASHBOARD ROW (centered horizontally) ---
         self._dashboard_row()
 
         # --- DEADLINE DASHBOARD (below dashboard row) ---
         self._deadline_dashboard()
+        self.refresh_dashboard()
 
-    def refresh_dashboard(self):
-        """Refresh all dashboard cards and deadline dashboard with latest DB values."""
-        # Destroy and recreate dashboard row
-        if hasattr(self, 'dashboard_row_frame') and self.dashboard_row_frame.winfo_exists():
-            self.dashboard_row_frame.destroy()
-        self._dashboard_row()
+        # Redraw when another page (EventBus) or another terminal (change_log) changes what the
+        # dashboard shows; the watcher skips this process's own writes so each one redraws once
+        self.controller.events.subscribe((OrderChanged, OrderApproved, StockChanged, ProductChanged, ClientUpdated),
+                                         lambda events: self.refresh_dashboard())
+        self.controller.changes.subscribe(lambda changes: self.refresh_dashboard(),
+                                          tables=('orders', 'products', 'raw_mats', 'clients'), local=False)
 
-        # Destroy and recreate deadline dashboard
-        if hasattr(self, 'deadline_dashboard_frame') and self.deadline_dashboard_frame.winfo_exists():
-            self.deadline_dashboard_frame.destroy()
-        self._deadline_dashboard()
+        # The shortage plan is built once, then only the changed orders and materials are re-read
+        self.controller.events.subscribe((OrderChanged, OrderApproved, StockChanged), self._plan_events)
+        self.controller.changes.subscribe(
+            lambda changes: self._update_plan(changes.get('orders', ()), changes.get('raw_mats', ())),
+            tables=('orders', 'raw_mats'), local=False)
+        self._build_plan()
 
-        # Update the low count notification dot
-        self.update_low_count_dot()
+        # "Due today" and the deadline list only change with the date when nothing is written
+        self._schedule_rollover()
 
     def refresh_low_items(self):
         # Create or focus the low inventory window
@@ -129,6 +150,10 @@ class MainMRP(tk.Frame):
             
             # Create scrollable area
             self._setup_scrollable_area()
+
+            # Reload only when raw_mats actually changes
+            self._low_inv_watch = self.controller.changes.subscribe(
+                lambda changes: self._load_and_display_items(), tables=('raw_mats',))
         else:
             self.low_inv_window.lift()  # Bring to front if already exists
         
@@ -163,15 +188,11 @@ class MainMRP(tk.Frame):
                 widget.destroy()
             
             # Get data from database
-            conn = sqlite3.connect('main.db')
-            cursor = conn.cursor()
-            cursor.execute('SELECT mat_id, mat_name, mat_volume, supplier_id FROM raw_mats')
-            low_items = [row for row in cursor.fetchall() if row[2] < 100]
-            conn.close()
+            low_items = self.controller.repos.materials.low_stock()
             
             # Update header
             self.header_label.configure(
-                text=f"{len(low_items)} Low Volume Items (Volume < Unit of Measurement)",
+                text=f"{len(low_items)} Low Volume Items (Volume < Low Count)",
                 text_color='red' if low_items else 'green'
             )
             
@@ -186,7 +207,7 @@ class MainMRP(tk.Frame):
                 CTkLabel(headers, text="Stock", width=15, font=('Arial', 12, 'bold')).pack(side='right', padx=5)
                 
                 # Add items
-                for mat_id, name, vol, supplier in low_items:
+                for mat_id, name, vol, _, supplier in low_items:
                     item = tk.Frame(self.items_frame)
                     item.pack(fill='x', pady=2)
                     
@@ -198,13 +219,9 @@ class MainMRP(tk.Frame):
                             command=lambda m=mat_id: self.open_edit_window(m)).pack(side='right', padx=5)
             else:
                 CTkLabel(self.items_frame, 
-                    text="All items are properly stocked (≥100 units)",
+                    text="All items are above their low count",
                     font=('Arial', 14),
                     text_color='green').pack(pady=20)
-            
-            # Schedule next refresh if window still exists
-            if hasattr(self, 'low_inv_window') and self.low_inv_window.winfo_exists():
-                self.low_inv_window.after(5000, self.refresh_low_items)
                 
         except Exception as e:
             messagebox.showerror("Database Error", f"Failed to load inventory: {str(e)}")
@@ -212,8 +229,8 @@ class MainMRP(tk.Frame):
     def _close_low_inv_window(self):
         """Properly clean up the low inventory window"""
         if hasattr(self, 'low_inv_window') and self.low_inv_window.winfo_exists():
-            # Cancel any pending refresh
-            self.low_inv_window.after_cancel(self.refresh_low_items)
+            # Stop listening for inventory changes
+            self.controller.changes.unsubscribe(self._low_inv_watch)
             self.low_inv_window.destroy()
 
     def open_edit_window(self, material_id):
@@ -273,69 +290,6 @@ class MainMRP(tk.Frame):
     def _refresh_low_items(self):
         pass
             
-    def _deadlines(self):
-        dl_frame = CTkFrame(self, fg_color='white', border_color='black', border_width=1, height=270, width=600)
-        dl_frame.place(relx = 0.27, rely = 0.54)
-
-        # Create container for dynamic content
-        self.dl_container = tk.Frame(dl_frame, bg='white')
-        self.dl_container.pack(fill='both', expand=True)
-
-        self._dl_report_refresh()
-
-    def _dl_report_refresh(self):
-
-        try:
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-
-            today = datetime.today().date()
-            today_str = today.strftime("%Y-%m-%d")
-
-            c.execute("SELECT order_id, order_name, order_dl FROM orders") 
-            all_orders = c.fetchall()  
-
-            dl_info = [(ord_id, ord_name, ord_dl) for ord_id, ord_name, ord_dl in all_orders if ord_dl == today_str]
-
-            for widget in self.dl_container.winfo_children():
-                widget.destroy()
-
-            tk.Label(self.dl_container, 
-            text=f"{len(dl_info)} Deadline(s) Today", 
-            font=('Arial', 9), bg='white', fg='red').pack(anchor='n', pady=(0, 15))
-
-            canvas = tk.Canvas(self.dl_container, bg='white', 
-                            highlightthickness=0, height=180, width=450)
-            scrollbar = tk.Scrollbar(self.dl_container, orient='vertical', command=canvas.yview, width=5, bg='#404040', troughcolor='#e0e0e0')
-            scroll_frame = tk.Frame(canvas, bg='white')
-            scroll_frame.bind('<Configure>', lambda e: canvas.configure(
-                scrollregion=canvas.bbox('all')))
-            canvas.create_window((0, 0), window=scroll_frame, anchor='nw')
-            canvas.configure(yscrollcommand=scrollbar.set)
-
-            canvas.pack(side='left', fill='both', expand=True)
-            scrollbar.pack(side='right', fill='y')
-
-            if dl_info:
-                for ord_id, ord_name, ord_dl in dl_info:
-                        item_frame = tk.Frame(scroll_frame, bg='white')
-                        item_frame.pack(fill='x', pady=2)
-                        
-                        tk.Label(item_frame, text=ord_id, bg='white', anchor='w', width=15).pack(side='left')
-                        tk.Label(item_frame, text=ord_name, bg='white', anchor='w', width=15).pack(side='left')
-                        tk.Label(item_frame, text=ord_dl, bg='white', anchor='w').pack(side='right')
-            else:
-                tk.Label(self.dl_container, text="No Deadlines Today",font=('Arial', 12), bg='white', fg='green').pack(anchor='w',pady=20)
-                        
-
-        except sqlite3.Error as e:
-            messagebox.showerror("Database Error", str(e))
-        except Exception as e:
-            messagebox.showerror("Error", f"An unexpected error occurred: {str(e)}")
-
-        # Schedule next refresh (5000ms = 5 seconds)
-        self.dl_container.after(5000, self._dl_report_refresh)
-
     def _to_excel(self):
         to_excel = CTkFrame(self, fg_color='white',  border_color='black',  border_width=1, height=270, width=240)
         to_excel.pack(side='left', padx=5)
@@ -353,81 +307,30 @@ class MainMRP(tk.Frame):
         self.client_tree.column(columns, width=100)
 
     def _images_buttons(self, image_path, size=(40, 40)):
-
-        image = Image.open(image_path)
-        size = size
-        return CTkImage(image)
+        return get_image(image_path, size, display_size=(20, 20))
     
     def _dashboard_row(self):
         """Create a horizontal row for product, order, and raw materials dashboards, centered."""
         self.dashboard_row_frame = tk.Frame(self, bg='white')
         self.dashboard_row_frame.place(relx=0.5, rely=0.11, anchor='n')  # Centered horizontally, near top
 
-        self._product_dashboard(parent=self.dashboard_row_frame)
-        self._orders_dashboard(parent=self.dashboard_row_frame)
-        self._rawmats_dashboard(parent=self.dashboard_row_frame)
-
-    def _product_dashboard(self, parent):
-        """Dashboard card for total products."""
-        dashboard_frame = CTkFrame(
-            parent,
-            fg_color='white',
-            border_color='#e0e0e0',
-            border_width=2,
-            height=150,
-            width=280,
-            corner_radius=16,
-        )
-        dashboard_frame.pack(side="left", padx=20, pady=10)
-
-        title = CTkLabel(
-            dashboard_frame,
-            text="Total Products",
-            font=('Segoe UI', 15, 'bold'),
-            text_color='#2a4d69'
-        )
-        title.pack(pady=(18, 0))
-
-        try:
-            conn = sqlite3.connect('main.db')
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM products")
-            count = cursor.fetchone()[0]
-            conn.close()
-        except Exception:
-            count = "?"
-
-        value_label = CTkLabel(
-            dashboard_frame,
-            text=str(count),
-            font=('Segoe UI', 34, 'bold'),
-            text_color='#4b86b4'
-        )
-        value_label.pack(pady=(4, 10))
-
-        def on_enter(e):
-            dashboard_frame.configure(fg_color='#f5faff')
-        def on_leave(e):
-            dashboard_frame.configure(fg_color='white')
-        dashboard_frame.bind("<Enter>", on_enter)
-        dashboard_frame.bind("<Leave>", on_leave)
-        title.bind("<Enter>", on_enter)
-        title.bind("<Leave>", on_leave)
-        value_label.bind("<Enter>", on_enter)
-        value_label.bind("<Leave>", on_leave)
-
         def open_product_list(event=None):
             try:
-                product_window = ProductManagementSystem(self, controller=None, show_only_list=True)
+                product_window = ProductManagementSystem(self, controller=self.controller, show_only_list=True)
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to open Product List: {e}")
 
-        dashboard_frame.bind("<Button-1>", open_product_list)
-        title.bind("<Button-1>", open_product_list)
-        value_label.bind("<Button-1>", open_product_list)
-
-    def _orders_dashboard(self, parent):
-        """Dashboard card for total orders, same size and style as product dashboard."""
+        # Value and caption labels per card, filled in by _update_stats
+        self.stat_labels = {
+            'products': self._stat_card(self.dashboard_row_frame, "Total Products", open_product_list),
+            'orders': self._stat_card(self.dashboard_row_frame, "Total Orders",
+                                      lambda event=None: self.controller.show_frame(FrameNames.ORDERS)),
+            'materials': self._stat_card(self.dashboard_row_frame, "Raw Materials",
+                                         lambda event=None: self.controller.show_frame(FrameNames.INVENTORY)),
+        }
+
+    def _stat_card(self, parent, text, on_click):
+        """One dashboard card; returns its (value label, caption label)"""
         dashboard_frame = CTkFrame(
             parent,
             fg_color='white',
@@ -441,106 +344,63 @@ class MainMRP(tk.Frame):
 
         title = CTkLabel(
             dashboard_frame,
-            text="Total Orders",
+            text=text,
             font=('Segoe UI', 15, 'bold'),
             text_color='#2a4d69'
         )
         title.pack(pady=(18, 0))
 
-        try:
-            conn = sqlite3.connect('main.db')
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM orders")
-            count = cursor.fetchone()[0]
-            conn.close()
-        except Exception:
-            count = "?"
-
         value_label = CTkLabel(
             dashboard_frame,
-            text=str(count),
+            text="",
             font=('Segoe UI', 34, 'bold'),
             text_color='#4b86b4'
         )
-        value_label.pack(pady=(4, 10))
+        value_label.pack(pady=(4, 0))
+
+        caption = CTkLabel(
+            dashboard_frame,
+            text="",
+            font=('Segoe UI', 11),
+            text_color='#7f8c8d'
+        )
+        caption.pack(pady=(0, 10), padx=16)
 
         def on_enter(e):
             dashboard_frame.configure(fg_color='#f5faff')
         def on_leave(e):
             dashboard_frame.configure(fg_color='white')
-        dashboard_frame.bind("<Enter>", on_enter)
-        dashboard_frame.bind("<Leave>", on_leave)
-        title.bind("<Enter>", on_enter)
-        title.bind("<Leave>", on_leave)
-        value_label.bind("<Enter>", on_enter)
-        value_label.bind("<Leave>", on_leave)
-
-        def open_orders_page(event=None):
-            if self.controller:
-                self.controller.show_frame(FrameNames.ORDERS)
-
-        dashboard_frame.bind("<Button-1>", open_orders_page)
-        title.bind("<Button-1>", open_orders_page)
-        value_label.bind("<Button-1>", open_orders_page)
-
-    def _rawmats_dashboard(self, parent):
-        """Dashboard card for total raw materials, same size and style as others."""
-        dashboard_frame = CTkFrame(
-            parent,
-            fg_color='white',
-            border_color='#e0e0e0',
-            border_width=2,
-            height=150,
-            width=280,
-            corner_radius=16,
-        )
-        dashboard_frame.pack(side="left", padx=20, pady=10)
+        for widget in (dashboard_frame, title, value_label, caption):
+            widget.bind("<Enter>", on_enter)
+            widget.bind("<Leave>", on_leave)
+            widget.bind("<Button-1>", on_click)
 
-        title = CTkLabel(
-            dashboard_frame,
-            text="Raw Materials",
-            font=('Segoe UI', 15, 'bold'),
-            text_color='#2a4d69'
-        )
-        title.pack(pady=(18, 0))
+        return value_label, caption
 
+    def _update_stats(self):
+        """Set the card values from one stats query; returns the stats (None on error)"""
         try:
-            conn = sqlite3.connect('main.db')
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM raw_mats")
-            count = cursor.fetchone()[0]
-            conn.close()
+            stats = self.controller.repos.dashboard.stats()
         except Exception:
-            count = "?"
-
-        value_label = CTkLabel(
-            dashboard_frame,
-            text=str(count),
-            font=('Segoe UI', 34, 'bold'),
-            text_color='#4b86b4'
-        )
-        value_label.pack(pady=(4, 10))
-
-        def on_enter(e):
-            dashboard_frame.configure(fg_color='#f5faff')
-        def on_leave(e):
-            dashboard_frame.configure(fg_color='white')
-        dashboard_frame.bind("<Enter>", on_enter)
-        dashboard_frame.bind("<Leave>", on_leave)
-        title.bind("<Enter>", on_enter)
-        title.bind("<Leave>", on_leave)
-        value_label.bind("<Enter>", on_enter)
-        value_label.bind("<Leave>", on_leave)
-
-        def open_rawmats_page(event=None):
-            if self.controller:
-                self.controller.show_frame(FrameNames.INVENTORY)
-
-        dashboard_frame.bind("<Button-1>", open_rawmats_page)
-        title.bind("<Button-1>", open_rawmats_page)
-        value_label.bind("<Button-1>", open_rawmats_page)
-
-    def _deadline_dashboard(self):
+            for value_label, caption in self.stat_labels.values():
+                value_label.configure(text="?")
+                caption.configure(text="")
+            return None
+
+        def by_status(counts):
+            return " · ".join(f"{n} {status.lower()}" for status, n in sorted(counts.items()))
+
+        captions = {
+            'products': by_status(stats['products_by_status']),
+            'orders': by_status(stats['orders_by_status']) + f" · {stats['due_today']} due today",
+            'materials': f"{stats['low_stock']} below low count",
+        }
+        for key, (value_label, caption) in self.stat_labels.items():
+            value_label.configure(text=str(stats[key]))
+            caption.configure(text=captions[key])
+        return stats
+
+    def _deadline_dashboard(self, rows=3):
         """Dashboard card showing the first 3 upcoming order deadlines (with client name) below the dashboard row."""
         self.deadline_dashboard_frame = CTkFrame(
             self,
@@ -569,36 +429,37 @@ class MainMRP(tk.Frame):
         tk.Label(header_frame, text="Client", font=('Segoe UI', 11, 'bold'), bg='white', fg='#34495e', width=20, anchor='w').pack(side='left')
         tk.Label(header_frame, text="Deadline", font=('Segoe UI', 11, 'bold'), bg='white', fg='#34495e', width=15, anchor='w').pack(side='left')
 
-        # Data rows
+        # Fixed slots for the data rows, filled in by _update_deadlines
+        self.deadline_rows = []
+        for _ in range(rows):
+            row_frame = tk.Frame(self.deadline_dashboard_frame, bg='white')
+            row_frame.pack(fill='x', padx=20, pady=2)
+            labels = []
+            for width in (20, 20, 20, 15):
+                label = tk.Label(row_frame, text="", font=('Segoe UI', 10), bg='white', fg='#2a4d69', width=width, anchor='w')
+                label.pack(side='left')
+                labels.append(label)
+            self.deadline_rows.append(labels)
+
+        self.no_deadlines_label = tk.Label(self.deadline_dashboard_frame, text="No upcoming deadlines.",
+                                           font=('Segoe UI', 10, 'italic'), bg='white', fg='#b2bec3')
+
+    def _update_deadlines(self):
+        """Rewrite the deadline slots in place"""
         try:
-            conn = sqlite3.connect('main.db')
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT o.order_name, p.product_name, c.client_name, o.deadline
-                FROM orders o
-                JOIN products p ON o.product_id = p.product_id
-                JOIN clients c ON o.client_id = c.client_id
-                WHERE o.status_quo != 'Cancelled'
-                ORDER BY date(o.deadline) ASC
-                LIMIT 3
-            """)
-            deadlines = cursor.fetchall()
-            conn.close()
+            deadlines = self.controller.repos.orders.upcoming_deadlines(limit=len(self.deadline_rows))
         except Exception:
             deadlines = []
 
-        for order_name, product_name, client_name, deadline in deadlines:
-            row_frame = tk.Frame(self.deadline_dashboard_frame, bg='white')
-            row_frame.pack(fill='x', padx=20, pady=2)
-            tk.Label(row_frame, text=order_name, font=('Segoe UI', 10), bg='white', fg='#2a4d69', width=20, anchor='w').pack(side='left')
-            tk.Label(row_frame, text=product_name, font=('Segoe UI', 10), bg='white', fg='#2a4d69', width=20, anchor='w').pack(side='left')
-            tk.Label(row_frame, text=client_name, font=('Segoe UI', 10), bg='white', fg='#2a4d69', width=20, anchor='w').pack(side='left')
-            tk.Label(row_frame, text=deadline, font=('Segoe UI', 10), bg='white', fg='#2a4d69', width=15, anchor='w').pack(side='left')
+        for i, labels in enumerate(self.deadline_rows):
+            values = deadlines[i] if i < len(deadlines) else ("", "", "", "")
+            for label, value in zip(labels, values):
+                label.configure(text=value)
 
-        if not deadlines:
-            empty_frame = tk.Frame(self.deadline_dashboard_frame, bg='white')
-            empty_frame.pack(fill='x', padx=20, pady=10)
-            tk.Label(empty_frame, text="No upcoming deadlines.", font=('Segoe UI', 10, 'italic'), bg='white', fg='#b2bec3').pack(anchor='w')
+        if deadlines:
+            self.no_deadlines_label.pack_forget()
+        else:
+            self.no_deadlines_label.pack(anchor='w', padx=20, pady=10)
 
 #Global Functions
 
@@ -608,19 +469,16 @@ class MainMRP(tk.Frame):
     def handle_logout(self):
         handle_logout(self)
 
-    def update_low_count_dot(self):
-        """Show/hide red dot if there are low count materials."""
-        try:
-            conn = sqlite3.connect('main.db')
-            cursor = conn.cursor()
-            cursor.execute("SELECT mat_volume, low_count FROM raw_mats")
-            low_items = [row for row in cursor.fetchall() if row[0] < row[1]]
-            conn.close()
-        except Exception:
-            low_items = []
+    def update_low_count_dot(self, low_count=None):
+        """Show/hide red dot if there are low count materials (`low_count` if already known)."""
+        if low_count is None:
+            try:
+                low_count = self.controller.repos.materials.low_stock_count()
+            except Exception:
+                low_count = 0
 
         self.red_dot.delete("all")
-        if low_items:
+        if low_count:
             # Draw a small red dot in the center
             self.red_dot.create_oval(3, 3, 11, 11, fill="red", outline="")
         # else: no dot
@@ -629,7 +487,7 @@ class MainMRP(tk.Frame):
         """Show a neat window with info about low count materials, with both scrollbars."""
         win = tk.Toplevel(self)
         win.title("Low Count Materials")
-        win.geometry("600x400")
+        win.geometry("800x400")
         win.resizable(True, True)
         frame = CTkFrame(win, fg_color="white")
         frame.pack(fill="both", expand=True, padx=18, pady=18)
@@ -650,29 +508,34 @@ class MainMRP(tk.Frame):
         table_canvas.create_window((0, 0), window=table_frame, anchor="nw")
 
         # Table headers
-        headers = ["ID", "Material Name", "Volume", "Low Count", "Supplier"]
+        headers = ["ID", "Material Name", "Volume", "Low Count", "Pending Demand", "Short By", "Supplier"]
         for col, text in enumerate(headers):
             tk.Label(table_frame, text=text, font=('Segoe UI', 12, 'bold'), bg="white", fg="#2980b9", width=18, anchor="w").grid(row=0, column=col, padx=4, pady=4, sticky="w")
 
         # Fetch and display low count items
         try:
-            conn = sqlite3.connect('main.db')
-            cursor = conn.cursor()
-            cursor.execute("SELECT mat_id, mat_name, mat_volume, low_count, supplier_id FROM raw_mats")
-            low_items = [row for row in cursor.fetchall() if row[2] < row[3]]
-            conn.close()
+            low_items = self.controller.repos.materials.low_stock()
         except Exception:
             low_items = []
+        # What pending orders still need of each material, and how far current stock falls short
+        try:
+            demand = {row[0]: (row[3], row[4]) for row in
+                      self.controller.repos.dashboard.net_requirements().rows(only_short=False)}
+        except Exception:
+            demand = {}
 
         if low_items:
             for r, (mat_id, name, vol, low, supplier) in enumerate(low_items, start=1):
+                gross, short = demand.get(mat_id, (0, 0))
                 tk.Label(table_frame, text=mat_id, bg="white", font=('Segoe UI', 11), width=18, anchor="w").grid(row=r, column=0, padx=4, pady=2, sticky="w")
                 tk.Label(table_frame, text=name, bg="white", font=('Segoe UI', 11), width=18, anchor="w").grid(row=r, column=1, padx=4, pady=2, sticky="w")
                 tk.Label(table_frame, text=str(vol), bg="white", font=('Segoe UI', 11), fg="#e74c3c", width=18, anchor="w").grid(row=r, column=2, padx=4, pady=2, sticky="w")
                 tk.Label(table_frame, text=str(low), bg="white", font=('Segoe UI', 11), fg="#e74c3c", width=18, anchor="w").grid(row=r, column=3, padx=4, pady=2, sticky="w")
-                tk.Label(table_frame, text=supplier, bg="white", font=('Segoe UI', 11), width=18, anchor="w").grid(row=r, column=4, padx=4, pady=2, sticky="w")
+                tk.Label(table_frame, text=f"{gross:g}", bg="white", font=('Segoe UI', 11), width=18, anchor="w").grid(row=r, column=4, padx=4, pady=2, sticky="w")
+                tk.Label(table_frame, text=f"{short:g}" if short else "-", bg="white", font=('Segoe UI', 11), fg="#e74c3c", width=18, anchor="w").grid(row=r, column=5, padx=4, pady=2, sticky="w")
+                tk.Label(table_frame, text=supplier, bg="white", font=('Segoe UI', 11), width=18, anchor="w").grid(row=r, column=6, padx=4, pady=2, sticky="w")
         else:
-            tk.Label(table_frame, text="No materials are below their low count.", font=('Segoe UI', 12), bg="white", fg="green").grid(row=1, column=0, columnspan=5, pady=18)
+            tk.Label(table_frame, text="No materials are below their low count.", font=('Segoe UI', 12), bg="white", fg="green").grid(row=1, column=0, columnspan=7, pady=18)
 
         # Make table scrollable in both directions
         def _on_frame_configure(event):
@@ -681,18 +544,111 @@ class MainMRP(tk.Frame):
 
         win.protocol("WM_DELETE_WINDOW", lambda: [win.destroy(), self.update_low_count_dot()])
 
-    # Call update_low_count_dot after any inventory change
     def refresh_dashboard(self):
-        """Refresh all dashboard cards and deadline dashboard with latest DB values."""
-        # Destroy and recreate dashboard row
-        if hasattr(self, 'dashboard_row_frame') and self.dashboard_row_frame.winfo_exists():
-            self.dashboard_row_frame.destroy()
-        self._dashboard_row()
-
-        # Destroy and recreate deadline dashboard
-        if hasattr(self, 'deadline_dashboard_frame') and self.deadline_dashboard_frame.winfo_exists():
-            self.deadline_dashboard_frame.destroy()
-        self._deadline_dashboard()
+        """Refresh all dashboard cards and deadline dashboard with latest DB values, in place."""
+        stats = self._update_stats()
+        self._update_deadlines()
 
         # Update the low count notification dot
-        self.update_low_count_dot()
+        self.update_low_count_dot(stats['low_stock'] if stats else None)
+
+    def _schedule_rollover(self):
+        self.after(int(seconds_until_tomorrow() * 1000) + ROLLOVER_DELAY_MS, self._date_rolled_over)
+
+    def _date_rolled_over(self):
+        self.refresh_dashboard()
+        self._schedule_rollover()
+
+    def _build_plan(self):
+        """Build the shortage plan on a worker; changes seen meanwhile are applied once it is ready"""
+        self._plan_building = True
+        self.controller.executor.submit(self.controller.repos.dashboard.time_phased_plan, PLAN_BUCKET,
+                                        on_done=self._plan_built, on_error=self._plan_failed)
+
+    def _plan_built(self, plan):
+        self._plan_building = False
+        self.plan = plan
+        order_ids, mat_ids = self._plan_pending
+        self._plan_pending = (set(), set())
+        self._update_plan(order_ids, mat_ids)
+
+    def _plan_failed(self, error):
+        self._plan_building = False
+        self.shortage_btn.configure(text="Material Shortages (?)")
+
+    def _plan_events(self, events):
+        order_ids, mat_ids = set(), set()
+        for event in events:
+            if isinstance(event, OrderChanged):
+                order_ids.add(event.order_id)
+            elif isinstance(event, OrderApproved):
+                order_ids.update(event.order_ids)
+            else:
+                mat_ids.update(event.mat_ids)
+        self._update_plan(order_ids, mat_ids)
+
+    def _update_plan(self, order_ids=(), mat_ids=()):
+        """Re-read only the given orders and materials into the plan and update the button"""
+        if self._plan_building:
+            self._plan_pending[0].update(order_ids)
+            self._plan_pending[1].update(mat_ids)
+            return
+        if self.plan is None:
+            return
+        if order_ids or mat_ids:
+            try:
+                self.controller.repos.dashboard.update_plan(self.plan, order_ids, mat_ids)
+            except Exception:
+                self._build_plan()
+                return
+        short = self.plan.short_count
+        self.shortage_btn.configure(text=f"Material Shortages ({short})" if short else "Material Shortages")
+
+    def show_shortage_window(self):
+        """Materials pending orders will run out of, by the first deadline bucket they go negative in;
+        selecting one shows its stock projected bucket by bucket"""
+        bucket_label = "Week Of" if PLAN_BUCKET == 'week' else "Day"
+        win = tk.Toplevel(self)
+        win.title("Material Shortages")
+        win.geometry("820x520")
+        frame = CTkFrame(win, fg_color="white")
+        frame.pack(fill="both", expand=True, padx=18, pady=18)
+
+        header = CTkLabel(frame, text="Pending Orders vs. Stock", font=('Segoe UI', 16, 'bold'), text_color='#e67e22')
+        header.pack(pady=(0, 12))
+
+        def table(parent, columns, headings, height):
+            holder = tk.Frame(parent, bg="white")
+            holder.pack(fill="both", expand=True, pady=(0, 10))
+            tree = ttk.Treeview(holder, columns=columns, show='headings', height=height)
+            scrollbar = tk.Scrollbar(holder, orient="vertical", command=tree.yview)
+            tree.configure(yscrollcommand=scrollbar.set)
+            for column, text in zip(columns, headings):
+                tree.heading(column, text=text)
+                tree.column(column, width=150 if column == 'mat_name' else 95, anchor='w')
+            scrollbar.pack(side="right", fill="y")
+            tree.pack(side="left", fill="both", expand=True)
+            return tree
+
+        tree = table(frame, ('mat_id', 'mat_name', 'on_hand', 'gross', 'shortage', 'orders', 'first_negative'),
+                     ("ID", "Material Name", "On Hand", "Needed", "Short", "Orders", f"Negative ({bucket_label})"), 10)
+        projection = table(frame, ('bucket', 'demand', 'projected'), (bucket_label, "Needed", "Projected Stock"), 6)
+
+        rows = self.plan.rows() if self.plan else []
+        for mat_id, name, on_hand, gross, shortage, orders, first_negative in rows:
+            tree.insert('', 'end', iid=mat_id, values=(mat_id, name, f"{on_hand:g}", f"{gross:g}", f"{shortage:g}",
+                                                       orders, display_date(first_negative, default="No deadline")))
+        if not rows:
+            tree.insert('', 'end', values=("", "Pending orders are covered by stock.", "", "", "", "", ""))
+
+        def show_projection(event=None):
+            projection.delete(*projection.get_children())
+            selected = tree.selection()
+            if not selected or self.plan is None:
+                return
+            for bucket, demand, projected in self.plan.projection(selected[0]):
+                projection.insert('', 'end', values=(display_date(bucket, default="No deadline"),
+                                                     f"{demand:g}", f"{projected:g}"),
+                                  tags=('negative',) if projected < 0 else ())
+            projection.tag_configure('negative', foreground='#e74c3c')
+        tree.bind('<<TreeviewSelect>>', show_projection)
@@ -5,23 +5,24 @@ from tkinter import ttk
 from tkinter import messagebox, filedialog
 import customtkinter
 import customtkinter as ctk
-from customtkinter import CTkLabel, CTkEntry, CTkButton, CTkFrame, CTkImage, CTkToplevel
-from PIL import Image
+from customtkinter import CTkLabel, CTkEntry, CTkButton, CTkFrame, CTkToplevel
 import sqlite3
 import time
 from datetime import datetime
 import pytz
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
 import uuid
 import bcrypt
-import pandas as pd
 import os
 
 #Imported Files
 from pages_handler import FrameNames
+from assets import get_image
 
 from global_func import on_show, handle_logout
+from tree_paging import PagedTreeLoader
+from virtual_tree import VirtualTreeview
+from event_bus import StockChanged
+from database import DEFAULT_LOW_COUNT
 
 class InventoryPage(tk.Frame):
     def __init__(self, parent, controller):
@@ -37,9 +38,7 @@ class InventoryPage(tk.Frame):
             parent.pack_propagate(False)
 
 
-            novus_logo = Image.open('C:/capstone/labels/novus_logo1.png')
-            novus_logo = novus_logo.resize((50, 50))
-            self.novus_photo = CTkImage(novus_logo, size=(50, 50))
+            self.novus_photo = get_image('C:/capstone/labels/novus_logo1.png', (50, 50))
 
  
             #Buttons Images
@@ -73,7 +72,7 @@ class InventoryPage(tk.Frame):
             tree_frame = tk.Frame(self)
             tree_frame.place(x=120, y=105, width=1100, height=475)
 
-            self.inventory_tree = ttk.Treeview(        
+            self.inventory_tree = VirtualTreeview(        
     tree_frame, columns=('mat_id', 'mat_name', 'unit_measurement', 'mat_volume', 'low_count', 'mat_order_date', 'supplier_id'), show='headings', style='Treeview')
             self._column_heads('mat_id', 'MATERIAL ID')
             self._column_heads('mat_name', 'MATERIAL NAME')
@@ -98,7 +97,14 @@ class InventoryPage(tk.Frame):
             # Make the treeview expandable
             tree_frame.grid_rowconfigure(0, weight=1)
             tree_frame.grid_columnconfigure(0, weight=1)
+            self.inventory_tree.tag_configure('low', background='#ffe6e6')
+
+            materials = self.controller.repos.materials
+            self.mat_pages = PagedTreeLoader(self.inventory_tree, self.scrollbar, materials.list_page,
+                                             materials.page_key, render_row=self._mat_row)
             self.load_mats_from_db()
+            # Stock writes here and on other pages publish StockChanged, so this is the one reload
+            self.controller.events.subscribe(StockChanged, lambda events: self.load_mats_from_db())
 
     def _column_heads(self, columns, text):
         self.inventory_tree.heading(columns, text=text)
@@ -115,34 +121,25 @@ class InventoryPage(tk.Frame):
         entry.pack(pady=(0, 10))
         return entry
     
+    def _mat_row(self, row):
+        # row: (mat_id, mat_name, unit_measurement, mat_volume, low_count, mat_order_date, supplier_id)
+        # Same rule as database.LOW_STOCK, so the highlight agrees with the dashboard count
+        tags = ()
+        try:
+            mat_volume = float(row[3]) if row[3] is not None else 0
+            low_count = float(row[4]) if row[4] is not None else DEFAULT_LOW_COUNT
+            if mat_volume < low_count:
+                tags = ('low',)
+        except (ValueError, TypeError):
+            pass  # If conversion fails, skip highlighting
+        return {'values': row, 'tags': tags}
+
     def load_mats_from_db(self):
         try:
-            conn = sqlite3.connect("main.db")
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM raw_mats")
-            rows = cursor.fetchall()
-
-            # Clear existing rows
-            for i in self.inventory_tree.get_children():
-                self.inventory_tree.delete(i)
-
-            for row in rows:
-                # row: (mat_id, mat_name, unit_measurement, mat_volume, low_count, mat_order_date, supplier_id)
-                tags = ()
-                try:
-                    mat_volume = int(row[3]) if row[3] is not None else 0
-                    low_count = int(row[4]) if row[4] is not None else 0
-                    if mat_volume < low_count:
-                        tags = ('low',)
-                except (ValueError, TypeError):
-                    pass  # If conversion fails, skip highlighting
-                self.inventory_tree.insert("", "end", values=row, tags=tags)
-            self.inventory_tree.tag_configure('low', background='#ffe6e6')
+            self.mat_pages.refresh()
 
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", str(e))
-        finally:
-            conn.close()
 
     def add_mats(self):
         try:
@@ -165,11 +162,7 @@ class InventoryPage(tk.Frame):
                 self.mat_entries.append(entry)
 
             # Supplier dropdown (update row index to 5)
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-            c.execute('SELECT supplier_id FROM suppliers')
-            suppliers = [row[0] for row in c.fetchall()]
-            conn.close()
+            suppliers = self.controller.repos.suppliers.list_ids()
             self.suppliers_ids = tk.StringVar()
             self.suppliers_ids.set(suppliers[0] if suppliers else "")
             CTkLabel(self.mat_window, text='Supplier ID:', font=('Futura', 13, 'bold')).grid(row=5, column=0, padx=15, pady=10, sticky='e')
@@ -198,23 +191,14 @@ class InventoryPage(tk.Frame):
                     return
 
                 try:
-                    conn = sqlite3.connect('main.db')
-                    c = conn.cursor()
-                    c.execute("""
-                        INSERT INTO raw_mats (mat_id, mat_name, unit_measurement, mat_volume, low_count, mat_order_date, supplier_id)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, tuple(mat_data))
-                    conn.commit()
+                    repos = self.controller.repos
+                    with repos.transaction():
+                        repos.materials.add(*mat_data, performed_by=user_id)
+                        repos.logs.add(user_id, f"Added Material ID: {mat_data[0]}", timestamp)
                     messagebox.showinfo("Success", "Material registered successfully!")
-                    c.execute("""INSERT INTO user_logs (user_id, action, timestamp) VALUES (?,?,?)""",
-                                (user_id, f"Added Material ID: {mat_data[0]}", timestamp))
-                    conn.commit()
-                    self.load_mats_from_db()
                     self.mat_window.destroy()
                 except sqlite3.Error as e:
                     messagebox.showerror("Database Error", str(e))
-                finally:
-                    conn.close()
 
             submit_btn = CTkButton(self.mat_window, text='Submit All', font=("Arial", 12), width=120, height=30,
                                 bg_color='white', fg_color='blue', corner_radius=10, border_width=2,
@@ -227,46 +211,14 @@ class InventoryPage(tk.Frame):
     def srch_mats(self):
         search_term = self.search_entry.get().strip().lower()
         try:
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-            query = """
-                SELECT mat_id, mat_name, unit_measurement, mat_volume, low_count, mat_order_date, supplier_id
-                FROM raw_mats
-                WHERE LOWER(mat_id) LIKE ?
-                   OR LOWER(mat_name) LIKE ?
-                   OR LOWER(unit_measurement) LIKE ?
-                   OR LOWER(mat_volume) LIKE ?
-                   OR LOWER(low_count) LIKE ?
-                   OR LOWER(mat_order_date) LIKE ?
-                   OR LOWER(supplier_id) LIKE ?
-            """
-            param = f"%{search_term}%"
-            c.execute(query, (param, param, param, param, param, param, param))
-            rows = c.fetchall()
-
-            # Clear existing rows
-            for i in self.inventory_tree.get_children():
-                self.inventory_tree.delete(i)
-
-            if rows:
-                for row in rows:
-                    tags = ()
-                    try:
-                        mat_volume = int(row[3]) if row[3] is not None else 0
-                        low_count = int(row[4]) if row[4] is not None else 0
-                        if mat_volume < low_count:
-                            tags = ('low',)
-                    except (ValueError, TypeError):
-                        pass
-                    self.inventory_tree.insert("", "end", values=row, tags=tags)
-                self.inventory_tree.tag_configure('low', background='#ffe6e6')
-            else:
+            rows = self.controller.repos.materials.search(search_term)
+            self.mat_pages.show(rows)
+
+            if not rows:
                 messagebox.showinfo("Not Found", f"No material found matching '{search_term}'")
                 self.load_mats_from_db()
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", str(e))
-        finally:
-            conn.close()
 
     def del_mats(self):
         user_id = self.controller.session.get('user_id')
@@ -284,27 +236,20 @@ class InventoryPage(tk.Frame):
             if not confirm:
                 return
 
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-            c.execute("SELECT * FROM raw_mats WHERE mat_id =  ?", (mat_id,))
-            row = c.fetchone()
+            repos = self.controller.repos
+            with repos.transaction():
+                deleted = repos.materials.delete(mat_id)
+                if deleted:
+                    repos.logs.add(user_id, f"Deleted Material ID: {mat_id}", timestamp)
 
-            if row:
-                c.execute("DELETE FROM raw_mats WHERE mat_id = ?", (mat_id,))
-                conn.commit()
+            if deleted:
                 messagebox.showinfo("Deleted", f"Order ID '{mat_id}' has been deleted.")
-                self.load_mats_from_db()
-                c.execute("INSERT INTO user_logs (user_id, action, timestamp) VALUES (?, ?, ?)",
-                          (user_id, f"Deleted Material ID: {mat_id}", timestamp))
             else:
                 messagebox.showinfo("Not Found", f"No material found with ID '{mat_id}'")
 
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", str(e))
 
-        finally:
-            conn.close()
-
     def upd_mats(self):
         user_id = self.controller.session.get('user_id')
         timestamp = datetime.now(pytz.timezone('Asia/Manila')).strftime('%Y-%m-%d %H:%M:%S')
@@ -360,24 +305,14 @@ class InventoryPage(tk.Frame):
                 return
 
             try:
-                conn = sqlite3.connect('main.db')
-                c = conn.cursor()
-                c.execute('''
-                    UPDATE raw_mats
-                    SET unit_measurement=?, mat_volume=?, low_count=?
-                    WHERE mat_id=?
-                ''', (unit_measurement, mat_volume, low_count, original_id))
-                conn.commit()
+                repos = self.controller.repos
+                with repos.transaction(immediate=True):
+                    repos.materials.update_stock_levels(original_id, unit_measurement, mat_volume, low_count, user_id)
+                    repos.logs.add(user_id, f"Updated Material ID: {original_id}", timestamp)
                 messagebox.showinfo("Success", "Material updated successfully!")
-                self.load_mats_from_db()
-                c.execute("INSERT INTO user_logs (user_id, action, timestamp) VALUES (?, ?, ?)",
-                          (user_id, f"Updated Material ID: {original_id}", timestamp))
-                conn.commit()
                 top.destroy()
             except sqlite3.Error as e:
                 messagebox.showerror("Database Error", str(e))
-            finally:
-                conn.close()
 
         update_btn = CTkButton(top, text="Update", width=120, fg_color="#6a9bc3", command=update_material)
         update_btn.grid(row=len(fields), column=0, columnspan=2, pady=20)
@@ -386,18 +321,10 @@ class InventoryPage(tk.Frame):
         self.order_id = self.search_entry.get().strip().lower()
 
         try:
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-            c.execute('SELECT * FROM suppliers WHERE order_id = ?')
-            row = c.fetchone()
-
-            for i in self.inventory_tree.get_children():
-                self.inventory_tree.delete(i)
+            row = self.controller.repos.materials.get(self.order_id)
+            self.mat_pages.show([row] if row else [])
 
-
-            if row:
-                self.inventory_tree.insert("", 'end', values = row)
-            else:
+            if not row:
                 messagebox.showinfo('Not Found', f"No Order ID found with ID '{self.order_id}'")
                 self.load_mats_from_db()
 
@@ -419,15 +346,7 @@ class InventoryPage(tk.Frame):
 
         try:
 
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-
-            mat_info = c.execute("""
-                SELECT rm.mat_id, rm.mat_name, rm.mat_volume, s.supplier_id
-                FROM raw_mats rm
-                JOIN suppliers s ON rm.supplier_id = s.supplier_id
-                WHERE rm.mat_id = ? AND s.supplier_id = ?
-            """, (mat_id, mat_splr)).fetchall()
+            mat_info = self.controller.repos.materials.with_supplier(mat_id, mat_splr)
 
 
 
@@ -454,8 +373,6 @@ class InventoryPage(tk.Frame):
         except Exception as e:
             messagebox.showerror('Error', str(e))
             return
-        finally:
-            conn.close()
 
             
 
@@ -466,9 +383,7 @@ class InventoryPage(tk.Frame):
         button.pack(side="top", padx=5, pady=15)
 
     def _images_buttons(self, image_path, size=(40, 40)):
-        image = Image.open(image_path)
-        size = size
-        return CTkImage(image)
+        return get_image(image_path, size, display_size=(20, 20))
 
     def on_show(self):
         on_show(self)  # Calls the shared sidebar logic
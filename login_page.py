@@ -5,15 +5,11 @@ from tkinter import ttk
 from tkinter import messagebox, filedialog
 import customtkinter
 import customtkinter as ctk
-from customtkinter import CTkLabel, CTkEntry, CTkButton, CTkFrame, CTkImage
-from PIL import Image
+from customtkinter import CTkLabel, CTkEntry, CTkButton, CTkFrame
 import sqlite3
 import time
 from datetime import datetime, timedelta
 import pytz
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-import pandas as pd
 import os
 import uuid
 import hashlib
@@ -21,6 +17,7 @@ import bcrypt
 import logging
 
 from pages_handler import FrameNames
+from assets import get_image
 
 
 class LoginPage(tk.Frame):
@@ -126,21 +123,13 @@ class LoginPage(tk.Frame):
 
         def team_page():
             if not hasattr(self, 'team_frame'):
-                miss_universe = Image.open('C:/capstone/labels/jade.png')
-                miss_universe = miss_universe.resize((120, 120))
-                self.miss_universe_jj = CTkImage(miss_universe, size=((120, 120)))
+                self.miss_universe_jj = get_image('C:/capstone/labels/jade.png', (120, 120))
 
-                rhomar = Image.open('C:/capstone/labels/r.png')
-                rhomar = rhomar.resize((120, 110))
-                self.rhomar_pic = CTkImage(rhomar, size=((120, 110)))
+                self.rhomar_pic = get_image('C:/capstone/labels/r.png', (120, 110))
 
-                abnoy1 = Image.open('C:/capstone/labels/cd.png')
-                abnoy1 = abnoy1.resize((120, 110))
-                self.abnoy1_pic = CTkImage(abnoy1, size=((120, 120)))
+                self.abnoy1_pic = get_image('C:/capstone/labels/cd.png', (120, 110), (120, 120))
 
-                highlight = Image.open('C:/capstone/labels/hl.png')
-                highlight = highlight.resize((120, 110))
-                self.high_light = CTkImage(highlight, size=((120, 120)))
+                self.high_light = get_image('C:/capstone/labels/hl.png', (120, 110), (120, 120))
 
                 self.team_frame = CTkFrame(self, fg_color='white', height=600, width=1200)
                 self.team_frame.place(y=100)
@@ -186,17 +175,11 @@ class LoginPage(tk.Frame):
         CTkButton(self.option_menu, text='CONTACT', font=("Futura", 15, 'bold'), fg_color='#00117F', command=contact_page).pack(side='right', padx=90, pady=30)
         CTkButton(self.option_menu, text='TEAM', font=("Futura", 15, 'bold'), fg_color='#00117F', command=team_page).pack(side='right', padx=80, pady=30)
         # Load logos
-        user_logo = Image.open('C:/capstone/labels/user_logo.png')
-        user_logo = user_logo.resize((40,40))
-        self.user_photo = CTkImage(user_logo, size = ((40,40)))
+        self.user_photo = get_image('C:/capstone/labels/user_logo.png', (40, 40))
 
-        pass_logo = Image.open('C:/capstone/labels/pass_logo.png')
-        pass_logo = pass_logo.resize((40,40))
-        self.pass_photo = CTkImage(pass_logo, size = ((40,40)))
+        self.pass_photo = get_image('C:/capstone/labels/pass_logo.png', (40, 40))
 
-        novus_logo = Image.open('C:/capstone/labels/novus_logo1.png')
-        novus_logo = novus_logo.resize((200, 200))
-        self.novus_photo = CTkImage(novus_logo, size=(200, 200))
+        self.novus_photo = get_image('C:/capstone/labels/novus_logo1.png', (200, 200))
 
         CTkLabel(self, image=self.novus_photo, text="").place(x=520, y=150)
         CTkLabel(self, text='NOVUS INDUSTRY SOLUTIONS', font=('Futura', 25, 'bold'), bg_color='white').place(x=440, y=390)
@@ -234,9 +217,7 @@ class LoginPage(tk.Frame):
         passcode_entry.pack(pady=10)
 
         try:
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-            admin_pass = c.execute("SELECT * FROM users WHERE user_id = 'nickdiaz'").fetchone()
+            admin_pass = self.controller.repos.users.get('nickdiaz')
 
             if not admin_pass:
                 messagebox.showerror("Error", "Owner passcode not found in the database.")
@@ -254,8 +235,6 @@ class LoginPage(tk.Frame):
             messagebox.showerror("Error", f"An unexpected error occurred: {e}")
             self.only_owner.destroy()
             return
-        finally:
-            conn.close()
 
         def verify_passcode():
             entered_password = passcode_entry.get()
@@ -291,12 +270,10 @@ class LoginPage(tk.Frame):
             self.check_attempts()
             return
 
+        repos = self.controller.repos
         try:
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-
             # Verify credentials
-            login_user = c.execute('SELECT * FROM users WHERE username = ?', (username,)).fetchone()
+            login_user = repos.users.get_by_username(username)
 
             if not login_user:
                 self.attempts += 1
@@ -340,12 +317,7 @@ class LoginPage(tk.Frame):
 
             # Log successful login
             timestamp = datetime.now(pytz.timezone('Asia/Manila')).strftime('%Y-%m-%d %H:%M:%S')
-            c.execute(
-                "INSERT INTO user_logs (user_id, action, timestamp) VALUES (?, ?, ?)",
-                (user_id, 'Login', timestamp)
-            )
-            c.execute('UPDATE users SET last_login = ? WHERE user_id = ?', (timestamp, user_id))
-            conn.commit()
+            repos.users.record_login(user_id, timestamp)
             self.login_act.info(f"User  {user_id} logged in at {timestamp}")
 
             # Success
@@ -359,9 +331,7 @@ class LoginPage(tk.Frame):
             self.password_entry.delete(0, tk.END)
 
             # Check inventory after successful login/Notification
-            c.execute('SELECT mat_id, mat_name, mat_volume FROM raw_mats')
-            all_items = c.fetchall()
-            low_items = [(id, name, vol) for id, name, vol in all_items if vol < 100]
+            low_items = [(id, name, vol) for id, name, vol, _, _ in repos.materials.low_stock()]
 
             if low_items:
                 item_list = "\n".join([f"{name} (ID: {id}): {vol} units" for id, name, vol in low_items])
@@ -378,8 +348,6 @@ class LoginPage(tk.Frame):
             self.login_error.error(
                 f"Database error during login attempt {self.attempts}: {e}, Time: {datetime.now(pytz.timezone('Asia/Manila')).strftime('%Y-%m-%d %H:%M:%S')}"
             )
-        finally:
-            conn.close()
 
     def check_attempts(self):
         if self.attempts >= 3:  # Lock after 3 attempts
@@ -437,9 +405,8 @@ class LoginPage(tk.Frame):
             messagebox.showwarning("Input Error", "Please enter a username.")
             return
         try:
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-            fetched_user = c.execute('SELECT user_id, reset_token, reset_token_expiry FROM users WHERE username = ?', (forgot_username,)).fetchone()
+            users = self.controller.repos.users
+            fetched_user = users.get_reset_token(forgot_username)
             if not fetched_user:
                 messagebox.showerror("Error", "Username not found in the database.")
                 return
@@ -448,15 +415,12 @@ class LoginPage(tk.Frame):
             new_reset_token = str(uuid.uuid4())
             expiry_time = datetime.now(pytz.timezone('Asia/Manila')) + timedelta(minutes=30)
             # Update the user record with the new reset token and expiry
-            c.execute('UPDATE users SET reset_token = ?, reset_token_expiry = ? WHERE user_id = ?', (new_reset_token, expiry_time, user_id))
-            conn.commit()
+            users.set_reset_token(user_id, new_reset_token, expiry_time)
                     # Notify the user about the reset token
             messagebox.showinfo("Success", "Username found. You can now reset your password.")
             messagebox.showinfo("Reset Token", f"Your reset token is: {new_reset_token}\nIt will expire at {expiry_time.strftime('%Y-%m-%d %H:%M:%S')}")
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", f"An error occurred: {e}")
-        finally:
-            conn.close()
 
     def show_reset_password_dialog(self):
         """Show dialog to reset password using token"""
@@ -491,18 +455,11 @@ class LoginPage(tk.Frame):
             return
 
         try:
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
+            users = self.controller.repos.users
 
             # Verify the token is valid and not expired
             current_time = datetime.now(pytz.timezone('Asia/Manila'))
-            c.execute("""
-                SELECT reset_token_expiry FROM users
-                WHERE username = ? AND reset_token = ? AND reset_token_expiry > ?
-            """, (username, token, current_time))
-
-            result = c.fetchone()
-            if not result:
+            if not users.has_valid_reset_token(username, token, current_time):
                 messagebox.showerror("Error", "Invalid or expired token.")
                 return
 
@@ -511,19 +468,10 @@ class LoginPage(tk.Frame):
             hashed_pw = hashlib.sha256((new_password + salt).encode()).hexdigest()
 
             # Update password and clear reset token
-            c.execute("""
-                UPDATE users
-                SET password_hash = ?, salt = ?, 
-                    reset_token = NULL, reset_token_expiry = NULL
-                WHERE username = ?
-            """, (hashed_pw, salt, username))
-
-            conn.commit()
+            users.reset_password(username, hashed_pw, salt)
             messagebox.showinfo("Success", "Password has been reset successfully!")
 
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", f"An error occurred: {e}")
         except Exception as e:
             messagebox.showerror("Error", f"An unexpected error occurred: {e}")
-        finally:
-            conn.close()
@@ -1,9 +1,8 @@
 import tkinter as tk
 from tkinter import ttk
 import customtkinter as ctk
-from customtkinter import CTkLabel, CTkEntry, CTkButton, CTkFrame, CTkImage
+from customtkinter import CTkLabel, CTkEntry, CTkButton, CTkFrame
 import sqlite3
-from PIL import Image
 from tkinter import messagebox, filedialog
 import os
 from datetime import datetime
@@ -14,7 +13,9 @@ import logging
 
 
 from pages_handler import FrameNames
+from assets import get_image
 from global_func import on_show, handle_logout
+from tree_paging import PagedTreeLoader
 
 
 class MessagesPage(tk.Frame):
@@ -40,9 +41,7 @@ class MessagesPage(tk.Frame):
         self.main_desc = CTkFrame(self, fg_color="#84a8db", height=50, corner_radius=0)
         self.main_desc.pack(side="top", fill="x", padx=(0, 0), pady=(0, 10))
 
-        novus_logo = Image.open('C:/capstone/labels/novus_logo1.png')
-        novus_logo = novus_logo.resize((50, 50))
-        self.novus_photo = CTkImage(novus_logo, size=(50, 50))
+        self.novus_photo = get_image('C:/capstone/labels/novus_logo1.png', (50, 50))
 
 
         #Buttons Images
@@ -101,42 +100,34 @@ class MessagesPage(tk.Frame):
         for col in ('message_id', 'sender_id', 'receiver_id', 'subject', 'timestamp'):
             self.mail_tree.column(col, width=300, stretch=False)
         
-            # Scrollbars
-            self.scrollbar = tk.Scrollbar(tree_frame, orient="vertical", command=self.mail_tree.yview)
-            self.h_scrollbar = tk.Scrollbar(tree_frame, orient="horizontal", command=self.mail_tree.xview)
-            self.mail_tree.configure(yscrollcommand=self.scrollbar.set, xscrollcommand=self.h_scrollbar.set)
+        # Scrollbars
+        self.scrollbar = tk.Scrollbar(tree_frame, orient="vertical", command=self.mail_tree.yview)
+        self.h_scrollbar = tk.Scrollbar(tree_frame, orient="horizontal", command=self.mail_tree.xview)
+        self.mail_tree.configure(yscrollcommand=self.scrollbar.set, xscrollcommand=self.h_scrollbar.set)
 
-            # Use grid for proper layout
-            self.mail_tree.grid(row=0, column=0, sticky="nsew")
-            self.scrollbar.grid(row=0, column=1, sticky="w")
-            self.h_scrollbar.grid(row=1, column=0, sticky="ew")
+        # Use grid for proper layout
+        self.mail_tree.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, sticky="w")
+        self.h_scrollbar.grid(row=1, column=0, sticky="ew")
 
-            # Make the treeview expandable
-            tree_frame.grid_rowconfigure(0, weight=1)
-            tree_frame.grid_columnconfigure(0, weight=1)
+        # Make the treeview expandable
+        tree_frame.grid_rowconfigure(0, weight=1)
+        tree_frame.grid_columnconfigure(0, weight=1)
+
+        messages = self.controller.repos.messages
+        self.mail_pages = PagedTreeLoader(self.mail_tree, self.scrollbar, messages.list_page, messages.page_key)
 
         # Load initial data
         self.load_mails()
 
     def load_mails(self):
         try:
-            conn = sqlite3.connect("main.db")
-            cursor = conn.cursor()
-            cursor.execute("SELECT message_id, sender_id, receiver_id, subject, timestamp FROM messages")
-            rows = cursor.fetchall()
-
-            # Enumerate loop for getting every single client in the DB & inseting data in each column represented
-            for i in self.mail_tree.get_children():
-                self.mail_tree.delete(i)
-
-            for row in rows:
-                self.mail_tree.insert("", "end", values=row)
+            # Newest first, further pages load as the list is scrolled
+            self.mail_pages.refresh()
 
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", str(e))
             self.mail_error.error(f"Database Error: {e}")
-        finally:
-            conn.close()
             
         #Create Divider
 
@@ -152,11 +143,7 @@ class MessagesPage(tk.Frame):
             self.add_window.title('Write New Mail')
             self.add_window.config(bg='white')
 
-            conn = sqlite3.connect("main.db")
-            c = conn.cursor()
-            c.execute("SELECT user_id, f_name, l_name FROM users WHERE user_id != ?", (user_id,))
-            users = c.fetchall()
-            conn.close()
+            users = self.controller.repos.users.recipients(user_id)
 
             #Dropdown for selecting user fir messaging
             self.users_id = tk.StringVar(value="Select Receiver ID")
@@ -196,12 +183,8 @@ class MessagesPage(tk.Frame):
                 btn.grid(row=i, column=2, padx=5, pady=10)
 
             def send_mail():
-                conn = sqlite3.connect("main.db")
-                c = conn.cursor()
-                c.execute("INSERT INTO messages (sender_id, receiver_id, subject, body, timestamp) VALUES (?, ?, ?, ?, ?)",
-                            (user_id, self.users_id.get().split(' - ')[0], self.mail_entries[0].get(), self.mail_entries[1].get("1.0", "end").strip(), timestamp))
-                conn.commit()
-                conn.close()
+                self.controller.repos.messages.send(user_id, self.users_id.get().split(' - ')[0], self.mail_entries[0].get(),
+                                                    self.mail_entries[1].get("1.0", "end").strip(), timestamp)
                 messagebox.showinfo("Success", "Mail sent successfully!")
                 self.mail_log.info(f"Mail sent from {user_id} to {self.users_id.get().split(' - ')[0]} with subject '{self.mail_entries[0].get()}' at {timestamp}")
                 self.load_mails()
@@ -225,11 +208,7 @@ class MessagesPage(tk.Frame):
         confirm = messagebox.askyesno("Confirm Deletion", f"Are you sure you want to delete the mail with ID {message_id}?")
         if confirm:
             try:
-                conn = sqlite3.connect("main.db")
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM messages WHERE message_id=?", (message_id,))
-                conn.commit()
-                conn.close()
+                self.controller.repos.messages.delete(message_id)
                 self.load_mails()
                 messagebox.showinfo("Success", "Mail deleted successfully.")
                 self.mail_log.info(f"Mail with ID {message_id} deleted successfully.")
@@ -279,18 +258,11 @@ class MessagesPage(tk.Frame):
 
                     # Insert reply as a new message
                     try:
-                        conn = sqlite3.connect("main.db")
-                        c = conn.cursor()
                         sender_id = self.controller.session.get('user_id')
                         receiver_id = values[1]  # reply to the original sender
                         subject = "Reply: " + values[3]
                         timestamp = datetime.now(pytz.timezone('Asia/Manila')).strftime('%Y-%m-%d %H:%M:%S')
-                        c.execute(
-                            "INSERT INTO messages (sender_id, receiver_id, subject, body, timestamp) VALUES (?, ?, ?, ?, ?)",
-                            (sender_id, receiver_id, subject, reply_text, timestamp)
-                        )
-                        conn.commit()
-                        conn.close()
+                        self.controller.repos.messages.send(sender_id, receiver_id, subject, reply_text, timestamp)
                         messagebox.showinfo("Success", "Reply sent successfully!")
                         self.mail_log.info(f"Reply sent from {sender_id} to {receiver_id} with subject '{subject}' at {timestamp}")
                         self.load_mails()
@@ -313,9 +285,7 @@ class MessagesPage(tk.Frame):
         self.mail_tree.column(columns, width=195)
 
     def _images_buttons(self, image_path, size=(40, 40)):
-        image = Image.open(image_path)
-        size = size
-        return CTkImage(image)
+        return get_image(image_path, size, display_size=(20, 20))
     
     def add_del_upd(self, text, command):
         button = CTkButton(self, text=text, width=73, command=command)
@@ -3,19 +3,71 @@ from tkinter import messagebox
 import customtkinter
 from customtkinter import CTkLabel, CTkEntry, CTkButton, CTkFrame, CTkImage, CTkToplevel
 from PIL import Image
-import multiprocessing
-import threading
+import importlib
+import logging
+import time
 import os
 
     
 from pages_handler import FrameNames
+from database import DatabaseManager
+from repositories import Repositories
+from change_feed import ChangeWatcher
+from event_bus import EventBus
+from db_executor import DbExecutor
+
+
+# Where each page lives: frame name -> (module, class). Pages are imported and built the
+# first time they are shown, so startup only pays for the login page.
+FRAME_REGISTRY = {
+    FrameNames.LOGIN: ('login_page', 'LoginPage'),
+    FrameNames.SIGNUP: ('signup_page', 'SignupPage'),
+    FrameNames.MAIN_MRP: ('home_mrp', 'MainMRP'),
+    FrameNames.CLIENTS: ('clients_crud', 'ClientsPage'),
+    FrameNames.LOGS: ('user_log', 'LogsPage'),
+    FrameNames.PRODUCTS: ('prod_crud', 'ProductPage'),
+    FrameNames.ORDERS: ('order_crud', 'OrdersPage'),
+    FrameNames.INVENTORY: ('inventory_crud', 'InventoryPage'),
+    FrameNames.SUPPLIERS: ('supplier_crud', 'SuppliersPage'),
+    FrameNames.SETTINGS: ('user_sets', 'UserSet'),
+    FrameNames.MAILS: ('mails', 'MessagesPage'),
+}
+
+# Built while the app is idle after the login page is up, most likely next first
+PREWARM = (FrameNames.MAIN_MRP, FrameNames.ORDERS, FrameNames.INVENTORY)
+
+# How often to check whether a new inventory balance snapshot is due
+SNAPSHOT_CHECK_MS = 60 * 60 * 1000
+
 
 class NovusApp(tk.Tk):
     def __init__(self):
         super().__init__()
         self.session = {}
+        self.db = DatabaseManager()
+        self.events = EventBus(self)
+        self.db.events = self.events
+        self.executor = DbExecutor(self, events=self.events)
+        self.repos = Repositories(self.db)
+        self.changes = ChangeWatcher(self.db, self)
         self._setup_ui()
         self._initialize_frames()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.changes.start()
+        self._snapshot_stock()
+
+    def _snapshot_stock(self):
+        """Take the periodic inventory snapshot on a worker if one is due, then check again later"""
+        self.executor.submit(self.repos.materials.snapshot_if_due,
+                             on_error=lambda e: logging.warning(f"Inventory snapshot failed: {e}"))
+        self.after(SNAPSHOT_CHECK_MS, self._snapshot_stock)
+
+    def on_close(self):
+        """Close the pooled database connections before the window goes away"""
+        self.changes.stop()
+        self.executor.shutdown()
+        self.db.close_connection()
+        self.destroy()
 
     def login(self, user_id, f_name, m_name, l_name, e_mail, number, username, password, confirm_pass, user_type):
         """Store user session data"""
@@ -43,73 +95,78 @@ class NovusApp(tk.Tk):
         self.container.grid_rowconfigure(0, weight=1)
         self.container.grid_columnconfigure(0, weight=1)
         self.frames = {}
+
+        # Shown while background database jobs are running
+        self.busy_label = tk.Label(self, text="Working…", bg='#2980b9', fg='white', font=('Segoe UI', 9, 'bold'), padx=8)
+        self.executor.on_busy(self._show_busy)
+
+    def _show_busy(self, busy):
+        if busy:
+            self.busy_label.place(relx=1.0, rely=1.0, anchor='se')
+            self.busy_label.lift()
+            self.config(cursor='watch')
+        else:
+            self.busy_label.place_forget()
+            self.config(cursor='')
     
     def _initialize_frames(self):
-        """Lazy import frames to prevent circular imports"""
-        from clients_crud import ClientsPage
-        from prod_crud import ProductPage
-        from order_crud import OrdersPage
-        from inventory_crud import InventoryPage
-        from supplier_crud import SuppliersPage
-        from user_sets import UserSet
-        from mails import MessagesPage
-        from login_page import LoginPage
-        from user_log import LogsPage
-        from home_mrp import MainMRP
-        from signup_page import SignupPage
-
-        frame_classes = {
-            FrameNames.CLIENTS: ClientsPage,
-            FrameNames.LOGS: LogsPage,
-            FrameNames.PRODUCTS: ProductPage,
-            FrameNames.ORDERS: OrdersPage,
-            FrameNames.INVENTORY: InventoryPage,
-            FrameNames.SUPPLIERS: SuppliersPage,
-            FrameNames.SETTINGS: UserSet,
-            FrameNames.MAILS: MessagesPage,
-            FrameNames.MAIN_MRP: MainMRP,
-            FrameNames.SIGNUP: SignupPage,
-            FrameNames.LOGIN: LoginPage
-            #Add Another Frame For User Settings
-        }
-
-
-        login_frame = LoginPage(parent=self.container, controller=self)
-        self.frames[FrameNames.LOGIN] = login_frame
-        login_frame.grid(row=0, column=0, sticky="nsew")
-
-        threading.Thread(target=self._load_other_frames, args=(frame_classes,), daemon=True).start()
-        
+        """Show the login page now and build the likely next pages when the app is idle"""
+        self.load_times = {}  # frame name -> (import ms, build ms)
         self.show_frame(FrameNames.LOGIN)
+        self.after_idle(self._prewarm, list(PREWARM))
 
-    def _load_other_frames(self, frame_classes):
-        """Load other frames in the background"""
-        for frame_name, frame_class in frame_classes.items():
-            if frame_name != FrameNames.LOGIN:
-                frame = frame_class(parent=self.container, controller=self)
-                self.frames[frame_name] = frame
-                frame.grid(row=0, column=0, sticky="nsew")
-        
-        # Show the login frame first
-        self.show_frame(FrameNames.LOGIN)
+    def _prewarm(self, pending):
+        """Build one page per idle slot so the login screen stays responsive"""
+        while pending and pending[0] in self.frames:
+            pending.pop(0)
+        if not pending:
+            return
+        try:
+            self._get_frame(pending.pop(0))
+        except Exception as e:
+            logging.error(f"Pre-building a page failed: {e}")
+        self.after(50, lambda: self.after_idle(self._prewarm, pending))
+
+    def _get_frame(self, page_name):
+        """Return the page, importing its module and building it on first use"""
+        frame = self.frames.get(page_name)
+        if frame is not None:
+            return frame
+        module_name, class_name = FRAME_REGISTRY[page_name]
+
+        start = time.perf_counter()
+        frame_class = getattr(importlib.import_module(module_name), class_name)
+        imported = time.perf_counter()
+        frame = frame_class(parent=self.container, controller=self)
+        frame.grid(row=0, column=0, sticky="nsew")
+        frame.lower()  # pre-built pages stay behind the one showing; show_frame raises it
+        built = time.perf_counter()
+
+        self.frames[page_name] = frame
+        self.load_times[page_name] = ((imported - start) * 1000, (built - imported) * 1000)
+        logging.info(f"Loaded {page_name}: import {self.load_times[page_name][0]:.0f} ms, "
+                     f"build {self.load_times[page_name][1]:.0f} ms")
+        return frame
 
     def show_frame(self, page_name):
-        if page_name in self.frames:
-            frame = self.frames[page_name]
+        if page_name in FRAME_REGISTRY:
+            frame = self._get_frame(page_name)
             frame.tkraise()
             if hasattr(frame, 'on_show'):
                 frame.on_show()  
         else:
-            available = "\n".join(self.frames.keys())
+            available = "\n".join(FRAME_REGISTRY)
             messagebox.showerror(
                 "Navigation Error",
                 f"Frame '{page_name}'   t found.\n\nAvailable frames:\n{available}"
             )
 
 if __name__ == "__main__":
+    started = time.perf_counter()
     customtkinter.set_appearance_mode("System")
     customtkinter.set_default_color_theme("blue")
     app = NovusApp()
+    logging.info(f"Login screen ready {(time.perf_counter() - started) * 1000:.0f} ms after start")
     app.mainloop()
 
 
@@ -0,0 +1,302 @@
+import logging
+from datetime import date
+
+import numpy as np
+
+import timestamps
+
+
+# Orders whose materials are still to be deducted; approving an order takes its stock
+OPEN_STATUS = 'Pending'
+# Day number standing in for a missing deadline, so undated orders come after every dated one
+NO_DEADLINE = np.iinfo(np.int64).max
+# Time-phased plans bucket deadlines by the day or by the week (starting Monday)
+BUCKETS = ('day', 'week')
+
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+def to_day(deadlines):
+    """Array of day numbers (days since 1970-01-01) from deadline strings; missing or unreadable -> NO_DEADLINE
+
+    Stored deadlines are 'YYYY-MM-DD' and are converted by numpy in one go. Older values that
+    _migrate_iso_dates could not read make that fail, and then each one is parsed on its own.
+    """
+    deadlines = list(deadlines)
+    try:
+        days = np.array([d if d else 'NaT' for d in deadlines], dtype='datetime64[D]').astype(np.int64)
+    except ValueError:
+        return np.array([_parse_day(d) for d in deadlines], dtype=np.int64)
+    days[days == np.iinfo(np.int64).min] = NO_DEADLINE
+    return days
+
+
+def _parse_day(deadline):
+    if not deadline:
+        return NO_DEADLINE
+    try:
+        return timestamps.parse_date(deadline).toordinal() - _EPOCH
+    except ValueError:
+        logging.warning(f"Deadline '{deadline}' is not a date, planned as having no deadline")
+        return NO_DEADLINE
+
+
+def from_day(day):
+    """'YYYY-MM-DD' for a day number, None for NO_DEADLINE"""
+    return None if day == NO_DEADLINE else str(np.datetime64(int(day), 'D'))
+
+
+def bucket_start(days, bucket):
+    """First day of the `bucket` ('day' or 'week') each day number falls in; NO_DEADLINE is kept"""
+    days = np.asarray(days, dtype=np.int64)
+    if bucket == 'day':
+        return days
+    # Day 4 (1970-01-05) was a Monday
+    return np.where(days == NO_DEADLINE, NO_DEADLINE, days - (days - 4) % 7)
+
+
+class MrpInputs:
+    """Stock and open demand as arrays, with materials and orders encoded as positions
+
+    Per material: mat_ids, mat_names, on_hand. Per order: order_ids, deadlines (day numbers).
+    The material x order requirement matrix is held as coordinates, one entry per
+    (order, material) line: req_mat, req_order, req_qty. A dense 5k x 50k matrix would be
+    2 GB of mostly zeros; every total below is a bincount or sort over these lines.
+    """
+
+    def __init__(self, mat_ids, mat_names, on_hand, order_ids, deadlines, req_mat, req_order, req_qty):
+        self.mat_ids = mat_ids
+        self.mat_names = mat_names
+        self.on_hand = on_hand
+        self.order_ids = order_ids
+        self.deadlines = deadlines
+        self.req_mat = req_mat
+        self.req_order = req_order
+        self.req_qty = req_qty
+
+
+def load_inputs(conn, status=OPEN_STATUS):
+    """Read raw_mats and the requirements of every order in `status` into MrpInputs"""
+    mats = conn.execute("SELECT mat_id, mat_name, COALESCE(mat_volume, 0) FROM raw_mats ORDER BY mat_id").fetchall()
+    orders = conn.execute("SELECT order_id, deadline FROM orders WHERE status_quo = ? ORDER BY order_id",
+                          (status,)).fetchall()
+    lines = conn.execute("""
+        SELECT r.mat_id, r.order_id, r.qty
+        FROM order_material_requirements r
+        JOIN orders o ON o.order_id = r.order_id
+        WHERE o.status_quo = ?
+    """, (status,)).fetchall()
+
+    mat_pos = {mat_id: i for i, (mat_id, _, _) in enumerate(mats)}
+    order_pos = {order_id: i for i, (order_id, _) in enumerate(orders)}
+    return MrpInputs(
+        mat_ids=[m[0] for m in mats],
+        mat_names=[m[1] for m in mats],
+        on_hand=np.array([m[2] for m in mats], dtype=np.float64),
+        order_ids=[o[0] for o in orders],
+        deadlines=to_day(o[1] for o in orders),
+        req_mat=np.fromiter((mat_pos[line[0]] for line in lines), dtype=np.intp, count=len(lines)),
+        req_order=np.fromiter((order_pos[line[1]] for line in lines), dtype=np.intp, count=len(lines)),
+        req_qty=np.fromiter((line[2] for line in lines), dtype=np.float64, count=len(lines)),
+    )
+
+
+class NetRequirements:
+    """Totals per material, aligned with MrpInputs.mat_ids
+
+    gross: demand of all open orders; shortage: gross beyond on_hand (0 if covered);
+    orders: open orders needing the material; first_short: deadline (day number) of the
+    earliest order the stock runs out on, serving orders by deadline, NO_DEADLINE if none.
+    """
+
+    def __init__(self, inputs, gross, shortage, orders, first_short):
+        self.inputs = inputs
+        self.gross = gross
+        self.shortage = shortage
+        self.orders = orders
+        self.first_short = first_short
+
+    @property
+    def short_count(self):
+        return int(np.count_nonzero(self.shortage))
+
+    def rows(self, only_short=True):
+        """[(mat_id, mat_name, on_hand, gross, shortage, orders, first_short 'YYYY-MM-DD' or None)],
+        soonest shortage first, then largest"""
+        picked = np.flatnonzero(self.shortage > 0) if only_short else np.arange(len(self.gross))
+        picked = picked[np.lexsort((-self.shortage[picked], self.first_short[picked]))]
+        inputs = self.inputs
+        return [(inputs.mat_ids[i], inputs.mat_names[i], float(inputs.on_hand[i]), float(self.gross[i]),
+                 float(self.shortage[i]), int(self.orders[i]), from_day(self.first_short[i]))
+                for i in picked]
+
+
+def net_requirements(inputs):
+    """Gross requirements, net shortages and first affected deadline for every material in one pass"""
+    n_mats = len(inputs.mat_ids)
+    gross = np.bincount(inputs.req_mat, weights=inputs.req_qty, minlength=n_mats)
+    shortage = np.maximum(gross - inputs.on_hand, 0)
+    orders = np.bincount(inputs.req_mat, minlength=n_mats)
+
+    # Lines grouped by material, each group in deadline order; a running total within the
+    # group that passes on_hand marks the first order the stock cannot cover
+    first_short = np.full(n_mats, NO_DEADLINE, dtype=np.int64)
+    if len(inputs.req_mat):
+        line_deadline = inputs.deadlines[inputs.req_order]
+        order = np.lexsort((line_deadline, inputs.req_mat))
+        mat, qty, deadline = inputs.req_mat[order], inputs.req_qty[order], line_deadline[order]
+        running = np.cumsum(qty)
+        group_start = np.searchsorted(mat, mat, side='left')
+        before_group = np.concatenate(([0.0], running))[group_start]
+        over = np.flatnonzero(running - before_group > inputs.on_hand[mat])
+        if len(over):
+            short_mats, first = np.unique(mat[over], return_index=True)
+            first_short[short_mats] = deadline[over[first]]
+    return NetRequirements(inputs, gross, shortage, orders, first_short)
+
+
+class TimePhasedPlan:
+    """Open demand per material bucketed by order deadline, with stock projected forward
+
+    Each material's on-hand volume is drawn down bucket by bucket, earliest first, and
+    `first_negative` maps the material's position to the first bucket where it goes below
+    zero. Built once from MrpInputs; afterwards apply_order() and reload_order() /
+    reload_stock() adjust only the materials the changed order or stock touches.
+    """
+
+    def __init__(self, inputs, bucket='week'):
+        if bucket not in BUCKETS:
+            raise ValueError(f"bucket must be one of {BUCKETS}")
+        self.bucket = bucket
+        self.mat_ids = list(inputs.mat_ids)
+        self.mat_names = list(inputs.mat_names)
+        self.on_hand = inputs.on_hand.tolist()
+        self._mat_pos = {mat_id: i for i, mat_id in enumerate(self.mat_ids)}
+        self._demand = [{} for _ in self.mat_ids]  # per material {bucket: qty}
+        self._orders = {}                          # order_id -> (bucket, ((mat position, qty), ...))
+        self.first_negative = {}
+
+        # Lines grouped by order, so each order's contribution can be taken back later
+        buckets = bucket_start(inputs.deadlines, bucket).tolist()
+        by_order = np.argsort(inputs.req_order, kind='stable')
+        mats, qtys = inputs.req_mat[by_order].tolist(), inputs.req_qty[by_order].tolist()
+        bounds = np.searchsorted(inputs.req_order[by_order], np.arange(len(inputs.order_ids) + 1)).tolist()
+        for i, order_id in enumerate(inputs.order_ids):
+            lines = tuple(zip(mats[bounds[i]:bounds[i + 1]], qtys[bounds[i]:bounds[i + 1]]))
+            if lines:
+                self._add(order_id, buckets[i], lines)
+        for pos in range(len(self.mat_ids)):
+            self._reproject(pos)
+
+    def _add(self, order_id, bucket, lines):
+        self._orders[order_id] = (bucket, lines)
+        for pos, qty in lines:
+            demand = self._demand[pos]
+            demand[bucket] = demand.get(bucket, 0) + qty
+
+    def _remove(self, order_id):
+        bucket, lines = self._orders.pop(order_id, (None, ()))
+        for pos, qty in lines:
+            demand = self._demand[pos]
+            left = demand.get(bucket, 0) - qty
+            if left > 1e-9:
+                demand[bucket] = left
+            else:
+                demand.pop(bucket, None)
+        return lines
+
+    def _reproject(self, pos):
+        self.first_negative.pop(pos, None)
+        left = self.on_hand[pos]
+        for bucket, qty in sorted(self._demand[pos].items()):
+            left -= qty
+            if left < 0:
+                self.first_negative[pos] = bucket
+                return
+
+    def _position(self, mat_id, mat_name=None):
+        pos = self._mat_pos.get(mat_id)
+        if pos is None:
+            pos = self._mat_pos[mat_id] = len(self.mat_ids)
+            self.mat_ids.append(mat_id)
+            self.mat_names.append(mat_name or mat_id)
+            self.on_hand.append(0.0)
+            self._demand.append({})
+        return pos
+
+    def apply_order(self, order_id, deadline, lines):
+        """Replace one order's demand: `deadline` 'YYYY-MM-DD' or None, `lines` [(mat_id, qty)],
+        empty once the order is no longer open. Returns the material positions reprojected."""
+        touched = {pos for pos, _ in self._remove(order_id)}
+        if lines:
+            bucket = int(bucket_start(to_day([deadline]), self.bucket)[0])
+            new = tuple((self._position(mat_id), float(qty)) for mat_id, qty in lines)
+            self._add(order_id, bucket, new)
+            touched.update(pos for pos, _ in new)
+        for pos in touched:
+            self._reproject(pos)
+        return touched
+
+    def set_stock(self, mat_id, volume, mat_name=None):
+        pos = self._position(mat_id, mat_name)
+        self.on_hand[pos] = float(volume or 0)
+        if mat_name:
+            self.mat_names[pos] = mat_name
+        self._reproject(pos)
+
+    def reload_order(self, conn, order_id, status=OPEN_STATUS):
+        """Re-read one order and apply it; orders no longer in `status` drop out of the plan"""
+        row = conn.execute("SELECT status_quo, deadline FROM orders WHERE order_id = ?", (order_id,)).fetchone()
+        lines = []
+        if row is not None and row[0] == status:
+            lines = conn.execute("SELECT mat_id, qty FROM order_material_requirements WHERE order_id = ?",
+                                 (order_id,)).fetchall()
+            unknown = [mat_id for mat_id, _ in lines if mat_id not in self._mat_pos]
+            if unknown:
+                self.reload_stock(conn, unknown)
+        return self.apply_order(order_id, row[1] if row else None, lines)
+
+    def reload_stock(self, conn, mat_ids):
+        """Re-read the volume of `mat_ids` and reproject them"""
+        mat_ids = list(mat_ids)
+        for start in range(0, len(mat_ids), 500):
+            chunk = mat_ids[start:start + 500]
+            rows = conn.execute(f"""
+                SELECT mat_id, mat_name, COALESCE(mat_volume, 0) FROM raw_mats
+                WHERE mat_id IN ({', '.join('?' * len(chunk))})
+            """, chunk).fetchall()
+            for mat_id, mat_name, volume in rows:
+                self.set_stock(mat_id, volume, mat_name)
+
+    def projection(self, mat_id):
+        """[(bucket start 'YYYY-MM-DD' or None for undated, demand, projected volume after it)]"""
+        pos = self._mat_pos.get(mat_id)
+        if pos is None:
+            return []
+        rows, left = [], self.on_hand[pos]
+        for bucket, qty in sorted(self._demand[pos].items()):
+            left -= qty
+            rows.append((from_day(bucket), qty, left))
+        return rows
+
+    @property
+    def short_count(self):
+        return len(self.first_negative)
+
+    def rows(self, only_short=True):
+        """[(mat_id, mat_name, on_hand, gross, shortage, orders, first negative bucket or None)],
+        soonest first, then largest shortage; the same layout as NetRequirements.rows()"""
+        positions = list(self.first_negative) if only_short else range(len(self.mat_ids))
+        orders = {}
+        if positions:
+            for _, lines in self._orders.values():
+                for pos, _ in lines:
+                    orders[pos] = orders.get(pos, 0) + 1
+        rows = []
+        for pos in positions:
+            gross = sum(self._demand[pos].values(), 0.0)
+            rows.append((self.mat_ids[pos], self.mat_names[pos], self.on_hand[pos], gross,
+                         max(gross - self.on_hand[pos], 0.0), orders.get(pos, 0),
+                         self.first_negative.get(pos, NO_DEADLINE)))
+        rows.sort(key=lambda row: (row[6], -row[4]))
+        return [row[:6] + (from_day(row[6]),) for row in rows]
@@ -5,21 +5,15 @@ from tkinter import ttk
 from tkinter import messagebox, filedialog
 import customtkinter
 import customtkinter as ctk
-from customtkinter import CTkLabel, CTkEntry, CTkButton, CTkFrame, CTkImage, CTkToplevel
-from PIL import Image
+from customtkinter import CTkLabel, CTkEntry, CTkButton, CTkFrame, CTkToplevel
 import sqlite3
 import time
 from datetime import datetime
 import pytz
-import matplotlib
-matplotlib.use('TkAgg')
-import matplotlib.pyplot as plt
 import logging
 
 
 #Data Imports
-import pandas as pd
-import json
 import os
 import sys
 sys.path.append("C:/capstone")
@@ -27,7 +21,12 @@ sys.path.append("C:/capstone")
 #File imports
 from product import ProductManagementSystem
 from pages_handler import FrameNames
-from global_func import on_show, handle_logout, export_total_amount_mats
+from assets import get_image
+from global_func import on_show, handle_logout
+from tree_paging import PagedTreeLoader
+from virtual_tree import VirtualTreeview
+from event_bus import OrderChanged, OrderApproved
+from allocation import POLICIES, DEFAULT_POLICY
 
 
 class OrdersPage(tk.Frame):
@@ -43,9 +42,7 @@ class OrdersPage(tk.Frame):
         self.main_desc = CTkFrame(self, fg_color="#84a8db", height=50, corner_radius=0)
         self.main_desc.pack(side="top", fill="x", padx=(0, 0), pady=(0, 10))
 
-        novus_logo = Image.open('C:/capstone/labels/novus_logo1.png')
-        novus_logo = novus_logo.resize((50, 50))
-        self.novus_photo = CTkImage(novus_logo, size=(50, 50))
+        self.novus_photo = get_image('C:/capstone/labels/novus_logo1.png', (50, 50))
 
         logging.basicConfig(filename='C:/capstone/log_f/actions.log', level=logging.INFO,
                             format='%(asctime)s - %(levelname)s - %(message)s')
@@ -68,6 +65,7 @@ class OrdersPage(tk.Frame):
         self.srch_btn = self.add_del_upd('SEARCH', '#5dade2',command=self.srch_order)
         self.add_btn = self.add_del_upd('ADD', '#2ecc71', command=self.add_orders)
         self.approve_order_btn = self.add_del_upd('APPROVE', '#27ae60',command=self.approve_order)
+        self.allocate_btn = self.add_del_upd('ALLOCATE', '#16a085', command=self.show_allocation)
         self.deliver_order_btn = self.add_del_upd('DELIVERED', '#3498db', command=self.order_done)
         self.cancel_order_btn = self.add_del_upd('CANCEL', '#95a5a6', command=self.cancel_order)
         self.del_btn = self.add_del_upd('DELETE', '#e74c3c', command=self.del_order)
@@ -85,7 +83,7 @@ class OrdersPage(tk.Frame):
         tree_frame = tk.Frame(self)
         tree_frame.place(x=120, y=105, width=1100, height=475)
 
-        self.order_tree = ttk.Treeview(
+        self.order_tree = VirtualTreeview(
             tree_frame,
             columns=('order_id', 'order_name', 'product_id', 'client_id',
                     'order_amount', 'order_date', 'order_dl','mats_need', 'status_quo'),
@@ -118,58 +116,31 @@ class OrdersPage(tk.Frame):
         tree_frame.grid_rowconfigure(0, weight=1)
         tree_frame.grid_columnconfigure(0, weight=1)
 
+        orders = self.controller.repos.orders
+        self.order_pages = PagedTreeLoader(self.order_tree, self.scrollbar, orders.list_page, orders.page_key)
         self.load_orders_from_db()
+        # Every order write (this page's included) publishes an event, so this is the one reload
+        self.controller.events.subscribe((OrderChanged, OrderApproved), lambda events: self.load_orders_from_db())
 
     def srch_order(self):
         search_order = self.search_entry.get().strip().lower()
         try:
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
             if not search_order:
                 self.load_orders_from_db()
                 return
 
-            query = """
-                SELECT order_id, order_name, product_id, client_id, quantity, order_date, deadline, mats_need, status_quo
-                FROM orders
-                WHERE LOWER(CAST(order_id AS TEXT)) LIKE ?
-                   OR LOWER(CAST(order_name AS TEXT)) LIKE ?
-                   OR LOWER(CAST(product_id AS TEXT)) LIKE ?
-                   OR LOWER(CAST(client_id AS TEXT)) LIKE ?
-                   OR LOWER(CAST(quantity AS TEXT)) LIKE ?
-                   OR LOWER(CAST(order_date AS TEXT)) LIKE ?
-                   OR LOWER(CAST(deadline AS TEXT)) LIKE ?
-                   OR LOWER(CAST(mats_need AS TEXT)) LIKE ?
-                   OR LOWER(CAST(status_quo AS TEXT)) LIKE ?
-            """
-            param = f"%{search_order}%"
-            c.execute(query, (param, param, param, param, param, param, param, param, param))
-            rows = c.fetchall()
-
-            # If no results, try a broader search only on order_name
-            if not rows:
-                c.execute("""
-                    SELECT order_id, order_name, product_id, client_id, quantity, order_date, deadline, mats_need, status_quo
-                    FROM orders
-                    WHERE LOWER(CAST(order_name AS TEXT)) LIKE ?
-                """, (f"%{search_order.split()[0]}%",))
-                rows = c.fetchall()
+            # Falls back to a broader search on order_name when nothing matches
+            rows = self.controller.repos.orders.search(search_order)
 
             # Update the treeview
-            for i in self.order_tree.get_children():
-                self.order_tree.delete(i)
+            self.order_pages.show(rows)
 
-            if rows:
-                for row in rows:
-                    self.order_tree.insert("", "end", values=row)
-            else:
+            if not rows:
                 messagebox.showinfo("Not Found", f"No order found matching '{search_order}'")
                 self.load_orders_from_db()
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", str(e))
             self.load_orders_from_db()
-        finally:
-            conn.close()
 
     def add_orders(self):
         # Open the SimpleInventory top-level window
@@ -179,15 +150,9 @@ class OrdersPage(tk.Frame):
     #Checking the product status before verifying the order
     #Redo with calculation 3 tables connected
     def approve_order(self):
-        try:
-            with open('C:/capstone/json_f/order_mats_ttl.json', 'r') as f:
-                try:
-                    ttl_mats_list = json.load(f)
-                except json.JSONDecodeError:
-                    print("❌ JSON file is empty or invalid.")
-                    ttl_mats_list = []
-        except FileNotFoundError:
-            messagebox.showerror("File Error", "Could not find 'order_mats_ttl.json'.")
+        selection = self.order_tree.selection()
+        if len(selection) > 1:
+            self.approve_selected_orders(selection)
             return
 
         selected = self.order_tree.focus()
@@ -198,16 +163,9 @@ class OrdersPage(tk.Frame):
         values = self.order_tree.item(selected, 'values')
         order_id = values[0]
 
-        conn = None
+        repos = self.controller.repos
         try:
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-            order_info = c.execute("""
-                SELECT o.order_id, o.status_quo, p.product_id, p.status_quo
-                FROM orders o
-                JOIN products p ON o.product_id = p.product_id
-                WHERE o.order_id = ?
-            """, (order_id,)).fetchone()
+            order_info = repos.orders.approval_info(order_id)
 
             if not order_info:
                 messagebox.showerror("Not Found", f"Order ID: {order_id} cannot be found")
@@ -216,35 +174,16 @@ class OrdersPage(tk.Frame):
             searched_order_id, order_status, prod_id, prod_status = order_info[0],  order_info[1], order_info[2], order_info[3]
 
             if order_status == "Pending" and prod_status == "Approved":
-                selected_order = next((order for order in ttl_mats_list if order['order_id'] == order_id), None)
-                if not selected_order:
-                    messagebox.showerror('Error', f'Order ID: {order_id} not found in JSON data')
-                    return
-
-                mats_need = selected_order['mats_need']
-
-                for mat_name, mat_qty_needed in mats_need.items():
-                    mats_fetch = c.execute("""
-                        SELECT mat_id, mat_name, mat_volume
-                        FROM raw_mats WHERE mat_name = ?
-                    """, (mat_name,)).fetchone()
-
-                    if not mats_fetch:
-                        messagebox.showerror("Material Not Found", f'No {mat_name} Found.')
-                        continue
-
-                    mat_id, _, current_qty = mats_fetch
-
-                    if current_qty < mat_qty_needed:
-                        messagebox.showerror("Insufficient Material", f"Not enough {mat_name} (Need: {mat_qty_needed}, Have: {current_qty})")
-                        continue
-
-                    deducted_val = current_qty - mat_qty_needed
-                    c.execute("UPDATE raw_mats SET mat_volume = ? WHERE mat_id = ?", (deducted_val, mat_id))
+                # Runs on a worker: the write lock may be held by another terminal. The order
+                # list reloads from the OrderApproved event once the job commits
+                def approve_failed(e):
+                    title = "Cannot Approve" if isinstance(e, ValueError) else "Database Error"
+                    messagebox.showerror(title, str(e))
 
-                new_status = "Approved"
-                c.execute('UPDATE orders SET status_quo = ? WHERE order_id = ?', (new_status, searched_order_id))
-                messagebox.showinfo("Success", f"Order ID: {searched_order_id} Approved!")
+                self.controller.executor.submit(
+                    self.controller.db.approve_order, searched_order_id, self.controller.session.get('user_id'),
+                    on_done=lambda deducted: messagebox.showinfo("Success", f"Order ID: {searched_order_id} Approved!"),
+                    on_error=approve_failed)
 
             elif prod_status == "Pending":
                 messagebox.showinfo("Pending Product", f"Order ID: {searched_order_id}, Product ID {prod_id} Status: {prod_status}")
@@ -256,26 +195,129 @@ class OrdersPage(tk.Frame):
                 if messagebox.askyesno('Order Cancelled', 'Order has been cancelled. Do you want to approve?'):
                     pass
 
-            conn.commit()
-
         except Exception as e:
-            if conn:
-                try:
-                    conn.rollback()
-                except Exception:
-                    pass
             messagebox.showerror("Database Error", f"{e}")
             print(e)
-        finally:
-            if conn:
-                try:
-                    conn.close()
-                except Exception:
-                    pass
-            try:
-                self.load_orders_from_db()
-            except Exception as e:
-                print("Error reloading orders:", e)
+
+    def approve_selected_orders(self, selection):
+        """Approve every selected order in one transaction and show a per-order report"""
+        order_ids = [self.order_tree.item(item, 'values')[0] for item in selection]
+        if not messagebox.askyesno("Approve Orders", f"Approve {len(order_ids)} selected orders?"):
+            return
+
+        user_id = self.controller.session.get('user_id')
+
+        def approved_orders(report):
+            approved = sum(1 for _, ok, _ in report if ok)
+            logging.info(f"User {user_id} bulk approved {approved} of {len(report)} orders")
+            self.show_approval_report(report, approved)
+
+        # The order list reloads from the OrderApproved event once the job commits
+        self.controller.executor.submit(self.controller.db.approve_orders, order_ids, user_id,
+                                        on_done=approved_orders)
+
+    def show_allocation(self):
+        """Propose which pending orders to approve when stock cannot cover them all
+
+        Runs the allocation as a dry run for the chosen policy; nothing is approved until
+        "Approve Proposed" is pressed, which goes through the normal bulk approval.
+        """
+        top = tk.Toplevel(self)
+        top.title("Allocate Stock")
+        top.geometry("760x480")
+        top.transient(self)
+
+        controls = tk.Frame(top)
+        controls.pack(fill='x', padx=10, pady=5)
+        tk.Label(controls, text="Serve first:", font=('Arial', 11)).pack(side='left')
+        policy_var = tk.StringVar(value=DEFAULT_POLICY)
+        policy_box = ttk.Combobox(controls, textvariable=policy_var, values=list(POLICIES), state='readonly', width=20)
+        policy_box.pack(side='left', padx=5)
+        summary = tk.Label(controls, text="", font=('Arial', 11, 'bold'))
+        summary.pack(side='left', padx=10)
+
+        frame = tk.Frame(top)
+        frame.pack(fill='both', expand=True, padx=10, pady=(0, 5))
+        tree = VirtualTreeview(frame, columns=('order_id', 'result', 'details'), show='headings')
+        for col, text, width in (('order_id', 'ORDER ID', 220), ('result', 'PROPOSAL', 100), ('details', 'MISSING', 400)):
+            tree.heading(col, text=text)
+            tree.column(col, width=width, stretch=(col == 'details'))
+        scrollbar = tk.Scrollbar(frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+
+        proposal = {'approved': []}
+        repos = self.controller.repos
+
+        def propose(policy):
+            allocation = repos.orders.propose_allocation(policy)
+            return allocation, repos.materials.names({mat_id for _, missing in allocation.blocked for mat_id in missing})
+
+        def show(result):
+            allocation, mat_names = result
+            proposal['approved'] = allocation.approved
+            tree.delete(*tree.get_children())
+            for order_id in allocation.approved:
+                tree.insert('', 'end', values=(order_id, 'Approve', ''))
+            for order_id, missing in allocation.blocked:
+                details = ", ".join(f"{mat_names.get(mat_id, mat_id)}: {qty:g}" for mat_id, qty in missing.items())
+                tree.insert('', 'end', values=(order_id, 'Blocked', details))
+            summary.configure(text=f"{len(allocation.approved)} to approve, {len(allocation.blocked)} blocked")
+            approve_btn.configure(state='normal' if allocation.approved else 'disabled')
+
+        def dry_run(event=None):
+            summary.configure(text="Working...")
+            approve_btn.configure(state='disabled')
+            self.controller.executor.submit(propose, policy_var.get(), on_done=show)
+
+        def approve_proposed():
+            order_ids = proposal['approved']
+            if not order_ids or not messagebox.askyesno("Approve Orders", f"Approve the {len(order_ids)} proposed orders?",
+                                                        parent=top):
+                return
+            user_id = self.controller.session.get('user_id')
+            policy = policy_var.get()
+
+            def approved_orders(report):
+                approved = sum(1 for _, ok, _ in report if ok)
+                logging.info(f"User {user_id} approved {approved} of {len(report)} allocated orders ({policy})")
+                # The user may have closed the window while the approval ran
+                if top.winfo_exists():
+                    top.destroy()
+                self.show_approval_report(report, approved)
+
+            # Stock may have moved since the dry run; approve_orders re-checks every order under the lock
+            self.controller.executor.submit(self.controller.db.approve_orders, order_ids, user_id,
+                                            on_done=approved_orders)
+
+        approve_btn = CTkButton(top, text="Approve Proposed", fg_color="#27ae60", state='disabled',
+                                command=approve_proposed)
+        approve_btn.pack(pady=(0, 10))
+        policy_box.bind('<<ComboboxSelected>>', dry_run)
+        dry_run()
+
+    def show_approval_report(self, report, approved):
+        top = tk.Toplevel(self)
+        top.title("Approval Report")
+        top.geometry("700x400")
+        top.transient(self)
+
+        tk.Label(top, text=f"{approved} of {len(report)} orders approved", font=('Arial', 12, 'bold')).pack(pady=5)
+
+        frame = tk.Frame(top)
+        frame.pack(fill='both', expand=True, padx=10, pady=(0, 10))
+        tree = VirtualTreeview(frame, columns=('order_id', 'result', 'details'), show='headings')
+        for col, text, width in (('order_id', 'ORDER ID', 220), ('result', 'RESULT', 100), ('details', 'DETAILS', 360)):
+            tree.heading(col, text=text)
+            tree.column(col, width=width, stretch=(col == 'details'))
+        scrollbar = tk.Scrollbar(frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+
+        for order_id, ok, message in report:
+            tree.insert('', 'end', values=(order_id, 'Approved' if ok else 'Skipped', message))
 
     def cancel_order(self):
         selected = self.order_tree.focus()
@@ -289,16 +331,9 @@ class OrdersPage(tk.Frame):
 
         status = 'Cancelled'
 
-        conn = sqlite3.connect('main.db')
-        c = conn.cursor()
-
-        c.execute("UPDATE orders SET status_quo = ? WHERE order_id = ?", (status, order_id))
+        self.controller.repos.orders.set_status(order_id, status)
         messagebox.showinfo("Success", f"Order ID '{order_id}' has been cancelled.")
 
-        conn.commit()
-        conn.close()
-        self.load_orders_from_db()
-
     def del_order(self):
         #Hard Deletion
         selected = self.order_tree.focus()
@@ -314,25 +349,14 @@ class OrdersPage(tk.Frame):
             if not confirm:
                 return
 
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-            c.execute("SELECT * FROM orders WHERE order_id =  ?", (order_id,))
-            row = c.fetchone()
-
-            if row:
-                c.execute("DELETE FROM orders WHERE order_id = ?", (order_id,))
-                conn.commit()
+            if self.controller.repos.orders.delete(order_id):
                 messagebox.showinfo("Deleted", f"Order ID '{order_id}' has been deleted.")
-                self.load_orders_from_db()
             else:
                 messagebox.showinfo("Not Found", f"No Orders found with ID '{order_id}'")
 
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", str(e))
 
-        finally:
-            conn.close()
-
     def upd_order(self):
         selected = self.order_tree.focus()
         if not selected:
@@ -347,8 +371,8 @@ class OrdersPage(tk.Frame):
         top.geometry("500x500")
         top.config(bg="white")
 
-        fields = ['Order ID', "Order Name", 'Product', "Order Date", 'Deadline', "Order Volume", "Client ID"]
-        db_cols = ['order_id', 'order_name', 'product_id', 'order_date', 'order_dl', 'order_amount', 'client_id']
+        fields = ['Order ID', "Order Name", 'Product', "Client ID", "Order Volume", "Order Date", 'Deadline']
+        db_cols = ['order_id', 'order_name', 'product_id', 'client_id', 'quantity', 'order_date', 'deadline']
         entries = []
 
         read_only_fields = ['Order ID', 'Order Date', 'Product', 'Client ID']
@@ -375,16 +399,12 @@ class OrdersPage(tk.Frame):
                 return
 
             try:
-                conn = sqlite3.connect('main.db')
-                c = conn.cursor()
-                c.execute(f"UPDATE orders SET {col} = ? WHERE order_id = ?", (new_value, original_id))
-                conn.commit()
+                self.controller.repos.orders.update_field(original_id, col, new_value)
                 messagebox.showinfo("Success", f"{fields[idx]} updated!")
-                self.load_orders_from_db()
+            except ValueError as e:
+                messagebox.showerror("Input Error", str(e))
             except sqlite3.Error as e:
                 messagebox.showerror("Database Error", str(e))
-            finally:
-                conn.close()
 
         # Add an update button for each editable field
         for i, label in enumerate(fields):
@@ -399,21 +419,13 @@ class OrdersPage(tk.Frame):
                 return
 
             try:
-                conn = sqlite3.connect('main.db')
-                c = conn.cursor()
-                c.execute('''
-                    UPDATE orders
-                    SET order_name=?, order_dl=?, order_amount=?, mats_used=?
-                    WHERE order_id=?
-                ''', (all_values[1], all_values[4], all_values[5], all_values[6], original_id))
-                conn.commit()
+                self.controller.repos.orders.update(original_id, all_values[1], all_values[4], all_values[6])
                 messagebox.showinfo("Success", "All editable fields updated!")
-                self.load_orders_from_db()
                 top.destroy()
+            except ValueError as e:
+                messagebox.showerror("Input Error", str(e))
             except sqlite3.Error as e:
                 messagebox.showerror("Database Error", str(e))
-            finally:
-                conn.close()
 
         # "Update All" button at the bottom
         update_all_btn = CTkButton(top, text="Update All", width=120, fg_color="#6a9bc3", command=update_all)
@@ -421,22 +433,11 @@ class OrdersPage(tk.Frame):
 
     def load_orders_from_db(self):
         try:
-            conn = sqlite3.connect("main.db")
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM orders")
-            rows = cursor.fetchall()
-
-            # Enumerate loop for getting every single client in the DB & inseting data in each column represented
-            for i in self.order_tree.get_children():
-                self.order_tree.delete(i)
-
-            for row in rows:
-                self.order_tree.insert("", "end", values=row)
+            # Newest first, further pages load as the list is scrolled
+            self.order_pages.refresh()
 
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", str(e))
-        finally:
-            conn.close()
 
     # --- ORDER HISTORY POPUP ---
     def show_selected_order_history(self):
@@ -450,12 +451,7 @@ class OrdersPage(tk.Frame):
 
     def show_order_history_popup(self, order_id):
         try:
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-            order_history = c.execute(
-                "SELECT status, changed_by, notes, timestamp FROM order_history WHERE order_id = ? ORDER BY timestamp DESC",
-                (order_id,)
-            ).fetchall()
+            order_history = self.controller.repos.orders.history(order_id)
             popup = tk.Toplevel(self)
             popup.title(f"Order History - ID: {order_id}")
             popup.geometry("600x400")
@@ -481,8 +477,6 @@ class OrdersPage(tk.Frame):
             btn_close.pack(pady=5)
         except Exception as e:
             messagebox.showerror("Database Error", str(e))
-        finally:
-            conn.close()
 
     # --- FIXED DELIVERED BUTTON ---
     def order_done(self):
@@ -501,9 +495,8 @@ class OrdersPage(tk.Frame):
             values = self.order_tree.item(selected, 'values')
             order_id = values[0]
 
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-            order_info = c.execute('SELECT * FROM orders WHERE order_id = ?', (order_id,)).fetchone()
+            repos = self.controller.repos
+            order_info = repos.orders.get(order_id)
 
             if not order_info:
                 messagebox.showerror("Not Found", f'Order ID: {order_id} cannot be found')
@@ -511,8 +504,7 @@ class OrdersPage(tk.Frame):
             
             selected_id, client_id, order_status = order_info[0], order_info[3], order_info[8]
 
-            existing_order = c.execute('SELECT * FROM order_history WHERE order_id = ?', (selected_id,)).fetchone()
-            if existing_order:
+            if repos.orders.history(selected_id):
                 messagebox.showerror("Order Already Delivered", f"Order ID: {selected_id} has already been marked as delivered.")
                 return
 
@@ -522,20 +514,13 @@ class OrdersPage(tk.Frame):
             else:    
                 delivery_status = "Delivered"
                 notes = f"Order ID {selected_id} has been delivered to Client: {client_id}"
-                c.execute(
-                    'INSERT INTO order_history (order_id, status, changed_by, notes, timestamp) VALUES (?, ?, ?, ?, ?)',
-                    (selected_id, delivery_status, user_id, notes, timestamp)
-                )
+                repos.orders.add_history(selected_id, delivery_status, user_id, notes, timestamp)
                 logging.info(f"Order ID {selected_id} marked as delivered by User ID {user_id} at {timestamp}")
                 messagebox.showinfo("Success", f"Order ID: {selected_id} has been marked as delivered.")
 
-            conn.commit()
-            
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", str(e))
             return
-        finally:
-            conn.close()
 
     def show_materials_popup(self, event):
         selected = self.order_tree.focus()
@@ -546,11 +531,8 @@ class OrdersPage(tk.Frame):
         mats_used = values[7]  # Assuming this is still relevant
 
         try:
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-
             # Fetch all order history entries for the selected order
-            order_history = c.execute("SELECT status, changed_by, notes, timestamp FROM order_history WHERE order_id = ? ORDER BY timestamp DESC", (order_id,)).fetchall()
+            order_history = self.controller.repos.orders.history(order_id)
 
             if not order_history:
                 popup_info = tk.Toplevel(self)
@@ -615,8 +597,6 @@ class OrdersPage(tk.Frame):
         except Exception as e:
             messagebox.showerror("Database Error", str(e))
             return
-        finally:
-            conn.close()
 
     def add_del_upd(self, text, fg_color, command):
         button = CTkButton(self, text=text, fg_color=fg_color, width=80, command=command)
@@ -635,9 +615,7 @@ class OrdersPage(tk.Frame):
         button.pack(side="top", padx=5, pady=15)
 
     def _images_buttons(self, image_path, size=(40, 40)):
-        image = Image.open(image_path)
-        size = size
-        return CTkImage(image)
+        return get_image(image_path, size, display_size=(20, 20))
 
     def _add_order(self, label_text, y):
 
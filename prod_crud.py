@@ -5,21 +5,18 @@ from tkinter import ttk
 from tkinter import messagebox, filedialog
 import customtkinter
 import customtkinter as ctk
-from customtkinter import CTkLabel, CTkEntry, CTkButton, CTkFrame, CTkImage, CTkToplevel
-from PIL import Image
+from customtkinter import CTkLabel, CTkEntry, CTkButton, CTkFrame, CTkToplevel
 import sqlite3
 import time
 from datetime import datetime
 import pytz
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-import pandas as pd
 import os
 import sys
 sys.path.append("C:/capstone")
 
 #File imports
 from pages_handler import FrameNames
+from assets import get_image
 from global_func import on_show, handle_logout
 
 
@@ -36,9 +33,7 @@ class ProductPage(tk.Frame):
         self.main_desc = CTkFrame(self, fg_color="#84a8db", height=50, corner_radius=0)
         self.main_desc.pack(side="top", fill="x", padx=(0, 0), pady=(0, 10))  # Sticks to the top, fills X
 
-        novus_logo = Image.open('C:/capstone/labels/novus_logo1.png')
-        novus_logo = novus_logo.resize((50, 50))
-        self.novus_photo = CTkImage(novus_logo, size=(50, 50))
+        self.novus_photo = get_image('C:/capstone/labels/novus_logo1.png', (50, 50))
 
         #Buttons Images
         self.clients_btn = self._images_buttons('C:/capstone/labels/client_btn.png', size=(100,100))
@@ -153,9 +148,7 @@ class ProductPage(tk.Frame):
         button.pack(side="top", padx=5, pady=15)
 
     def _images_buttons(self, image_path, size=(40, 40)):
-        image = Image.open(image_path)
-        size = size
-        return CTkImage(image)
+        return get_image(image_path, size, display_size=(20, 20))
 
     def _add_order(self, label_text, y):
 
@@ -1,21 +1,21 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, Toplevel
 from tkcalendar import DateEntry
-import re
-from datetime import datetime
 import pytz
 import time
 import logging
-import json
 import traceback
 
 #Imported Classses/Functions
 from database import DatabaseManager
-from global_func import export_materials_to_json, export_total_amount_mats
+from tree_paging import PagedTreeLoader
+from virtual_tree import VirtualTreeview
+from timestamps import display_date
 
 class ProductManagementSystem(tk.Toplevel):
     def __init__(self, parent, controller=None, show_only_list=False):
         self.parent = parent
+        self.controller = controller
         self.window = tk.Toplevel(parent)
         self.window.title("Product Management System")
         self.window.geometry("900x600")  # Smaller window for tab-like appearance
@@ -23,7 +23,8 @@ class ProductManagementSystem(tk.Toplevel):
         self.window.transient(parent)
         self.window.grab_set()
         self.window.configure(bg='#f8f9fa')
-        self.db_manager = DatabaseManager()
+        # Share the app's manager so writes made here reach the event bus
+        self.db_manager = controller.db if controller else DatabaseManager()
         self.current_materials = []
         self.total_mats_need = []
         self.show_only_list = show_only_list  # <-- Add this line
@@ -531,33 +532,6 @@ class ProductManagementSystem(tk.Toplevel):
             self.product_materials_text.insert(1.0, f"Error loading materials: {str(e)}")
             self.product_materials_text.config(state='disabled')
     
-    def parse_materials(self, materials_string):
-        """Parse materials string and return a dictionary {x:y}"""
-        if not materials_string:
-            return {}
-
-        materials = {}
-        # Split the string into parts using comma or semicolon
-        items = re.split(r'[;,]', materials_string)
-
-        for item in items:
-            item = item.strip()
-            if not item:
-                continue
-
-            # Match pattern: name - quantity OR name: quantity
-            match = re.match(r'(.+?)\s*[-:]\s*(\d+)', item)
-            if match:
-                material_name = match.group(1).strip()
-                quantity = int(match.group(2))
-                materials[material_name] = quantity
-            else:
-                # Fallback: treat as material with unknown quantity (0)
-                materials[item] = 0
-
-        return materials
-
-
     def calculate_materials(self):
         """Calculate required materials based on quantity"""
         try:
@@ -577,28 +551,19 @@ class ProductManagementSystem(tk.Toplevel):
             # Extract product ID
             product_id = selected_product.split('(')[-1].strip(')')
             
-            # Get materials data
-            materials_string = self.db_manager.get_product_materials(product_id)
-            if not materials_string:
+            # Requirements come straight from the product's bill of materials
+            requirements = self.db_manager.calculate_requirements(product_id, quantity)
+            if not requirements:
                 raise ValueError("No materials found for this product")
 
-            # Parse materials - ensure this returns a dict {material: quantity}
-            materials_dict = self.parse_materials(materials_string)
-            if not materials_dict:
-                raise ValueError("Materials format not recognized")
-
             # Calculate totals
             self.order_materials_data = {}  # This is what create_order will use
             calculation_text = f"For {quantity} units:\n\n"
             
-            for material_name, unit_quantity in materials_dict.items():
-                try:
-                    unit_qty = float(unit_quantity)  # Handle both int and float quantities
-                    total_needed = unit_qty * quantity
-                    self.order_materials_data[material_name] = total_needed
-                    calculation_text += f"• {material_name}: {total_needed}\n"
-                except (TypeError, ValueError):
-                    calculation_text += f"• {material_name}: (invalid quantity)\n"
+            for mat_id, material_name, total_needed, available in requirements:
+                self.order_materials_data[material_name] = total_needed
+                shortage = "" if available >= total_needed else f"  (only {available} in stock)"
+                calculation_text += f"• {material_name}: {total_needed}{shortage}\n"
 
             # Update UI
             self.required_materials_text.config(state='normal')
@@ -606,9 +571,6 @@ class ProductManagementSystem(tk.Toplevel):
             self.required_materials_text.insert(1.0, calculation_text)
             self.required_materials_text.config(state='disabled')
 
-            print(f"Raw materials from DB: {materials_string}")
-            print(f"After parsing: {self.order_materials_data}")
-
         except ValueError as e:
             self._show_materials_error(str(e))
         except Exception as e:
@@ -684,7 +646,6 @@ class ProductManagementSystem(tk.Toplevel):
             self.load_products_and_clients()
             
             messagebox.showinfo("Success", f"Product '{product_name}' created successfully!\nProduct ID: {product_id}")
-            export_materials_to_json("main.db", "C:/capstone/json_f/products_materials.json")
             
         except Exception as e:
             messagebox.showerror("Database Error", f"Error creating product: {str(e)}")
@@ -899,40 +860,27 @@ pady=8)
         h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X, padx=10)
         
         # Load products
+        def product_row(product):
+            product_id, name, materials, created_date, status_quo = product
+            formatted_date = display_date(created_date)
+            
+            display_materials = materials[:50] + "..." if materials and len(materials) > 50 else materials or 'N/A'
+
+            return {'values': (
+                product_id or 'N/A',
+                name or 'N/A',
+                display_materials,
+                formatted_date,
+                status_quo or 'N/A'
+            )}
+
+        # Newest first, one page at a time as the list is scrolled
+        product_pages = PagedTreeLoader(product_tree, v_scrollbar, self.db_manager.get_products_page,
+                                        lambda p: (p[3], p[0]), render_row=product_row)
+
         def load_products():
-            # Clear existing items
-            for item in product_tree.get_children():
-                product_tree.delete(item)
-                
             try:
-                products = self.db_manager.get_all_products()
-                
-                for product in products:
-                    product_id, name, materials, created_date, status_quo = product
-                    
-                    if created_date:
-                        try:
-                            dt = datetime.strptime(created_date, '%Y-%m-%d %H:%M:%S.%f')
-                            formatted_date = dt.strftime('%m/%d/%Y')
-                        except:
-                            try:
-                                dt = datetime.strptime(created_date, '%Y-%m-%d %H:%M:%S')
-                                formatted_date = dt.strftime('%m/%d/%Y')
-                            except:
-                                formatted_date = created_date
-                    else:
-                        formatted_date = 'N/A'
-                    
-                    display_materials = materials[:50] + "..." if materials and len(materials) > 50 else materials or 'N/A'
-                    
-                    product_tree.insert('', 'end', values=(
-                        product_id or 'N/A',
-                        name or 'N/A',
-                        display_materials,
-                        formatted_date,
-                        status_quo or 'N/A'
-                    ))
-                    
+                product_pages.refresh()
             except Exception as e:
                 messagebox.showerror("Database Error", f"Error loading products: {str(e)}")
         
@@ -962,10 +910,7 @@ pady=8)
                 messagebox.showerror("Database Error", f"Error loading product details: {str(e)}")
         
         def approve_selected_product():
-            """Deduct the materials used in a Product from the Inventory Table"""
-            with open('C:/capstone/json_f/products_materials.json', 'r') as f:
-                product_list = json.load(f)
-
+            """Approve a product when one unit of its BOM is in stock"""
             selection = product_tree.selection()
             if not selection:
                 messagebox.showwarning("No Selection", "Please select a product to approve.")
@@ -973,64 +918,24 @@ pady=8)
 
             item = product_tree.item(selection[0])
             values = item['values']
-            prod_id = values[0]  
-
-            # Find matching product in JSON
-            selected_product = next((p for p in product_list if p['product_id'] == prod_id), None)
-            if not selected_product:
-                messagebox.showerror("Error", f"Product ID {prod_id} not found in the database.")
-                return
-
-            prod_name = selected_product['product_name']
-            prod_mats = selected_product['materials']
-
-            conn = self.db_manager.get_connection()
-            c = conn.cursor()
+            prod_id = values[0]
 
             try:
-                unavailable_mats = []
-                avail_mats_list = []
-
-                for mat_name, mat_qty in selected_product['materials'].items():
-                    c.execute("SELECT mat_volume, mat_name FROM raw_mats WHERE mat_name = ?", (mat_name,))
-                    result = c.fetchone()
-
-                    if result:
-                        current_qty, updated_mat_name = result
-                        if current_qty >= mat_qty:
-                            avail_mats_list.append(f"{updated_mat_name} (needed: {mat_qty}, available: {current_qty})")
-                            success_mats = (
-                                f"Materials Approve for Product {prod_name} (ID: {prod_id})\n" +
-                                "\n".join(f"= {materials}" for materials in avail_mats_list)
-                            )
-                            messagebox.showinfo("Success", success_mats)
-
-                        else:
-                            unavailable_mats.append(
-                                f"{updated_mat_name} (needed: {mat_qty}, available: {current_qty})"
-                            )
-                    else:
-                        unavailable_mats.append(f"Material Name {mat_name} not found")
-
-                if unavailable_mats:
+                prod_name, shortages = self.db_manager.approve_product(prod_id)
+                if shortages:
                     error_message = (
                         f"❌ Cannot approve product {prod_name} (ID: {prod_id}) due to:\n\n" +
-                        "\n".join(f"- {item}" for item in unavailable_mats)
+                        "\n".join(f"- {name} (needed: {needed:g}, available: {available})" for name, needed, available in shortages)
                     )
                     messagebox.showerror("Insufficient Materials", error_message)
-                    status_pend = 'Pending'
-                    c.execute('UPDATE products SET status_quo = ? WHERE product_id = ?', (status_pend, prod_id,))
                 else:
-                    status_approve = 'Approved'
-                    c.execute('UPDATE products SET status_quo = ? WHERE product_id = ?', (status_approve, prod_id,))
                     messagebox.showinfo("Success", f"✅ Approved product {prod_name} (ID: {prod_id}) successfully!")
 
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
             except Exception as e:
                 messagebox.showerror("Database Error", f"An error occurred: {e}")
 
-            conn.commit()
-            conn.close()
-
             load_products()  # Refresh the product tree
 
 
@@ -1047,16 +952,9 @@ pady=8)
             prod_name = values[1]
 
             try:
-                conn = self.db_manager.get_connection()
-                c = conn.cursor()
-
-                status = 'Cancelled'
-
-                c.execute("UPDATE products SET status_quo = ? WHERE product_id = ?", (status, prod_id))
+                self.db_manager.cancel_status(prod_id, 'Cancelled')
                 messagebox.showinfo(f"Product '{prod_name}' has been cancelled.")
 
-                conn.commit()
-                conn.close()
                 load_products()  # Refresh the list
             except Exception as e:
                 messagebox.showerror("Database Error", f"Error cancelling product: {str(e)}")
@@ -1218,16 +1116,13 @@ pady=8)
             return
 
         try:
-            # Convert materials data to proper format if needed
-            materials_json = json.dumps(self.order_materials_data)
-            
             # Extract IDs
             product_id = selected_product.split('(')[-1].strip(')')
             client_id = selected_client.split('(')[-1].strip(')')
 
-            # Create order
+            # Create order; material requirements come from the product BOM
             order_id = self.db_manager.create_order(
-                order_name, product_id, client_id, quantity_int, deadline, materials_json)
+                order_name, product_id, client_id, quantity_int, deadline)
 
             # Clear form
             self.order_name_var.set("")
@@ -1247,12 +1142,10 @@ pady=8)
 
             messagebox.showinfo("Success", f"Order '{order_name}' created successfully!\nOrder ID: {order_id}")
 
-        except (TypeError, json.JSONDecodeError) as e:
-            messagebox.showerror("Format Error", f"Invalid materials data format: {str(e)}")
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
         except Exception as e:
             messagebox.showerror("Database Error", f"Error creating order: {str(e)}")
-        
-        export_total_amount_mats('main.db', 'C:/capstone/json_f/order_mats_ttl.json')
 
 
     
@@ -1530,7 +1423,7 @@ pady=8)
         
         # Create Treeview for order display
         columns = ('ID', 'Name', 'Product', 'Client', 'Quantity', 'Material Needed', 'Deadline', 'Order Date', 'Status Quo')
-        order_tree = ttk.Treeview(tree_frame, columns=columns, show='headings', height=15)
+        order_tree = VirtualTreeview(tree_frame, columns=columns, show='headings', height=15)
         
         # Configure headings
         order_tree.heading('ID', text='Order ID')
@@ -1566,43 +1459,30 @@ pady=8)
         h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X, padx=10)
         
         # Load orders
+        def order_row(order):
+            order_id, name, product_name, client_name, quantity, mats_need, deadline, order_date, product_id, client_id, status_quo = order
+            formatted_date = display_date(order_date)
+            
+            # Store additional data in tags for edit/delete operations
+            return {'values': (
+                order_id or 'N/A',
+                name or 'N/A',
+                product_name or 'N/A',
+                client_name or 'N/A',
+                quantity or 'N/A',
+                mats_need or 'N/A',
+                display_date(deadline),
+                formatted_date,
+                status_quo or 'N/A'
+            ), 'tags': (product_id, client_id)}
+
+        # Newest first, one page at a time as the list is scrolled
+        order_pages = PagedTreeLoader(order_tree, v_scrollbar, self.db_manager.get_orders_page,
+                                      lambda o: (o[7], o[0]), render_row=order_row)
+
         def load_orders():
-            # Clear existing items
-            for item in order_tree.get_children():
-                order_tree.delete(item)
-                
             try:
-                orders = self.db_manager.get_all_orders()
-                
-                for order in orders:
-                    order_id, name, product_name, client_name, quantity, mats_need, deadline, order_date, product_id, client_id, status_quo = order
-                    
-                    if order_date:
-                        try:
-                            dt = datetime.strptime(order_date, '%Y-%m-%d %H:%M:%S.%f')
-                            formatted_date = dt.strftime('%m/%d/%Y')
-                        except:
-                            try:
-                                dt = datetime.strptime(order_date, '%Y-%m-%d %H:%M:%S')
-                                formatted_date = dt.strftime('%m/%d/%Y')
-                            except:
-                                formatted_date = order_date
-                    else:
-                        formatted_date = 'N/A'
-                    
-                    # Store additional data in tags for edit/delete operations
-                    item_id = order_tree.insert('', 'end', values=(
-                        order_id or 'N/A',
-                        name or 'N/A',
-                        product_name or 'N/A',
-                        client_name or 'N/A',
-                        quantity or 'N/A',
-                        mats_need or 'N/A',
-                        deadline or 'N/A',
-                        formatted_date or 'N/A',
-                        status_quo or 'N/A'
-                    ), tags=(product_id, client_id))
-                    
+                order_pages.refresh()
             except Exception as e:
                 messagebox.showerror("Database Error", f"Error loading orders: {str(e)}")
         
@@ -1633,13 +1513,6 @@ pady=8)
             load_orders()  # Refresh the list
 
         def approved_selected_order():
-            with open('C:/capstone/json_f/order_mats_ttl.json', 'r') as f:
-                try:
-                    ttl_mats_list = json.load(f)
-                except json.JSONDecodeError:
-                    print("❌ JSON file is empty or invalid.")
-                    ttl_mats_list = []
-
             selection = order_tree.selection()
             if not selection:
                 messagebox.showwarning("No Selection", "Please select an order to Approve.")
@@ -1649,80 +1522,15 @@ pady=8)
             values = item['values']
             order_id = values[0]
 
-            conn = self.db_manager.get_connection()
-            c = conn.cursor()
-
             try:
-                order_info = c.execute("""
-                        SELECT o.order_id, o.status_quo, p.product_id, p.status_quo
-                        FROM orders o
-                        JOIN products p ON o.product_id = p.product_id
-                        WHERE o.order_id = ?
-                    """, (order_id,)).fetchone()
-
-                if not order_info:
-                    messagebox.showerror(f'Not Found, Order ID: {order_id} cannot be found')
-                    return  
-
-                # Extract order information
-                searched_order_id = order_info[0]
-                order_status = order_info[1]
-                prod_id = order_info[2]
-                prod_status = order_info[3]
-
-                if order_status == "Pending" and prod_status == "Approved":
-                    # Find the corresponding order in the JSON data
-                    selected_order = next((order for order in ttl_mats_list if order['order_id'] == order_id), None)
-                    if not selected_order:
-                        messagebox.showerror('Error', f'Order ID: {order_id} not found in JSON data')
-                        return
-                    
-                    mats_need = selected_order['mats_need']
-
-                    for mat_name, mat_qty_needed in mats_need.items():
-                        mats_fetch = c.execute("""
-                            SELECT mat_id, mat_name, mat_volume
-                            FROM raw_mats WHERE mat_name = ?
-                        """, (mat_name,)).fetchone()
-
-                        if not mats_fetch:
-                            messagebox.showerror(f'No {mat_name} Found.')
-                            continue  
-
-                        # Extract Materials in the Inventory
-                        mat_id, current_qty = mats_fetch[0], mats_fetch[2]
-
-                        if current_qty < mat_qty_needed:
-                            messagebox.showerror(f"Not enough {mat_name} (Need: {mat_qty_needed}, Have: {current_qty})")
-                            continue
-
-                        # Deduct the quantity and update the database
-                        deducted_val = current_qty - mat_qty_needed
-                        c.execute("UPDATE raw_mats SET mat_volume = ? WHERE mat_id = ?", (deducted_val, mat_id))
-
-                    # Update to Approve if materials are deducted Successfully
-                    new_status = "Approved"
-                    c.execute('UPDATE orders SET status_quo = ? WHERE order_id = ?', (new_status, searched_order_id))
-                    messagebox.showinfo(f"Order ID: {searched_order_id} Approved!")
-
-                elif prod_status == "Pending":
-                    messagebox.showinfo(f"Order ID: {searched_order_id}, Product ID {prod_id} Status: {prod_status}")
-                elif prod_status == "Cancelled":
-                    messagebox.showwarning(f"Order ID: {searched_order_id}, Product ID {prod_id} Status: {prod_status}")
-                elif order_status == "Approved":
-                    messagebox.showinfo(f"Order ID: {order_id} has been already approved.")
-                elif order_status == "Cancelled":
-                    if messagebox.askyesno('Order has been cancelled. Do you want to approve?'):
-                        pass
-
-                conn.commit()
-
+                user_id = self.controller.session.get('user_id') if self.controller else None
+                self.db_manager.approve_order(order_id, user_id)
+                messagebox.showinfo("Success", f"Order ID: {order_id} Approved!")
+            except ValueError as e:
+                messagebox.showerror("Cannot Approve", str(e))
             except Exception as e:
-                conn.rollback()
-                messagebox.showerror(f'Database Error: {e}')
+                messagebox.showerror("Database Error", f"{e}")
                 print(e)
-            finally:
-                conn.close()
 
             load_orders()
 
@@ -1738,15 +1546,7 @@ pady=8)
             order_id = values[0]
 
 
-            status = 'Cancelled'
-
-            conn = self.db_manager.get_connection()
-            c = conn.cursor()
-
-            c.execute("UPDATE orders SET status_quo = ? WHERE order_id = ?", (status,  order_id))
-
-            conn.commit()
-            conn.close()
+            self.db_manager.cancel_order(order_id)
             messagebox.showinfo("Success", f"Order '{order_id}' has been cancelled successfully!")
             load_orders()  # Refresh the list
 
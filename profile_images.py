@@ -0,0 +1,44 @@
+import io
+from PIL import Image, ImageOps
+
+
+# user_images.size of the file exactly as uploaded; thumbnails are stored under their edge length
+ORIGINAL = 0
+# Square thumbnails made from every upload: the settings page shows 100, lists and headers 32
+THUMB_SIZES = (100, 32)
+THUMB_FORMAT = 'PNG'
+
+# Uploads over either limit are refused rather than stored
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024
+MAX_UPLOAD_PIXELS = 6000 * 6000
+
+
+def check_upload(data):
+    """Raise ValueError if `data` is too large to accept as a profile image"""
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise ValueError(f"Image is {len(data) / 1024 / 1024:.1f} MB; the limit is "
+                         f"{MAX_UPLOAD_BYTES // 1024 // 1024} MB")
+
+
+def make_thumbnails(data):
+    """Return {size: PNG bytes} for THUMB_SIZES, cropped square from the centre of `data`
+
+    Raises ValueError if `data` is too large or is not an image PIL can read.
+    """
+    check_upload(data)
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            if img.width * img.height > MAX_UPLOAD_PIXELS:
+                raise ValueError(f"Image is {img.width}x{img.height}; it must be under "
+                                 f"{MAX_UPLOAD_PIXELS} pixels")
+            img = ImageOps.exif_transpose(img).convert('RGBA')
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Not a readable image: {e}") from e
+
+    thumbnails = {}
+    for size in THUMB_SIZES:
+        thumb = ImageOps.fit(img, (size, size), Image.LANCZOS)
+        buffer = io.BytesIO()
+        thumb.save(buffer, THUMB_FORMAT, optimize=True)
+        thumbnails[size] = buffer.getvalue()
+    return thumbnails
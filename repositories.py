@@ -0,0 +1,859 @@
+import time
+import logging
+import functools
+import threading
+import json
+from datetime import timedelta
+
+from database import DatabaseManager, keyset_page, PAGE_SIZE, LOW_STOCK
+from search_service import SearchService
+from event_bus import OrderChanged, StockChanged, ClientUpdated, SupplierUpdated, MessageSent
+from profile_images import ORIGINAL, make_thumbnails
+from stock_engine import move_stock, set_stock, take_snapshot
+from mrp_engine import OPEN_STATUS, TimePhasedPlan, load_inputs, net_requirements
+from allocation import DEFAULT_POLICY, allocate, load_pending
+import timestamps
+
+
+# Queries slower than this get a warning in the log
+SLOW_QUERY_MS = 50
+# How old the newest inventory snapshot may get before snapshot_if_due() takes another
+SNAPSHOT_INTERVAL = timedelta(days=1)
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def timed(func):
+    """Record call count and time for a repository method, keyed by `Repo.method`"""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            key = f"{type(self).__name__}.{func.__name__}"
+            with _stats_lock:
+                count, total, worst = _stats.get(key, (0, 0.0, 0.0))
+                _stats[key] = (count + 1, total + elapsed_ms, max(worst, elapsed_ms))
+            if elapsed_ms > SLOW_QUERY_MS:
+                logging.warning(f"Slow query {key}: {elapsed_ms:.1f} ms")
+    return wrapper
+
+
+def query_stats():
+    """Return [(name, calls, total_ms, worst_ms)] sorted by total time, hottest first"""
+    with _stats_lock:
+        rows = [(key, c, t, w) for key, (c, t, w) in _stats.items()]
+    return sorted(rows, key=lambda r: r[2], reverse=True)
+
+
+def now_manila():
+    return timestamps.now_timestamp()
+
+
+class BaseRepo:
+    """Shared helpers: reads go through the pooled connection, writes through a transaction"""
+
+    def __init__(self, db, search=None):
+        self.db = db
+        self.search_index = search
+
+    # Sort columns for list_page ending with the primary key, their positions in a row,
+    # and whether the list runs newest first
+    PAGE_ORDER = ()
+    PAGE_KEY_INDEX = ()
+    PAGE_DESCENDING = False
+
+    def _page(self, query, after=None, limit=PAGE_SIZE):
+        sql, params = keyset_page(query, self.PAGE_ORDER, after, limit, self.PAGE_DESCENDING)
+        return self._fetchall(sql, params)
+
+    def page_key(self, row):
+        """The `after` value for the page following `row`"""
+        return tuple(row[i] for i in self.PAGE_KEY_INDEX)
+
+    def _ranked_search(self, table, columns, term):
+        """FTS5 prefix search, best match first; None means use the LIKE fallback"""
+        if self.search_index is None:
+            return None
+        return self.search_index.search(table, columns, term)
+
+    def _fetchall(self, query, params=()):
+        return self.db.get_connection().execute(query, params).fetchall()
+
+    def _fetchone(self, query, params=()):
+        return self.db.get_connection().execute(query, params).fetchone()
+
+    def _write(self, query, params=(), event=None):
+        """Run one write statement and return the number of rows it touched;
+        `event` is published on the event bus once the write commits"""
+        with self.db.transaction() as conn:
+            rowcount = conn.execute(query, params).rowcount
+            if event is not None:
+                self.db.publish(event)
+            return rowcount
+
+
+class ClientsRepo(BaseRepo):
+    COLUMNS = "client_id, client_name, client_email, client_address, client_contactnum"
+    UPDATABLE = ('client_name', 'client_email', 'client_address', 'client_contactnum')
+    PAGE_ORDER, PAGE_KEY_INDEX = ('client_id',), (0,)
+
+    @timed
+    def list_all(self):
+        return self._fetchall(f"SELECT {self.COLUMNS} FROM clients")
+
+    @timed
+    def list_page(self, after=None, limit=PAGE_SIZE):
+        return self._page(f"SELECT {self.COLUMNS} FROM clients", after, limit)
+
+    @timed
+    def search(self, term):
+        rows = self._ranked_search('clients', self.COLUMNS, term)
+        if rows is not None:
+            return rows
+        param = f"%{term.lower()}%"
+        return self._fetchall(f"""
+            SELECT {self.COLUMNS}
+            FROM clients
+            WHERE LOWER(client_id) LIKE ?
+               OR LOWER(client_name) LIKE ?
+               OR LOWER(client_email) LIKE ?
+               OR LOWER(client_address) LIKE ?
+               OR LOWER(client_contactnum) LIKE ?
+        """, (param,) * 5)
+
+    @timed
+    def add(self, client_id, client_name, client_email, client_address, client_contactnum, priority=0):
+        self._write(f"INSERT INTO clients ({self.COLUMNS}, priority) VALUES (?, ?, ?, ?, ?, ?)",
+                    (client_id, client_name, client_email, client_address, client_contactnum, int(priority)),
+                    ClientUpdated(client_id))
+
+    @timed
+    def delete(self, client_id):
+        """Delete a client, returns False if it did not exist"""
+        return self._write("DELETE FROM clients WHERE client_id = ?", (client_id,), ClientUpdated(client_id)) > 0
+
+    @timed
+    def update_field(self, client_id, column, value):
+        if column not in self.UPDATABLE:
+            raise ValueError(f"Column {column} cannot be updated")
+        self._write(f"UPDATE clients SET {column} = ? WHERE client_id = ?", (value, client_id),
+                    ClientUpdated(client_id))
+
+    @timed
+    def update(self, client_id, client_name, client_email, client_address, client_contactnum):
+        self._write("""
+            UPDATE clients SET client_name = ?, client_email = ?, client_address = ?, client_contactnum = ?
+            WHERE client_id = ?
+        """, (client_name, client_email, client_address, client_contactnum, client_id), ClientUpdated(client_id))
+
+    @timed
+    def get_priority(self, client_id):
+        row = self._fetchone("SELECT priority FROM clients WHERE client_id = ?", (client_id,))
+        return row[0] if row else 0
+
+    @timed
+    def set_priority(self, client_id, priority):
+        """Allocation priority of the client's orders; higher is served first"""
+        self._write("UPDATE clients SET priority = ? WHERE client_id = ?", (int(priority), client_id),
+                    ClientUpdated(client_id))
+
+
+class MaterialsRepo(BaseRepo):
+    COLUMNS = "mat_id, mat_name, unit_measurement, mat_volume, low_count, mat_order_date, supplier_id"
+    PAGE_ORDER, PAGE_KEY_INDEX = ('mat_id',), (0,)
+    # Net movement per material after a snapshot's transaction_id, up to a timestamp. The unary
+    # + keeps mat_id off idx_inventory_txn_mat_time: left to itself the planner walks that whole
+    # index for the GROUP BY instead of the rowid range (~30x slower on a 300k row ledger)
+    LEDGER_SINCE = """
+        SELECT +mat_id, SUM(quantity) FROM inventory_transactions
+        WHERE transaction_id > ? AND timestamp <= ? AND +mat_id IS NOT NULL
+        GROUP BY +mat_id
+    """
+
+    @timed
+    def list_all(self):
+        return self._fetchall(f"SELECT {self.COLUMNS} FROM raw_mats")
+
+    @timed
+    def list_page(self, after=None, limit=PAGE_SIZE):
+        return self._page(f"SELECT {self.COLUMNS} FROM raw_mats", after, limit)
+
+    @timed
+    def search(self, term):
+        rows = self._ranked_search('raw_mats', self.COLUMNS, term)
+        if rows is not None:
+            return rows
+        param = f"%{term.lower()}%"
+        return self._fetchall(f"""
+            SELECT {self.COLUMNS}
+            FROM raw_mats
+            WHERE LOWER(mat_id) LIKE ?
+               OR LOWER(mat_name) LIKE ?
+               OR LOWER(unit_measurement) LIKE ?
+               OR LOWER(mat_volume) LIKE ?
+               OR LOWER(low_count) LIKE ?
+               OR LOWER(mat_order_date) LIKE ?
+               OR LOWER(supplier_id) LIKE ?
+        """, (param,) * 7)
+
+    @timed
+    def get(self, mat_id):
+        return self._fetchone(f"SELECT {self.COLUMNS} FROM raw_mats WHERE mat_id = ?", (mat_id,))
+
+    @timed
+    def get_by_name(self, mat_name):
+        """Return (mat_id, mat_name, mat_volume) or None"""
+        return self._fetchone("SELECT mat_id, mat_name, mat_volume FROM raw_mats WHERE mat_name = ?", (mat_name,))
+
+    @timed
+    def names(self, mat_ids):
+        """Return {mat_id: mat_name} for the given ids; unknown ids are left out"""
+        return dict(self._fetchall("SELECT mat_id, mat_name FROM raw_mats WHERE mat_id IN (SELECT value FROM json_each(?))",
+                                   (json.dumps(list(mat_ids)),)))
+
+    @timed
+    def add(self, mat_id, mat_name, unit_measurement, mat_volume, low_count, mat_order_date, supplier_id,
+            performed_by):
+        """Insert a material; its starting volume goes into the ledger as a 'purchase'"""
+        with self.db.transaction() as conn:
+            conn.execute(f"INSERT INTO raw_mats ({self.COLUMNS}) VALUES (?, ?, ?, 0, ?, ?, ?)",
+                         (mat_id, mat_name, unit_measurement, low_count, mat_order_date, supplier_id))
+            if int(mat_volume):
+                move_stock(conn, mat_id, int(mat_volume), 'purchase', performed_by, notes="Opening stock")
+            self.db.publish(StockChanged((mat_id,)))
+
+    @timed
+    def delete(self, mat_id):
+        """Delete a material, returns False if it did not exist"""
+        return self._write("DELETE FROM raw_mats WHERE mat_id = ?", (mat_id,), StockChanged((mat_id,))) > 0
+
+    @timed
+    def update_stock_levels(self, mat_id, unit_measurement, mat_volume, low_count, performed_by):
+        """Edit a material; a changed volume is ledgered as an 'adjustment'"""
+        with self.db.transaction(immediate=True) as conn:
+            conn.execute("UPDATE raw_mats SET unit_measurement = ?, low_count = ? WHERE mat_id = ?",
+                         (unit_measurement, low_count, mat_id))
+            set_stock(conn, mat_id, mat_volume, performed_by, notes="Edited stock level")
+            self.db.publish(StockChanged((mat_id,)))
+
+    @timed
+    def set_volume(self, mat_id, mat_volume, performed_by, notes=None):
+        """Set the volume from a stock count, ledgering the difference as an 'adjustment'"""
+        with self.db.transaction(immediate=True) as conn:
+            set_stock(conn, mat_id, mat_volume, performed_by, notes)
+            self.db.publish(StockChanged((mat_id,)))
+
+    @timed
+    def move(self, mat_id, quantity, transaction_type, performed_by, reference_id=None, notes=None):
+        """Record a 'purchase', 'waste' or 'transfer' of `quantity` (negative to take stock out);
+        returns the new volume, InsufficientStockError if a removal is short"""
+        with self.db.transaction(immediate=True) as conn:
+            volume = move_stock(conn, mat_id, quantity, transaction_type, performed_by, reference_id, notes)
+            self.db.publish(StockChanged((mat_id,)))
+            return volume
+
+    @timed
+    def history(self, mat_id, limit=100):
+        """Ledger rows for a material, newest first: (transaction_id, timestamp, transaction_type,
+        quantity, balance_after, reference_id, notes, performed_by)"""
+        return self._fetchall("""
+            SELECT transaction_id, timestamp, transaction_type, quantity, balance_after,
+                   reference_id, notes, performed_by
+            FROM inventory_transactions
+            WHERE mat_id = ?
+            ORDER BY timestamp DESC, transaction_id DESC
+            LIMIT ?
+        """, (mat_id, limit))
+
+    @timed
+    def volume_as_of(self, mat_id, when):
+        """Volume of one material at `when` (a date means the end of that day)
+
+        The last ledger row up to `when` carries the balance; with none, the balance is what
+        the first later row started from, and a material that never moved has today's volume.
+        """
+        when = timestamps.as_of_timestamp(when)
+        row = self._fetchone("""
+            SELECT balance_after FROM inventory_transactions
+            WHERE mat_id = ? AND timestamp <= ?
+            ORDER BY timestamp DESC, transaction_id DESC LIMIT 1
+        """, (mat_id, when))
+        if row is not None:
+            return row[0]
+        row = self._fetchone("""
+            SELECT balance_after - quantity FROM inventory_transactions
+            WHERE mat_id = ? AND timestamp > ?
+            ORDER BY timestamp, transaction_id LIMIT 1
+        """, (mat_id, when))
+        if row is not None:
+            return row[0]
+        row = self._fetchone("SELECT COALESCE(mat_volume, 0) FROM raw_mats WHERE mat_id = ?", (mat_id,))
+        return row[0] if row else None
+
+    @timed
+    def volumes_as_of(self, when):
+        """{mat_id: volume} for every material at `when`
+
+        Starts from the newest snapshot taken by then and adds the ledger rows written after
+        it (LEDGER_SINCE, a rowid range scan from the snapshot's transaction_id). Before the
+        first snapshot it works back from today's volumes instead.
+        """
+        when = timestamps.as_of_timestamp(when)
+        taken_at = self._fetchone("SELECT MAX(taken_at) FROM inventory_snapshots WHERE taken_at <= ?", (when,))[0]
+        if taken_at is None:
+            volumes = dict(self._fetchall("SELECT mat_id, COALESCE(mat_volume, 0) FROM raw_mats"))
+            for mat_id, quantity in self._fetchall("""
+                SELECT mat_id, SUM(quantity) FROM inventory_transactions
+                WHERE timestamp > ? AND mat_id IS NOT NULL GROUP BY mat_id
+            """, (when,)):
+                if mat_id in volumes:
+                    volumes[mat_id] -= quantity
+            return volumes
+
+        snapshot = self._fetchall("SELECT mat_id, balance, transaction_id FROM inventory_snapshots WHERE taken_at = ?",
+                                  (taken_at,))
+        volumes = {mat_id: balance for mat_id, balance, _ in snapshot}
+        after_id = snapshot[0][2] if snapshot else 0
+        for mat_id, quantity in self._fetchall(self.LEDGER_SINCE, (after_id, when)):
+            volumes[mat_id] = volumes.get(mat_id, 0) + quantity
+        return volumes
+
+    @timed
+    def snapshot_if_due(self, interval=SNAPSHOT_INTERVAL):
+        """Snapshot every material's volume if the newest snapshot is older than `interval`;
+        returns True if one was taken"""
+        due_before = (timestamps.now() - interval).strftime(timestamps.TIMESTAMP_FORMAT)
+        last = self._fetchone("SELECT MAX(taken_at) FROM inventory_snapshots")[0]
+        if last is not None and last > due_before:
+            return False
+        with self.db.transaction(immediate=True) as conn:
+            # Another terminal may have taken it while we waited for the lock
+            last = conn.execute("SELECT MAX(taken_at) FROM inventory_snapshots").fetchone()[0]
+            if last is not None and last > due_before:
+                return False
+            take_snapshot(conn)
+        return True
+
+    @timed
+    def with_supplier(self, mat_id, supplier_id):
+        """Return [(mat_id, mat_name, mat_volume, supplier_id)] for a material bought from `supplier_id`"""
+        return self._fetchall("""
+            SELECT rm.mat_id, rm.mat_name, rm.mat_volume, s.supplier_id
+            FROM raw_mats rm
+            JOIN suppliers s ON rm.supplier_id = s.supplier_id
+            WHERE rm.mat_id = ? AND s.supplier_id = ?
+        """, (mat_id, supplier_id))
+
+    @timed
+    def by_supplier(self, supplier_id):
+        """Return [(mat_id, mat_name, mat_order_date)] delivered by `supplier_id`"""
+        return self._fetchall("""
+            SELECT rm.mat_id, rm.mat_name, rm.mat_order_date
+            FROM raw_mats rm
+            JOIN suppliers s ON rm.supplier_id = s.supplier_id
+            WHERE s.supplier_id = ?
+        """, (supplier_id,))
+
+    @timed
+    def low_stock(self):
+        """Return [(mat_id, mat_name, mat_volume, low_count, supplier_id)] for materials that are low
+        (see database.LOW_STOCK); reads only the rows in the idx_raw_mats_low partial index"""
+        return self._fetchall(f"""
+            SELECT mat_id, mat_name, mat_volume, low_count, supplier_id
+            FROM raw_mats
+            WHERE {LOW_STOCK}
+            ORDER BY mat_id
+        """)
+
+    @timed
+    def low_stock_count(self):
+        return self._fetchone(f"SELECT COUNT(*) FROM raw_mats WHERE {LOW_STOCK}")[0]
+
+    @timed
+    def count(self):
+        return self._fetchone("SELECT COUNT(*) FROM raw_mats")[0]
+
+
+class SuppliersRepo(BaseRepo):
+    UPDATABLE = ('supplier_add', 'supplier_num', 'supplier_mail')
+    PAGE_ORDER, PAGE_KEY_INDEX = ('supplier_id',), (0,)
+
+    @timed
+    def list_all(self):
+        return self._fetchall("SELECT supplier_id, supplier_add, supplier_num, supplier_mail, delivered_date FROM suppliers")
+
+    @timed
+    def list_page(self, after=None, limit=PAGE_SIZE):
+        return self._page("SELECT supplier_id, supplier_add, supplier_num, supplier_mail, delivered_date FROM suppliers",
+                          after, limit)
+
+    @timed
+    def list_ids(self):
+        return [row[0] for row in self._fetchall("SELECT supplier_id FROM suppliers")]
+
+    @timed
+    def get(self, supplier_id):
+        return self._fetchone("""
+            SELECT supplier_id, supplier_add, supplier_num, supplier_mail, delivered_date
+            FROM suppliers WHERE supplier_id = ?
+        """, (supplier_id,))
+
+    @timed
+    def search(self, term):
+        rows = self._ranked_search('suppliers', "supplier_id, supplier_add, supplier_num, supplier_mail, delivered_date", term)
+        if rows is not None:
+            return rows
+        like_term = f"%{term}%"
+        return self._fetchall("""
+            SELECT supplier_id, supplier_add, supplier_num, supplier_mail, delivered_date
+            FROM suppliers
+            WHERE supplier_id LIKE ? OR
+                  supplier_add LIKE ? OR
+                  supplier_num LIKE ? OR
+                  supplier_mail LIKE ?
+        """, (like_term,) * 4)
+
+    @timed
+    def add(self, supplier_id, supplier_add, supplier_num, supplier_mail):
+        self._write("""
+            INSERT INTO suppliers (supplier_id, supplier_add, supplier_num, supplier_mail)
+            VALUES (?, ?, ?, ?)
+        """, (supplier_id, supplier_add, supplier_num, supplier_mail), SupplierUpdated(supplier_id))
+
+    @timed
+    def delete(self, supplier_id):
+        """Delete a supplier, returns False if it did not exist"""
+        return self._write("DELETE FROM suppliers WHERE supplier_id = ?", (supplier_id,),
+                           SupplierUpdated(supplier_id)) > 0
+
+    @timed
+    def update_field(self, supplier_id, column, value):
+        if column not in self.UPDATABLE:
+            raise ValueError(f"Column {column} cannot be updated")
+        self._write(f"UPDATE suppliers SET {column} = ? WHERE supplier_id = ?", (value, supplier_id),
+                    SupplierUpdated(supplier_id))
+
+    @timed
+    def update(self, supplier_id, supplier_add, supplier_num, supplier_mail):
+        self._write("""
+            UPDATE suppliers SET supplier_add = ?, supplier_num = ?, supplier_mail = ?
+            WHERE supplier_id = ?
+        """, (supplier_add, supplier_num, supplier_mail, supplier_id), SupplierUpdated(supplier_id))
+
+
+class ProductsRepo(BaseRepo):
+
+    @timed
+    def count(self):
+        return self._fetchone("SELECT COUNT(*) FROM products")[0]
+
+
+class OrdersRepo(BaseRepo):
+    # Same order as the columns of the orders tree
+    COLUMNS = "order_id, order_name, product_id, client_id, quantity, order_date, deadline, mats_need, status_quo"
+    UPDATABLE = ('order_name', 'quantity', 'deadline')
+    PAGE_ORDER, PAGE_KEY_INDEX, PAGE_DESCENDING = ('order_date', 'order_id'), (5, 0), True
+
+    @timed
+    def list_all(self):
+        return self._fetchall(f"SELECT {self.COLUMNS} FROM orders")
+
+    @timed
+    def list_page(self, after=None, limit=PAGE_SIZE):
+        """Newest orders first"""
+        return self._page(f"SELECT {self.COLUMNS} FROM orders", after, limit)
+
+    @timed
+    def get(self, order_id):
+        return self._fetchone(f"SELECT {self.COLUMNS} FROM orders WHERE order_id = ?", (order_id,))
+
+    @timed
+    def list_by_client(self, client_id):
+        return self._fetchall(f"SELECT {self.COLUMNS} FROM orders WHERE client_id = ?", (client_id,))
+
+    @timed
+    def client_history(self, client_id):
+        """Return [(order_id, product_id, order_date, deadline)] for one client"""
+        return self._fetchall("""
+            SELECT order_id, product_id, order_date, deadline
+            FROM orders WHERE client_id = ?
+        """, (client_id,))
+
+    @timed
+    def search(self, term):
+        """Match any column; falls back to the first word against order_name"""
+        term = term.lower()
+        rows = self._ranked_search('orders', self.COLUMNS, term)
+        if rows is not None:
+            if not rows and len(term.split()) > 1:
+                rows = self._ranked_search('orders', self.COLUMNS, term.split()[0])
+            return rows
+        param = f"%{term}%"
+        rows = self._fetchall(f"""
+            SELECT {self.COLUMNS}
+            FROM orders
+            WHERE LOWER(CAST(order_id AS TEXT)) LIKE ?
+               OR LOWER(CAST(order_name AS TEXT)) LIKE ?
+               OR LOWER(CAST(product_id AS TEXT)) LIKE ?
+               OR LOWER(CAST(client_id AS TEXT)) LIKE ?
+               OR LOWER(CAST(quantity AS TEXT)) LIKE ?
+               OR LOWER(CAST(order_date AS TEXT)) LIKE ?
+               OR LOWER(CAST(deadline AS TEXT)) LIKE ?
+               OR LOWER(CAST(mats_need AS TEXT)) LIKE ?
+               OR LOWER(CAST(status_quo AS TEXT)) LIKE ?
+        """, (param,) * 9)
+
+        if not rows and term.split():
+            rows = self._fetchall(f"""
+                SELECT {self.COLUMNS}
+                FROM orders
+                WHERE LOWER(CAST(order_name AS TEXT)) LIKE ?
+            """, (f"%{term.split()[0]}%",))
+        return rows
+
+    @timed
+    def approval_info(self, order_id):
+        """Return (order_id, order_status, product_id, product_status) or None"""
+        return self._fetchone("""
+            SELECT o.order_id, o.status_quo, p.product_id, p.status_quo
+            FROM orders o
+            JOIN products p ON o.product_id = p.product_id
+            WHERE o.order_id = ?
+        """, (order_id,))
+
+    @timed
+    def propose_allocation(self, policy=DEFAULT_POLICY):
+        """Dry run of allocation.allocate over every approvable pending order; writes nothing.
+        Pass the result's `approved` list to DatabaseManager.approve_orders to carry it out."""
+        orders, stock = load_pending(self.db.get_connection())
+        return allocate(orders, stock, policy)
+
+    @timed
+    def set_status(self, order_id, status):
+        self._write("UPDATE orders SET status_quo = ? WHERE order_id = ?", (status, order_id),
+                    OrderChanged(order_id))
+
+    @timed
+    def delete(self, order_id):
+        """Delete an order, returns False if it did not exist"""
+        return self._write("DELETE FROM orders WHERE order_id = ?", (order_id,), OrderChanged(order_id)) > 0
+
+    @timed
+    def update_field(self, order_id, column, value):
+        if column not in self.UPDATABLE:
+            raise ValueError(f"Column {column} cannot be updated")
+        if column == 'deadline':
+            value = timestamps.to_db_date(value)
+        with self.db.transaction() as conn:
+            conn.execute(f"UPDATE orders SET {column} = ? WHERE order_id = ?", (value, order_id))
+            if column == 'quantity':
+                self.db._write_order_requirements(conn, order_id)
+            self.db.publish(OrderChanged(order_id))
+
+    @timed
+    def update(self, order_id, order_name, quantity, deadline):
+        deadline = timestamps.to_db_date(deadline)
+        with self.db.transaction() as conn:
+            conn.execute("""
+                UPDATE orders SET order_name = ?, quantity = ?, deadline = ?
+                WHERE order_id = ?
+            """, (order_name, quantity, deadline, order_id))
+            self.db._write_order_requirements(conn, order_id)
+            self.db.publish(OrderChanged(order_id))
+
+    @timed
+    def requirements(self, order_id):
+        """Return [(mat_id, mat_name, qty, mat_volume)] needed by one order"""
+        return self.db.get_order_requirements(order_id)
+
+    @timed
+    def open_demand(self, status='Pending'):
+        """Return [(mat_id, mat_name, total_needed, mat_volume, order_count)] summed over orders in `status`"""
+        return self.db.get_open_material_demand(status)
+
+    @timed
+    def history(self, order_id):
+        """Return [(status, changed_by, notes, timestamp)], newest first"""
+        return self._fetchall("""
+            SELECT status, changed_by, notes, timestamp
+            FROM order_history WHERE order_id = ? ORDER BY timestamp DESC
+        """, (order_id,))
+
+    @timed
+    def add_history(self, order_id, status, changed_by, notes, timestamp=None):
+        self._write("""
+            INSERT INTO order_history (order_id, status, changed_by, notes, timestamp)
+            VALUES (?, ?, ?, ?, ?)
+        """, (order_id, status, changed_by, notes, timestamp or now_manila()))
+
+    # Deadline queries are range scans on idx_orders_deadline; deadlines are stored as YYYY-MM-DD
+
+    @timed
+    def due_between(self, start, end):
+        """Return [(order_id, order_name, deadline)] not cancelled, due on or after `start` and before `end`"""
+        return self._fetchall("""
+            SELECT order_id, order_name, deadline FROM orders
+            WHERE deadline >= ? AND deadline < ? AND status_quo != 'Cancelled'
+            ORDER BY deadline, order_id
+        """, (timestamps.to_db_date(start), timestamps.to_db_date(end)))
+
+    def due_today(self):
+        today = timestamps.today()
+        return self.due_between(today, today + timedelta(days=1))
+
+    def due_this_week(self):
+        return self.due_between(*timestamps.week_bounds())
+
+    @timed
+    def overdue(self):
+        """Return [(order_id, order_name, deadline)] past their deadline and neither cancelled nor delivered"""
+        return self._fetchall("""
+            SELECT o.order_id, o.order_name, o.deadline FROM orders o
+            WHERE o.deadline < ? AND o.status_quo != 'Cancelled'
+              AND NOT EXISTS (SELECT 1 FROM order_history h
+                              WHERE h.order_id = o.order_id AND h.status = 'Delivered')
+            ORDER BY o.deadline, o.order_id
+        """, (timestamps.today().strftime(timestamps.DATE_FORMAT),))
+
+    @timed
+    def upcoming_deadlines(self, limit=3):
+        """Return [(order_name, product_name, client_name, deadline)] for the next open orders due from today"""
+        return self._fetchall("""
+            SELECT o.order_name, p.product_name, c.client_name, o.deadline
+            FROM orders o
+            JOIN products p ON o.product_id = p.product_id
+            JOIN clients c ON o.client_id = c.client_id
+            WHERE o.deadline >= ? AND o.status_quo != 'Cancelled'
+            ORDER BY o.deadline ASC
+            LIMIT ?
+        """, (timestamps.today().strftime(timestamps.DATE_FORMAT), limit))
+
+    @timed
+    def count(self):
+        return self._fetchone("SELECT COUNT(*) FROM orders")[0]
+
+
+class MessagesRepo(BaseRepo):
+    PAGE_ORDER, PAGE_KEY_INDEX, PAGE_DESCENDING = ('message_id',), (0,), True
+
+    @timed
+    def list_all(self):
+        return self._fetchall("SELECT message_id, sender_id, receiver_id, subject, timestamp FROM messages")
+
+    @timed
+    def list_page(self, after=None, limit=PAGE_SIZE):
+        """Newest messages first"""
+        return self._page("SELECT message_id, sender_id, receiver_id, subject, timestamp FROM messages", after, limit)
+
+    @timed
+    def send(self, sender_id, receiver_id, subject, body, timestamp=None):
+        self._write("""
+            INSERT INTO messages (sender_id, receiver_id, subject, body, timestamp)
+            VALUES (?, ?, ?, ?, ?)
+        """, (sender_id, receiver_id, subject, body, timestamp or now_manila()), MessageSent(receiver_id))
+
+    @timed
+    def delete(self, message_id):
+        return self._write("DELETE FROM messages WHERE message_id = ?", (message_id,)) > 0
+
+
+class LogsRepo(BaseRepo):
+    PAGE_ORDER, PAGE_KEY_INDEX, PAGE_DESCENDING = ('log_id',), (0,), True
+
+    @timed
+    def list_all(self):
+        return self._fetchall("SELECT log_id, user_id, action, timestamp FROM user_logs")
+
+    @timed
+    def list_page(self, after=None, limit=PAGE_SIZE):
+        """Newest log entries first"""
+        return self._page("SELECT log_id, user_id, action, timestamp FROM user_logs", after, limit)
+
+    @timed
+    def add(self, user_id, action, timestamp=None):
+        self._write("INSERT INTO user_logs (user_id, action, timestamp) VALUES (?, ?, ?)",
+                    (user_id, action, timestamp or now_manila()))
+
+
+class UsersRepo(BaseRepo):
+
+    @timed
+    def get(self, user_id):
+        return self._fetchone("SELECT * FROM users WHERE user_id = ?", (user_id,))
+
+    @timed
+    def get_by_username(self, username):
+        return self._fetchone("SELECT * FROM users WHERE username = ?", (username,))
+
+    @timed
+    def recipients(self, exclude_user_id):
+        """Return [(user_id, f_name, l_name)] for everyone except `exclude_user_id`"""
+        return self._fetchall("SELECT user_id, f_name, l_name FROM users WHERE user_id != ?", (exclude_user_id,))
+
+    @timed
+    def add(self, user_data):
+        """Insert a full users row (signup), in table column order"""
+        self._write("""
+            INSERT INTO users (
+                user_id, f_name, l_name, m_name, useremail, phonenum,
+                username, password_hash, salt, usertype, userimage,
+                last_login, failed_login_attempts, account_locked,
+                date_created, last_updated, reset_token, reset_token_expiry
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, user_data)
+
+    @timed
+    def record_login(self, user_id, timestamp=None):
+        """Write the Login log entry and bump last_login in one transaction"""
+        timestamp = timestamp or now_manila()
+        with self.db.transaction() as conn:
+            conn.execute("INSERT INTO user_logs (user_id, action, timestamp) VALUES (?, ?, ?)",
+                         (user_id, 'Login', timestamp))
+            conn.execute("UPDATE users SET last_login = ? WHERE user_id = ?", (timestamp, user_id))
+
+    @timed
+    def update_profile(self, user_id, f_name, m_name, l_name, useremail, phonenum, username, usertype):
+        self._write("""
+            UPDATE users SET f_name = ?, m_name = ?, l_name = ?, useremail = ?, phonenum = ?,
+                username = ?, usertype = ?
+            WHERE user_id = ?
+        """, (f_name, m_name, l_name, useremail, phonenum, username, usertype, user_id))
+
+    @timed
+    def set_password(self, user_id, password_hash, salt):
+        self._write("UPDATE users SET password_hash = ?, salt = ? WHERE user_id = ?",
+                    (password_hash, salt, user_id))
+
+    @timed
+    def get_reset_token(self, username):
+        """Return (user_id, reset_token, reset_token_expiry) or None"""
+        return self._fetchone("""
+            SELECT user_id, reset_token, reset_token_expiry FROM users WHERE username = ?
+        """, (username,))
+
+    @timed
+    def set_reset_token(self, user_id, token, expiry):
+        self._write("UPDATE users SET reset_token = ?, reset_token_expiry = ? WHERE user_id = ?",
+                    (token, expiry, user_id))
+
+    @timed
+    def has_valid_reset_token(self, username, token, now):
+        return self._fetchone("""
+            SELECT reset_token_expiry FROM users
+            WHERE username = ? AND reset_token = ? AND reset_token_expiry > ?
+        """, (username, token, now)) is not None
+
+    @timed
+    def reset_password(self, username, password_hash, salt):
+        """Store the new password and clear the reset token"""
+        self._write("""
+            UPDATE users
+            SET password_hash = ?, salt = ?,
+                reset_token = NULL, reset_token_expiry = NULL
+            WHERE username = ?
+        """, (password_hash, salt, username))
+
+    @timed
+    def get_image(self, user_id):
+        """The profile image exactly as uploaded, or None"""
+        return self.get_thumbnail(user_id, ORIGINAL)
+
+    @timed
+    def get_thumbnail(self, user_id, size):
+        """PNG bytes of the `size` px profile thumbnail, or None"""
+        row = self._fetchone("SELECT image FROM user_images WHERE user_id = ? AND size = ?", (user_id, size))
+        return row[0] if row else None
+
+    @timed
+    def image_version(self, user_id):
+        """Bumped on every upload, so cached copies can tell they are stale; None without an image"""
+        return self._fetchone("SELECT MAX(version) FROM user_images WHERE user_id = ?", (user_id,))[0]
+
+    @timed
+    def set_image(self, user_id, image_data):
+        """Store an upload with its thumbnails; ValueError if it is too large or not an image"""
+        images = {ORIGINAL: image_data, **make_thumbnails(image_data)}
+        with self.db.transaction() as conn:
+            version = conn.execute("SELECT COALESCE(MAX(version), 0) + 1 FROM user_images WHERE user_id = ?",
+                                   (user_id,)).fetchone()[0]
+            conn.execute("DELETE FROM user_images WHERE user_id = ?", (user_id,))
+            conn.executemany("INSERT INTO user_images (user_id, size, image, version) VALUES (?, ?, ?, ?)",
+                             [(user_id, size, image, version) for size, image in images.items()])
+        return version
+
+
+class DashboardRepo(BaseRepo):
+
+    @timed
+    def stats(self, today=None):
+        """Every dashboard counter from one round trip
+
+        Returns a dict with products/orders/materials totals, products_by_status and
+        orders_by_status ({status: count}), low_stock (materials that are low, see database.LOW_STOCK)
+        and due_today (orders not cancelled whose deadline is `today`, default today).
+        """
+        today = timestamps.to_db_date(today or timestamps.today())
+        row = self._fetchone(f"""
+            SELECT
+                (SELECT json_group_object(status, n) FROM
+                    (SELECT COALESCE(status_quo, 'Pending') AS status, COUNT(*) AS n FROM products GROUP BY 1)),
+                (SELECT json_group_object(status, n) FROM
+                    (SELECT COALESCE(status_quo, 'Pending') AS status, COUNT(*) AS n FROM orders GROUP BY 1)),
+                (SELECT COUNT(*) FROM raw_mats),
+                (SELECT COUNT(*) FROM raw_mats WHERE {LOW_STOCK}),
+                (SELECT COUNT(*) FROM orders WHERE deadline = ? AND status_quo != 'Cancelled')
+        """, (today,))
+        products_by_status, orders_by_status = json.loads(row[0]), json.loads(row[1])
+        return {
+            'products': sum(products_by_status.values()),
+            'products_by_status': products_by_status,
+            'orders': sum(orders_by_status.values()),
+            'orders_by_status': orders_by_status,
+            'materials': row[2],
+            'low_stock': row[3],
+            'due_today': row[4],
+        }
+
+    @timed
+    def net_requirements(self, status=OPEN_STATUS):
+        """mrp_engine.NetRequirements of every order in `status` against current stock"""
+        return net_requirements(load_inputs(self.db.get_connection(), status))
+
+    @timed
+    def time_phased_plan(self, bucket='week', status=OPEN_STATUS):
+        """mrp_engine.TimePhasedPlan of every order in `status`, bucketed by 'day' or 'week'"""
+        return TimePhasedPlan(load_inputs(self.db.get_connection(), status), bucket)
+
+    @timed
+    def update_plan(self, plan, order_ids=(), mat_ids=()):
+        """Bring `plan` up to date for changed orders and materials without rebuilding it"""
+        conn = self.db.get_connection()
+        if mat_ids:
+            plan.reload_stock(conn, mat_ids)
+        for order_id in order_ids:
+            plan.reload_order(conn, order_id)
+
+
+class Repositories:
+    """One object holding every repository, shared through the controller as `controller.repos`"""
+
+    def __init__(self, db=None):
+        self.db = db or DatabaseManager()
+        self.search = SearchService(self.db)
+        self.clients = ClientsRepo(self.db, self.search)
+        self.materials = MaterialsRepo(self.db, self.search)
+        self.suppliers = SuppliersRepo(self.db, self.search)
+        self.products = ProductsRepo(self.db)
+        self.orders = OrdersRepo(self.db, self.search)
+        self.messages = MessagesRepo(self.db)
+        self.logs = LogsRepo(self.db)
+        self.users = UsersRepo(self.db)
+        self.dashboard = DashboardRepo(self.db)
+
+    def transaction(self, immediate=False):
+        """Group several repository writes into one transaction"""
+        return self.db.transaction(immediate)
@@ -0,0 +1,138 @@
+import re
+import sqlite3
+import logging
+
+
+# FTS5 index per searchable table: fts table -> (content table, indexed columns)
+# Only ever add columns through a new migration, since the triggers list them.
+SEARCH_INDEXES = {
+    'clients_fts': ('clients', ('client_id', 'client_name', 'client_email', 'client_address', 'client_contactnum')),
+    'raw_mats_fts': ('raw_mats', ('mat_id', 'mat_name', 'unit_measurement', 'supplier_id')),
+    'suppliers_fts': ('suppliers', ('supplier_id', 'supplier_add', 'supplier_num', 'supplier_mail')),
+    'orders_fts': ('orders', ('order_id', 'order_name', 'product_id', 'client_id', 'deadline', 'mats_need', 'status_quo')),
+}
+
+
+def fts5_available(conn):
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp._fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def install_search_indexes(conn):
+    """Create the FTS5 tables and the triggers that keep them in step, then index existing rows
+
+    The FTS tables use external content, so they store only the index and map back to the
+    source row by rowid. VACUUM can renumber rowids of tables without an INTEGER PRIMARY KEY,
+    so run SearchService.rebuild() after one.
+    """
+    if not fts5_available(conn):
+        logging.warning('SQLite was built without FTS5, search falls back to LIKE scans')
+        return
+
+    for fts, (table, columns) in SEARCH_INDEXES.items():
+        cols = ', '.join(columns)
+        new_cols = ', '.join(f'new.{c}' for c in columns)
+        old_cols = ', '.join(f'old.{c}' for c in columns)
+
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {cols}, content='{table}', content_rowid='rowid', prefix='2 3'
+            )
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new_cols});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_cols});
+            END
+        """)
+        _create_update_trigger(conn, fts, table, columns)
+        conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def _create_update_trigger(conn, fts, table, columns):
+    """Re-index a row only when an indexed column is set to a different value, so stock
+    deductions and other writes to unindexed columns never touch the FTS table"""
+    cols = ', '.join(columns)
+    new_cols = ', '.join(f'new.{c}' for c in columns)
+    old_cols = ', '.join(f'old.{c}' for c in columns)
+    changed = ' OR '.join(f'old.{c} IS NOT new.{c}' for c in columns)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} WHEN {changed} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_cols});
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new_cols});
+        END
+    """)
+
+
+def narrow_search_update_triggers(conn):
+    """Replace the update triggers created before they were limited to indexed columns"""
+    for fts, (table, columns) in SEARCH_INDEXES.items():
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (fts,)).fetchone() is None:
+            continue  # no FTS5 on this build
+        conn.execute(f"DROP TRIGGER IF EXISTS {fts}_au")
+        _create_update_trigger(conn, fts, table, columns)
+
+
+def match_query(term):
+    """Turn free text into an FTS5 query: every word must match as a prefix"""
+    words = re.findall(r'\w+', term.lower())
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+class SearchService:
+    """Ranked prefix search over the FTS5 indexes, shared by the repositories"""
+
+    def __init__(self, db):
+        self.db = db
+        self._available = None
+
+    @property
+    def available(self):
+        """True once the FTS tables exist (they are skipped on SQLite builds without FTS5)"""
+        if self._available is None:
+            row = self.db.get_connection().execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'clients_fts'").fetchone()
+            self._available = row is not None
+        return self._available
+
+    def search(self, table, columns, term, limit=None):
+        """Return rows of `columns` from `table` matching `term`, best match first
+
+        Returns None when FTS5 is unavailable so callers can fall back to their LIKE query.
+        """
+        if not self.available:
+            return None
+        query = match_query(term)
+        if not query:
+            return []
+
+        fts = f'{table}_fts'
+        if fts not in SEARCH_INDEXES:
+            raise ValueError(f"No search index for {table}")
+        select = ', '.join(f't.{c.strip()}' for c in columns.split(','))
+        sql = f"""
+            SELECT {select}
+            FROM {fts} f
+            JOIN {table} t ON t.rowid = f.rowid
+            WHERE {fts} MATCH ?
+            ORDER BY bm25({fts})
+        """
+        params = (query,)
+        if limit:
+            sql += " LIMIT ?"
+            params += (limit,)
+        return self.db.get_connection().execute(sql, params).fetchall()
+
+    def rebuild(self):
+        """Re-index every table from scratch (after VACUUM or a bulk import)"""
+        with self.db.transaction() as conn:
+            for fts in SEARCH_INDEXES:
+                conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
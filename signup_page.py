@@ -11,12 +11,9 @@ import sqlite3
 import time
 from datetime import datetime
 import pytz
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
 import re
 import uuid
 import bcrypt
-import pandas as pd
 import os
 import hashlib
 
@@ -168,21 +165,8 @@ class SignupPage(tk.Frame):
         )
 
         # Database Insertion
-        conn = None
         try:
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-            
-            c.execute("""
-                INSERT INTO users (
-                    user_id, f_name, l_name, m_name, useremail, phonenum,
-                    username, password_hash, salt, usertype, userimage,
-                    last_login, failed_login_attempts, account_locked,
-                    date_created, last_updated, reset_token, reset_token_expiry
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, user_data)
-
-            conn.commit()
+            self.controller.repos.users.add(user_data)
             self.clear_fields()
             messagebox.showinfo("Success", "User registered successfully!")
             self.controller.show_frame(FrameNames.LOGIN)
@@ -199,9 +183,6 @@ class SignupPage(tk.Frame):
                 messagebox.showerror("Database Error", str(e))
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
-        finally:
-            if conn:
-                conn.close()
 
     def clear_fields(self):
         """Clear all input fields after successful registration"""
@@ -0,0 +1,152 @@
+import logging
+from timestamps import now_timestamp
+
+
+class InsufficientStockError(ValueError):
+    """Raised inside a deduction when a material is short; the whole transaction rolls back
+
+    `shortages` is [(mat_id, mat_name, needed, available)].
+    """
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        super().__init__("Not enough materials:\n" + "\n".join(
+            f"- {name} (Need: {needed:g}, Have: {available})" for _, name, needed, available in shortages))
+
+
+def _apply_deductions(conn, demand):
+    """Conditionally deduct each (mat_id, qty); raise InsufficientStockError if any is short"""
+    deducted, short = [], []
+    for mat_id, qty in demand:
+        row = conn.execute("""
+            UPDATE raw_mats SET mat_volume = mat_volume - ?
+            WHERE mat_id = ? AND mat_volume >= ?
+            RETURNING mat_volume
+        """, (qty, mat_id, qty)).fetchone()
+        if row is None:
+            short.append((mat_id, qty))
+        else:
+            deducted.append((mat_id, qty, row[0]))
+
+    if short:
+        shortages = []
+        for mat_id, qty in short:
+            found = conn.execute("SELECT mat_name, mat_volume FROM raw_mats WHERE mat_id = ?", (mat_id,)).fetchone()
+            name, available = found if found else (mat_id, 0)
+            shortages.append((mat_id, name, qty, available))
+        raise InsufficientStockError(shortages)
+    return deducted
+
+
+def _record(conn, rows):
+    """Insert (mat_id, product_id, quantity, balance_after, transaction_type, reference_id, notes,
+    performed_by) ledger rows, stamped with the current Manila time"""
+    timestamp = now_timestamp()
+    conn.executemany("""
+        INSERT INTO inventory_transactions (mat_id, product_id, quantity, balance_after, transaction_type,
+                                            reference_id, notes, performed_by, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [row + (timestamp,) for row in rows])
+
+
+def deduct_materials(conn, demand, performed_by, reference_id=None, product_id=None,
+                     transaction_type='sale', notes=None):
+    """Deduct `demand` ({mat_id: qty} or [(mat_id, qty)]) from raw_mats on an open transaction
+
+    Every material gets a conditional `UPDATE ... WHERE mat_volume >= ?`, so two terminals
+    approving at once can never drive stock negative or overwrite each other's value.
+    If any material is short, InsufficientStockError is raised after all of them have been
+    tried, so the caller's transaction rolls back every deduction and reports every shortage.
+    Each deduction is recorded in inventory_transactions.
+
+    Must be called inside `DatabaseManager.transaction(immediate=True)`.
+    Returns [(mat_id, qty, volume_left)].
+    """
+    items = demand.items() if isinstance(demand, dict) else demand
+
+    deducted = _apply_deductions(conn, items)
+    _record(conn, [(mat_id, product_id, -qty, left, transaction_type, reference_id, notes, performed_by)
+                   for mat_id, qty, left in deducted])
+
+    logging.info(f"Deducted {len(deducted)} materials for {reference_id or transaction_type} by {performed_by}")
+    return deducted
+
+
+def deduct_for_orders(conn, order_demands, performed_by, notes=None):
+    """Deduct the combined demand of several orders with one conditional update per material
+
+    `order_demands` is {order_id: (product_id, [(mat_id, qty)])}. Stock is only touched once
+    per material, but inventory_transactions still gets one 'sale' row per order and material.
+    All or nothing, like deduct_materials.
+    Returns [(mat_id, total_qty, volume_left)].
+    """
+    combined = {}
+    for _, requirements in order_demands.values():
+        for mat_id, qty in requirements:
+            combined[mat_id] = combined.get(mat_id, 0) + qty
+
+    deducted = _apply_deductions(conn, combined.items())
+
+    # Replay the per-order rows from the pre-deduction volume so each carries its running balance
+    balance = {mat_id: left + qty for mat_id, qty, left in deducted}
+    rows = []
+    for order_id, (product_id, requirements) in order_demands.items():
+        for mat_id, qty in requirements:
+            balance[mat_id] -= qty
+            rows.append((mat_id, product_id, -qty, balance[mat_id], 'sale', order_id,
+                         notes or f"Order {order_id} approved", performed_by))
+    _record(conn, rows)
+
+    logging.info(f"Deducted {len(deducted)} materials for {len(order_demands)} orders by {performed_by}")
+    return deducted
+
+
+def move_stock(conn, mat_id, quantity, transaction_type, performed_by, reference_id=None, notes=None,
+               product_id=None):
+    """Add `quantity` of a material (negative to take it out) and record it in the ledger
+
+    Used for purchases, waste and transfers. Removals are conditional like deduct_materials
+    and raise InsufficientStockError when short. Returns the new volume.
+    """
+    if quantity < 0:
+        [(_, _, left)] = _apply_deductions(conn, [(mat_id, -quantity)])
+    else:
+        row = conn.execute("""
+            UPDATE raw_mats SET mat_volume = COALESCE(mat_volume, 0) + ?
+            WHERE mat_id = ?
+            RETURNING mat_volume
+        """, (quantity, mat_id)).fetchone()
+        if row is None:
+            raise ValueError(f"Material {mat_id} does not exist")
+        left = row[0]
+    _record(conn, [(mat_id, product_id, quantity, left, transaction_type, reference_id, notes, performed_by)])
+    return left
+
+
+def set_stock(conn, mat_id, volume, performed_by, notes=None):
+    """Set a material's volume outright (a stock count or edit) and ledger the difference as
+    an 'adjustment'; call inside an immediate transaction so the old volume cannot change
+    underneath. Returns the difference."""
+    row = conn.execute("SELECT mat_volume FROM raw_mats WHERE mat_id = ?", (mat_id,)).fetchone()
+    if row is None:
+        raise ValueError(f"Material {mat_id} does not exist")
+    volume = int(volume)
+    change = volume - (row[0] or 0)
+    conn.execute("UPDATE raw_mats SET mat_volume = ? WHERE mat_id = ?", (volume, mat_id))
+    if change:
+        _record(conn, [(mat_id, None, change, volume, 'adjustment', None, notes, performed_by)])
+    return change
+
+
+def take_snapshot(conn, taken_at=None):
+    """Store every material's current volume together with the last ledger row it includes
+
+    Balances as of a past date start from the nearest snapshot and only replay the ledger
+    rows written after it. Returns the number of materials recorded.
+    """
+    taken_at = taken_at or now_timestamp()
+    last_id = conn.execute("SELECT COALESCE(MAX(transaction_id), 0) FROM inventory_transactions").fetchone()[0]
+    return conn.execute("""
+        INSERT OR REPLACE INTO inventory_snapshots (taken_at, mat_id, balance, transaction_id)
+        SELECT ?, mat_id, COALESCE(mat_volume, 0), ? FROM raw_mats
+    """, (taken_at, last_id)).rowcount
@@ -5,17 +5,13 @@ from tkinter import ttk
 from tkinter import messagebox, filedialog
 import customtkinter
 import customtkinter as ctk
-from customtkinter import CTkLabel, CTkEntry, CTkButton, CTkFrame, CTkImage, CTkToplevel
-from PIL import Image
+from customtkinter import CTkLabel, CTkEntry, CTkButton, CTkFrame, CTkToplevel
 import sqlite3
 import time
 from datetime import datetime
 import pytz
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
 import uuid
 import bcrypt
-import pandas as pd
 import logging
 import os
 import sys
@@ -24,7 +20,9 @@ sys.path.append("C:/capstone")
 
 #Import Files
 from pages_handler import FrameNames
+from assets import get_image
 from global_func import on_show, handle_logout
+from tree_paging import PagedTreeLoader
 
 class SuppliersPage(tk.Frame):
     def __init__(self, parent, controller):
@@ -38,9 +36,7 @@ class SuppliersPage(tk.Frame):
             self.main_desc = CTkFrame(self, fg_color="#84a8db", height=50, corner_radius=0)
             self.main_desc.pack(side="top", fill="x", padx=(0, 0), pady=(0, 10))
 
-            novus_logo = Image.open('C:/capstone/labels/novus_logo1.png')
-            novus_logo = novus_logo.resize((50, 50))
-            self.novus_photo = CTkImage(novus_logo, size=(50, 50))
+            self.novus_photo = get_image('C:/capstone/labels/novus_logo1.png', (50, 50))
 
             logging.basicConfig(filename='C:/capstone/log_f/actions.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
             self.splr_act = logging.getLogger('splr_act')
@@ -105,73 +101,45 @@ class SuppliersPage(tk.Frame):
             for col in ('supplier_id', 'supplier_add', 'supplier_num', 'supplier_mail', 'delivered_date'):
                 self.supplier_tree.column(col, width=300, stretch=False)
             
-                # Scrollbars
-                self.scrollbar = tk.Scrollbar(tree_frame, orient="vertical", command=self.supplier_tree.yview)
-                self.h_scrollbar = tk.Scrollbar(tree_frame, orient="horizontal", command=self.supplier_tree.xview)
-                self.supplier_tree.configure(yscrollcommand=self.scrollbar.set, xscrollcommand=self.h_scrollbar.set)
+            # Scrollbars
+            self.scrollbar = tk.Scrollbar(tree_frame, orient="vertical", command=self.supplier_tree.yview)
+            self.h_scrollbar = tk.Scrollbar(tree_frame, orient="horizontal", command=self.supplier_tree.xview)
+            self.supplier_tree.configure(yscrollcommand=self.scrollbar.set, xscrollcommand=self.h_scrollbar.set)
 
-                # Use grid for proper layout
-                self.supplier_tree.grid(row=0, column=0, sticky="nsew")
-                self.scrollbar.grid(row=0, column=1, sticky="w")
-                self.h_scrollbar.grid(row=1, column=0, sticky="ew")
+            # Use grid for proper layout
+            self.supplier_tree.grid(row=0, column=0, sticky="nsew")
+            self.scrollbar.grid(row=0, column=1, sticky="w")
+            self.h_scrollbar.grid(row=1, column=0, sticky="ew")
 
-                # Make the treeview expandable
-                tree_frame.grid_rowconfigure(0, weight=1)
-                tree_frame.grid_columnconfigure(0, weight=1)
+            # Make the treeview expandable
+            tree_frame.grid_rowconfigure(0, weight=1)
+            tree_frame.grid_columnconfigure(0, weight=1)
+
+            suppliers = self.controller.repos.suppliers
+            self.splr_pages = PagedTreeLoader(self.supplier_tree, self.scrollbar, suppliers.list_page, suppliers.page_key)
 
             # Load initial data
             self.load_splr_from_db()
 
     def load_splr_from_db(self):
         try:
-
-            conn = sqlite3.connect("main.db")
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM suppliers")
-            rows = cursor.fetchall()
-
-            # Enumerate loop for getting every single client in the DB & inseting data in each column represented
-            for i in self.supplier_tree.get_children():
-                self.supplier_tree.delete(i)
-
-            for row in rows:
-                self.supplier_tree.insert("", "end", values=row)
+            self.splr_pages.refresh()
 
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", str(e))
-        finally:
-            conn.close()
 
     def srch_splr(self):
         search_term = self.search_entry.get().strip()
         try:
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-            # Search across multiple columns using LIKE for partial matches
-            query = """
-                SELECT * FROM suppliers
-                WHERE supplier_id LIKE ? OR
-                      supplier_add LIKE ? OR
-                      supplier_num LIKE ? OR
-                      supplier_mail LIKE ?
-            """
-            like_term = f"%{search_term}%"
-            c.execute(query, (like_term, like_term, like_term, like_term))
-            rows = c.fetchall()
-
-            for i in self.supplier_tree.get_children():
-                self.supplier_tree.delete(i)
-
-            if rows:
-                for row in rows:
-                    self.supplier_tree.insert("", "end", values=row)
-            else:
+            # Ranked prefix search across every column
+            rows = self.controller.repos.suppliers.search(search_term)
+            self.splr_pages.show(rows)
+
+            if not rows:
                 messagebox.showinfo("Not Found", f"No supplier found matching '{search_term}'")
                 self.load_splr_from_db()
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", str(e))
-        finally:
-            conn.close()
     
     def add_splr(self):
         try:
@@ -231,26 +199,18 @@ class SuppliersPage(tk.Frame):
                     return
 
                 try:
-                    conn = sqlite3.connect('main.db')
-                    c = conn.cursor()
-                    c.execute("""
-                        INSERT INTO suppliers (supplier_id, supplier_add, supplier_num, supplier_mail)
-                        VALUES (?, ?, ?, ?)
-                    """, tuple(splr_data))
-                    conn.commit()
+                    repos = self.controller.repos
+                    with repos.transaction():
+                        repos.suppliers.add(*splr_data)
+                        # Log the action - ADD SUPPLIER to USER LOG
+                        repos.logs.add(user_id, f"ADD SUPPLIER {data_dict['supplier_id']}", timestamp)
                     messagebox.showinfo("Success", "Supplier registered successfully!")
-                    # Log the action - ADD SUPPLIER to USER LOG
-                    c.execute("""INSERT INTO user_logs (user_id, action, timestamp)
-                                VALUES (?, ?, ?)""", (user_id, f'ADD SUPPLIER {data_dict['supplier_id']}', timestamp))
-                    conn.commit()
-                    self.splr_act.info(f"Added supplier {data_dict['supplier_ide']}, Time: {timestamp}")
+                    self.splr_act.info(f"Added supplier {data_dict['supplier_id']}, Time: {timestamp}")
                     self.load_splr_from_db()
                     self.splr_window.destroy()
                 except sqlite3.Error as e:
                     messagebox.showerror("Database Error", str(e))
                     self.splr_act_error.error(f"Error adding supplier '{data_dict['supplier_id']}, Time: {timestamp}: {e}")
-                finally:
-                    conn.close()
 
             submit_btn = CTkButton(self.splr_window, text='Submit All', font=("Arial", 12), width=120, height=30,
                                 bg_color='white', fg_color='blue', corner_radius=10, border_width=2,
@@ -277,18 +237,14 @@ class SuppliersPage(tk.Frame):
             if not confirm:
                 return
 
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-            c.execute("SELECT * FROM suppliers WHERE supplier_id =  ?", (suplier_id,))
-            row = c.fetchone()
+            repos = self.controller.repos
+            with repos.transaction():
+                deleted = repos.suppliers.delete(suplier_id)
+                if deleted:
+                    repos.logs.add(user_id, f'DELETE SUPPLIER {suplier_id}', timestamp)
 
-            if row:
-                c.execute("DELETE FROM suppliers WHERE supplier_id =  ?", (suplier_id,))
-                conn.commit()
+            if deleted:
                 messagebox.showinfo("Deleted", f"Order ID '{suplier_id}' has been deleted.")
-                c.execute("""INSERT INTO user_logs (user_id, action, timestamp)
-                            VALUES (?, ?, ?)""", (user_id, f'DELETE SUPPLIER {suplier_id}', timestamp))
-                conn.commit()
                 self.load_splr_from_db()
                 self.splr_act.info(f"Deleted supplier {suplier_id}, Time: {timestamp}")
             else:
@@ -298,9 +254,6 @@ class SuppliersPage(tk.Frame):
             messagebox.showerror("Database Error", str(e))
             self.splr_act_error.error(f"Error deleting supplier {suplier_id}: {e}, Time: {timestamp}")
 
-        finally:
-            conn.close()
-
     def upd_splr(self):
         user_id = self.controller.session.get('user_id')
         timestamp = datetime.now(pytz.timezone('Asia/Manila')).strftime('%Y-%m-%d %H:%M:%S')
@@ -342,25 +295,20 @@ class SuppliersPage(tk.Frame):
             col_names = ['supplier_id', 'supplier_add', 'supplier_num', 'supplier_mail', 'delivered_date']
             col = col_names[idx]
 
+            if col in ['supplier_id', 'delivered_date']:
+                messagebox.showinfo("Info", f"{fields[idx]} cannot be changed here.")
+                return
             try:
-                conn = sqlite3.connect('main.db')
-                c = conn.cursor()
-                if col in ['supplier_id', 'delivered_date']:
-                    messagebox.showinfo("Info", f"{fields[idx]} cannot be changed here.")
-                    return
-                c.execute(f"UPDATE suppliers SET {col} = ? WHERE supplier_id = ?", (new_value, original_id))
-                conn.commit()
+                repos = self.controller.repos
+                with repos.transaction():
+                    repos.suppliers.update_field(original_id, col, new_value)
+                    repos.logs.add(user_id, f"UPDATED {col.replace('_', ' ').upper()} OF CLIENT {original_id} TO {new_value}", timestamp)
                 messagebox.showinfo("Success", f"{fields[idx]} updated!")
-                c.execute(''' INSERT INTO user_logs (user_id, action, timestamp) VALUES (?,?,?) ''',
-                        (user_id, f"UPDATED {col.replace('_', ' ').upper()} OF CLIENT {original_id} TO {new_value}", timestamp))
-                conn
                 self.load_splr_from_db()
                 self.splr_act.info(f"Updated {fields[idx]} for supplier {original_id} to '{new_value}, Time: {timestamp}'")
             except sqlite3.Error as e:
                 messagebox.showerror("Database Error", str(e))
                 self.splr_act_error.error(f"Error updating {fields[idx]}: {e}")
-            finally:
-                conn.close()
 
         # Add an update button for each editable field
         for i in range(1, len(fields)-1):  # skip Supplier ID and Delivered Date
@@ -374,26 +322,17 @@ class SuppliersPage(tk.Frame):
                 return
 
             try:
-                conn = sqlite3.connect('main.db')
-                c = conn.cursor()
-                c.execute('''
-                    UPDATE suppliers
-                    SET supplier_add=?, supplier_num=?, supplier_mail=?
-                    WHERE supplier_id=?
-                ''', (all_values[1], all_values[2], all_values[3], original_id))
-                conn.commit()
+                repos = self.controller.repos
+                with repos.transaction():
+                    repos.suppliers.update(original_id, *all_values[1:4])
+                    repos.logs.add(user_id, f"UPDATED ALL FIELDS OF CLIENT {original_id} TO {', '.join(all_values[1:])}", timestamp)
                 messagebox.showinfo("Success", "All fields updated!")
-                c.execute(''' INSERT INTO user_logs (user_id, action, timestamp) VALUES (?,?,?) ''',
-                        (user_id, f"UPDATED ALL FIELDS OF CLIENT {original_id} TO {', '.join(all_values[1:])}", timestamp))
-                conn.commit()
                 self.load_splr_from_db()
                 top.destroy()
                 self.splr_act.info(f"Updated all fields for supplier {original_id} to '{', '.join(all_values[1:])}, Time: {timestamp}'")
             except sqlite3.Error as e:
                 messagebox.showerror("Database Error", str(e))
                 self.splr_act_error.error(f"Error updating all fields: {e}")
-            finally:
-                conn.close()
 
         # "Update All" button at the bottom
         update_all_btn = CTkButton(top, text="Update All", width=120, fg_color="#6a9bc3", command=update_all)
@@ -403,15 +342,11 @@ class SuppliersPage(tk.Frame):
         search_del = self.search_entry.get().strip().lower()
 
         try:
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-            c.execute('SELECT * FROM raw_mats WHERE mat_id = ?''', (search_del,))
+            self.controller.repos.materials.get(search_del)
 
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", str(e))
             self.load_splr_from_db()
-        finally:
-            conn.close() 
 
     def splr_history(self, event):
         selected = self.supplier_tree.focus()
@@ -427,15 +362,7 @@ class SuppliersPage(tk.Frame):
         print("Supplier ID:", supplier_id)
 
         try:
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-
-            splr_info = c.execute("""
-                SELECT rm.mat_id, rm.mat_name, rm.mat_order_date
-                FROM raw_mats rm
-                JOIN suppliers s on rm.supplier_id = s.supplier_id
-                WHERE s.supplier_id = ?
-            """, (supplier_id,)).fetchall()
+            splr_info = self.controller.repos.materials.by_supplier(supplier_id)
 
             print("Supplier Info:", splr_info)
 
@@ -460,15 +387,11 @@ class SuppliersPage(tk.Frame):
         except Exception as e:
             messagebox.showerror("Error", str(e))
             return
-        finally:
-            conn.close()
 
 
 
     def _images_buttons(self, image_path, size=(40, 40)):
-        image = Image.open(image_path)
-        size = size
-        return CTkImage(image)
+        return get_image(image_path, size, display_size=(20, 20))
     
     def _main_buttons(self, parent, image, text, command):
         button = CTkButton(parent, image=image, text=text, bg_color="#6a9bc3", fg_color="#6a9bc3", hover_color="white",
@@ -0,0 +1,62 @@
+import os
+import shutil
+import sqlite3
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def add_baseline_order(db_name, order_id, product_id, quantity, mats_need, deadline='2099-01-01'):
+    with sqlite3.connect(db_name) as conn:
+        client_id = conn.execute("SELECT client_id FROM clients LIMIT 1").fetchone()[0]
+        conn.execute("""
+            INSERT INTO orders (order_id, order_name, product_id, client_id, quantity, deadline, order_date,
+                                mats_need, status_quo)
+            VALUES (?, ?, ?, ?, ?, ?, '2025-08-01', ?, 'Pending')
+        """, (order_id, order_id, product_id, client_id, quantity, deadline, mats_need))
+
+
+def add_material(repos, mat_id, volume):
+    """A fresh raw material holding `volume`; returns its name"""
+    supplier_id = repos.db.get_connection().execute("SELECT supplier_id FROM suppliers LIMIT 1").fetchone()[0]
+    repos.materials.add(mat_id, f'Test {mat_id}', 'pcs', volume, 0, '2025-08-01', supplier_id, performed_by='nate')
+    return f'Test {mat_id}'
+
+
+def make_product(repos, name, bom, approved=True):
+    """A product built from `bom` ({raw material or product id: qty per unit})"""
+    conn = repos.db.get_connection()
+    names = dict(conn.execute("SELECT mat_id, mat_name FROM raw_mats UNION ALL SELECT product_id, product_name FROM products"))
+    product_id = repos.db.create_product(name, [f'{names[item]} - {qty}' for item, qty in bom.items()])
+    if approved:
+        repos.db.approved_status(product_id, 'Approved')
+    return product_id
+
+
+def make_order(repos, product_id, quantity, deadline='2099-01-01'):
+    client_id = repos.db.get_connection().execute("SELECT client_id FROM clients LIMIT 1").fetchone()[0]
+    return repos.db.create_order(f'{quantity} of {product_id}', product_id, client_id, quantity, deadline)
+
+
+@pytest.fixture
+def baseline_db(tmp_path):
+    """Path to an unmigrated (user_version 0) copy of the bundled main.db"""
+    db_name = str(tmp_path / 'main.db')
+    shutil.copy(os.path.join(ROOT, 'main.db'), db_name)
+    with sqlite3.connect(db_name) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+    return db_name
+
+
+@pytest.fixture
+def repos(baseline_db):
+    """Repositories over a migrated copy of the bundled main.db"""
+    from database import DatabaseManager
+    from repositories import Repositories
+
+    db = DatabaseManager(baseline_db)
+    yield Repositories(db)
+    db.pool.close_all()
@@ -0,0 +1,81 @@
+import pytest
+
+from conftest import add_material, make_product
+from test_stock_engine import RecordingBus
+
+
+def explosion(repos, product_id):
+    return dict(repos.db.get_connection().execute(
+        "SELECT mat_id, qty_per_unit FROM bom_explosion WHERE product_id = ?", (product_id,)).fetchall())
+
+
+def components(repos, product_id):
+    return dict(repos.db.get_connection().execute(
+        "SELECT component_id, qty_per_unit FROM product_components WHERE product_id = ?", (product_id,)).fetchall())
+
+
+@pytest.fixture
+def assembly(repos):
+    """A table built from 4 legs and a top; a leg is 2 M-W, the top 3 M-W and 1 M-G"""
+    add_material(repos, 'M-W', 100)
+    add_material(repos, 'M-G', 100)
+    leg = make_product(repos, 'Leg', {'M-W': 2})
+    table = make_product(repos, 'Table', {leg: 4, 'M-W': 3, 'M-G': 1})
+    return leg, table
+
+
+def test_explosion_multiplies_through_sub_assemblies(repos, assembly):
+    leg, table = assembly
+    dining_set = make_product(repos, 'Dining set', {table: 2, leg: 1})
+
+    assert explosion(repos, leg) == {'M-W': 2}
+    assert explosion(repos, table) == {'M-W': 11, 'M-G': 1}
+    assert explosion(repos, dining_set) == {'M-W': 24, 'M-G': 2}
+    assert repos.db.calculate_requirements(table, 3) == [('M-G', 'Test M-G', 3, 100), ('M-W', 'Test M-W', 33, 100)]
+
+
+def test_changing_a_sub_assembly_rebuilds_the_products_built_from_it(repos, assembly):
+    leg, table = assembly
+    other = make_product(repos, 'Shelf', {'M-G': 5})
+    repos.db.events = bus = RecordingBus()
+
+    repos.db.update_product(leg, 'Leg', 'Test M-W - 1; Test M-G - 1')
+
+    assert explosion(repos, leg) == {'M-W': 1, 'M-G': 1}
+    assert explosion(repos, table) == {'M-W': 7, 'M-G': 5}
+    assert explosion(repos, other) == {'M-G': 5}
+    assert {event.product_id for event in bus.events} == {leg, table}
+
+
+def test_a_product_cannot_contain_itself(repos, assembly):
+    leg, _ = assembly
+
+    with pytest.raises(ValueError, match='component of itself'):
+        repos.db.update_product(leg, 'Leg', 'Test M-W - 2; Leg - 1')
+
+    assert components(repos, leg) == {}
+    assert explosion(repos, leg) == {'M-W': 2}
+
+
+def test_an_indirect_cycle_is_refused_and_leaves_the_bom_alone(repos, assembly):
+    leg, table = assembly
+
+    with pytest.raises(ValueError, match="'Table' already contains this product"):
+        repos.db.update_product(leg, 'Leg', 'Test M-W - 2; Table - 1')
+
+    assert components(repos, leg) == {}
+    assert components(repos, table) == {leg: 4}
+    assert explosion(repos, leg) == {'M-W': 2}
+    assert explosion(repos, table) == {'M-W': 11, 'M-G': 1}
+
+
+def test_a_component_in_use_cannot_be_deleted(repos, assembly):
+    leg, table = assembly
+
+    with pytest.raises(ValueError, match='Table'):
+        repos.db.delete_product(leg)
+    assert explosion(repos, leg) == {'M-W': 2}
+
+    repos.db.delete_product(table)
+    repos.db.delete_product(leg)
+    assert explosion(repos, leg) == {}
@@ -0,0 +1,37 @@
+from conftest import add_material, make_order, make_product
+
+
+def test_orders_are_approved_in_sequence_while_stock_lasts(repos):
+    add_material(repos, 'M-A', 25)
+    table = make_product(repos, 'Table', {'M-A': 10})
+    first, too_big, small = (make_order(repos, table, 1), make_order(repos, table, 2), make_order(repos, table, 1))
+
+    report = repos.db.approve_orders([first, too_big, small, 'NO-SUCH-ORDER'], 'nate')
+
+    assert [(order_id, ok) for order_id, ok, _ in report] == \
+        [(first, True), (too_big, False), (small, True), ('NO-SUCH-ORDER', False)]
+    assert report[1][2].startswith('Not enough Test M-A')
+    conn = repos.db.get_connection()
+    assert conn.execute("SELECT mat_volume FROM raw_mats WHERE mat_id = 'M-A'").fetchone()[0] == 5
+    # One ledger row per approved order, each with the running balance after it
+    assert conn.execute("""
+        SELECT reference_id, quantity, balance_after FROM inventory_transactions
+        WHERE mat_id = 'M-A' AND transaction_type = 'sale' ORDER BY transaction_id
+    """).fetchall() == [(first, -10, 15), (small, -10, 5)]
+    statuses = dict(conn.execute("SELECT order_id, status_quo FROM orders WHERE order_id IN (?, ?, ?)",
+                                 (first, too_big, small)))
+    assert statuses == {first: 'Approved', too_big: 'Pending', small: 'Approved'}
+
+
+def test_already_approved_and_unapproved_product_orders_are_skipped(repos):
+    add_material(repos, 'M-A', 100)
+    approved_product = make_product(repos, 'Desk', {'M-A': 1})
+    pending_product = make_product(repos, 'Bench', {'M-A': 1}, approved=False)
+    done, waiting = make_order(repos, approved_product, 1), make_order(repos, pending_product, 1)
+    repos.db.approve_order(done, 'nate')
+
+    report = repos.db.approve_orders([done, waiting], 'nate')
+
+    assert report == [(done, False, 'Order is Approved'), (waiting, False, f'Product {pending_product} is Pending')]
+    assert repos.db.get_connection().execute(
+        "SELECT mat_volume FROM raw_mats WHERE mat_id = 'M-A'").fetchone()[0] == 99
@@ -0,0 +1,19 @@
+def test_set_priority_on_a_migrated_database(repos):
+    clients = repos.clients
+    client_id = clients.list_all()[0][0]
+
+    clients.set_priority(client_id, 5)
+
+    assert clients.get_priority(client_id) == 5
+    last_updated = repos.db.get_connection().execute(
+        "SELECT last_updated FROM clients WHERE client_id = ?", (client_id,)).fetchone()[0]
+    assert last_updated is not None
+
+
+def test_client_updates_pass_the_timestamp_trigger(repos):
+    clients = repos.clients
+    clients.add('CL-TEST', 'Test Client', 'test@example.com', 'Somewhere', '09123456789', priority=2)
+    clients.update('CL-TEST', 'Renamed Client', 'test@example.com', 'Somewhere', '09123456789')
+    clients.update_field('CL-TEST', 'client_address', 'Elsewhere')
+
+    assert clients.get_priority('CL-TEST') == 2
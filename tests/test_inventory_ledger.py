@@ -0,0 +1,26 @@
+from repositories import MaterialsRepo
+
+
+def test_ledger_since_snapshot_is_a_rowid_range_scan(repos):
+    plan = [row[3] for row in repos.db.get_connection().execute(
+        "EXPLAIN QUERY PLAN " + MaterialsRepo.LEDGER_SINCE, (0, '9999-12-31 23:59:59'))]
+    assert any('USING INTEGER PRIMARY KEY (rowid>?)' in step for step in plan), plan
+    assert not any('idx_inventory_txn_mat_time' in step for step in plan), plan
+
+
+def test_volumes_as_of_matches_the_ledger(repos):
+    materials = repos.materials
+    mat_id = materials.list_all()[0][0]
+    start = materials.volume_as_of(mat_id, '9999-12-31')
+
+    repos.materials.move(mat_id, 25, 'purchase', 'nate')
+    repos.materials.move(mat_id, -10, 'waste', 'nate')
+
+    volumes = materials.volumes_as_of('9999-12-31')
+    assert volumes[mat_id] == start + 15
+    assert volumes[mat_id] == materials.volume_as_of(mat_id, '9999-12-31')
+
+
+def test_names_skips_unknown_ids(repos):
+    (mat_id, mat_name), = repos.db.get_connection().execute("SELECT mat_id, mat_name FROM raw_mats LIMIT 1")
+    assert repos.materials.names([mat_id, 'NO-SUCH-MAT']) == {mat_id: mat_name}
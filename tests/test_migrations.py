@@ -0,0 +1,41 @@
+import sqlite3
+
+from conftest import add_baseline_order
+from database import DatabaseManager
+
+
+def test_upgrade_from_user_version_0(baseline_db):
+    with sqlite3.connect(baseline_db) as conn:
+        product_id, materials = conn.execute("SELECT product_id, materials FROM products LIMIT 1").fetchone()
+    # Orders whose mats_need cannot be used fall back to the product's BOM
+    for order_id, mats_need in (('ORD-NULL', None), ('ORD-EMPTY', ''), ('ORD-JUNK', 'not json'),
+                                ('ORD-UNKNOWN', '{"unobtainium": 3}')):
+        add_baseline_order(baseline_db, order_id, product_id, 2, mats_need)
+
+    db = DatabaseManager(baseline_db)
+    try:
+        conn = db.get_connection()
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == len(db._migrations())
+        bom = dict(conn.execute("SELECT mat_id, qty_per_unit FROM product_materials WHERE product_id = ?",
+                                (product_id,)))
+        assert bom, materials
+        for order_id in ('ORD-NULL', 'ORD-EMPTY', 'ORD-JUNK', 'ORD-UNKNOWN'):
+            needed = dict(conn.execute("SELECT mat_id, qty FROM order_material_requirements WHERE order_id = ?",
+                                       (order_id,)))
+            assert needed == {mat_id: qty * 2 for mat_id, qty in bom.items()}
+        # The flattened BOM cache starts out equal to the single level BOMs
+        assert conn.execute("SELECT COUNT(*) FROM bom_explosion").fetchone()[0] == \
+            conn.execute("SELECT COUNT(*) FROM product_materials").fetchone()[0]
+    finally:
+        db.pool.close_all()
+
+
+def test_migrations_run_once(baseline_db):
+    DatabaseManager(baseline_db).pool.close_all()
+    with sqlite3.connect(baseline_db) as conn:
+        tables = conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0]
+    db = DatabaseManager(baseline_db)
+    try:
+        assert db.get_connection().execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] == tables
+    finally:
+        db.pool.close_all()
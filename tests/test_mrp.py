@@ -0,0 +1,54 @@
+import sqlite3
+
+from conftest import add_baseline_order
+from database import DatabaseManager
+from mrp_engine import NO_DEADLINE, OPEN_STATUS, from_day, to_day
+from repositories import Repositories
+
+
+def test_net_requirements_match_the_order_lines(repos):
+    db, conn = repos.db, repos.db.get_connection()
+    (wood, _), (knob, _) = conn.execute("SELECT mat_name, mat_id FROM raw_mats ORDER BY mat_id LIMIT 2")
+    product_id = db.create_product('Test door', [f'{wood} - 3', f'{knob} - 1'])
+    client_id = conn.execute("SELECT client_id FROM clients LIMIT 1").fetchone()[0]
+    db.create_order('Test order', product_id, client_id, 2, '2099-01-01')
+
+    expected = {}
+    for mat_id, qty in conn.execute("""
+        SELECT r.mat_id, r.qty FROM order_material_requirements r
+        JOIN orders o ON o.order_id = r.order_id WHERE o.status_quo = ?
+    """, (OPEN_STATUS,)):
+        expected[mat_id] = expected.get(mat_id, 0) + qty
+    on_hand = dict(conn.execute("SELECT mat_id, COALESCE(mat_volume, 0) FROM raw_mats"))
+
+    rows = repos.dashboard.net_requirements().rows(only_short=False)
+    assert {row[0] for row in rows} == set(on_hand)
+    assert sum(row[3] for row in rows) >= 8
+    for mat_id, _, stock, gross, shortage, _, _ in rows:
+        assert stock == on_hand[mat_id]
+        assert gross == expected.get(mat_id, 0)
+        assert shortage == max(gross - stock, 0)
+
+
+def test_to_day_reads_legacy_and_bad_deadlines():
+    days = to_day(['2026-10-20', '10/20/2026', 'ASAP', None, ''])
+    assert from_day(days[0]) == '2026-10-20'
+    assert days[1] == days[0]
+    assert list(days[2:]) == [NO_DEADLINE] * 3
+
+
+def test_plan_and_allocation_survive_an_unreadable_deadline(baseline_db):
+    # _migrate_iso_dates leaves deadlines it cannot read as they are
+    with sqlite3.connect(baseline_db) as conn:
+        product_id = conn.execute("SELECT product_id FROM products WHERE status_quo = 'Approved'").fetchone()[0]
+    add_baseline_order(baseline_db, 'ORD-ASAP', product_id, 1, None, deadline='ASAP')
+
+    db = DatabaseManager(baseline_db)
+    try:
+        repos = Repositories(db)
+        assert db.get_connection().execute("SELECT deadline FROM orders WHERE order_id = 'ORD-ASAP'").fetchone()[0] == 'ASAP'
+        repos.dashboard.time_phased_plan()
+        allocation = repos.orders.propose_allocation()
+        assert 'ORD-ASAP' in allocation.approved or 'ORD-ASAP' in dict(allocation.blocked)
+    finally:
+        db.pool.close_all()
@@ -0,0 +1,52 @@
+import pytest
+
+from conftest import add_material, make_order, make_product
+from database import keyset_page
+
+
+def walk(list_page, page_key, limit):
+    """Every row reached by following list_page from the first page until an empty one"""
+    rows, pages, after = [], 0, None
+    while True:
+        page = list_page(after=after, limit=limit)
+        if not page:
+            return rows, pages
+        assert len(page) <= limit
+        rows.extend(page)
+        pages += 1
+        after = page_key(page[-1])
+
+
+@pytest.mark.parametrize('limit', [1, 3, 7, 200])
+def test_order_pages_cover_every_row_once_across_tied_dates(repos, limit):
+    add_material(repos, 'M-A', 1000)
+    product_id = make_product(repos, 'Crate', {'M-A': 1})
+    # Orders created in the same second share order_date, so only order_id separates them
+    for quantity in range(1, 8):
+        make_order(repos, product_id, quantity)
+    orders = repos.orders
+    expected = sorted(orders.list_all(), key=lambda row: (row[5], row[0]), reverse=True)
+
+    rows, pages = walk(orders.list_page, orders.page_key, limit)
+
+    assert rows == expected
+    assert pages == -(-len(expected) // limit)
+
+
+def test_client_pages_ascend_by_primary_key(repos):
+    clients = repos.clients
+    for i in range(5):
+        clients.add(f'CL-PAGE-{i}', f'Client {i}', f'c{i}@example.com', 'Address', '09123456789')
+
+    rows, _ = walk(clients.list_page, clients.page_key, 2)
+
+    assert [row[0] for row in rows] == sorted(row[0] for row in clients.list_all())
+
+
+def test_keyset_page_seeks_past_the_last_key():
+    sql, params = keyset_page("SELECT * FROM orders", ('order_date', 'order_id'), after=('2025-08-01', 'ORD-9'),
+                              limit=50, descending=True)
+    assert sql.endswith("WHERE (order_date, order_id) < (?, ?) ORDER BY order_date DESC, order_id DESC LIMIT ?")
+    assert params == ('2025-08-01', 'ORD-9', 50)
+    assert keyset_page("SELECT * FROM clients", ('client_id',), limit=10) == \
+        ("SELECT * FROM clients ORDER BY client_id ASC LIMIT ?", (10,))
@@ -0,0 +1,14 @@
+from conftest import make_product
+
+
+def test_null_stock_counts_as_none_in_stock(repos):
+    db, conn = repos.db, repos.db.get_connection()
+    mat_id, mat_name = conn.execute("SELECT mat_id, mat_name FROM raw_mats LIMIT 1").fetchone()
+    product_id = make_product(repos, 'Null stock table', {mat_id: 2}, approved=False)
+    with db.transaction() as tx:
+        tx.execute("UPDATE raw_mats SET mat_volume = NULL WHERE mat_id = ?", (mat_id,))
+
+    assert db.calculate_requirements(product_id, 3) == [(mat_id, mat_name, 6, 0)]
+    assert db.check_feasibility(product_id, 3) == [(mat_id, mat_name, 6, 0)]
+    assert db.approve_product(product_id) == ('Null stock table', [(mat_name, 2, 0)])
+    assert conn.execute("SELECT status_quo FROM products WHERE product_id = ?", (product_id,)).fetchone()[0] == 'Pending'
@@ -0,0 +1,39 @@
+def check_in_sync(conn, fts):
+    """FTS5 raises SQLITE_CORRUPT_VTAB if the index disagrees with its content table"""
+    conn.execute(f"INSERT INTO {fts}({fts}, rank) VALUES ('integrity-check', 1)")
+
+
+def index_writes(conn, statement, params):
+    """Rows the statement and its triggers changed, FTS shadow tables included"""
+    before = conn.total_changes
+    conn.execute(statement, params)
+    return conn.total_changes - before
+
+
+def test_search_follows_inserts_updates_and_deletes(repos):
+    materials, conn = repos.materials, repos.db.get_connection()
+    supplier_id = conn.execute("SELECT supplier_id FROM suppliers LIMIT 1").fetchone()[0]
+    materials.add('MAT-ZX1', 'Zebrawood plank', 'pcs', 10, 5, '2025-08-01', supplier_id, performed_by='nate')
+    assert [row[0] for row in materials.search('zebraw')] == ['MAT-ZX1']
+
+    with repos.db.transaction() as tx:
+        tx.execute("UPDATE raw_mats SET mat_name = 'Walnut plank' WHERE mat_id = 'MAT-ZX1'")
+    assert materials.search('zebraw') == []
+    assert [row[0] for row in materials.search('walnut')] == ['MAT-ZX1']
+
+    materials.delete('MAT-ZX1')
+    assert materials.search('walnut') == []
+    check_in_sync(conn, 'raw_mats_fts')
+
+
+def test_unindexed_and_unchanged_writes_skip_the_index(repos):
+    conn = repos.db.get_connection()
+    mat_id, name = conn.execute("SELECT mat_id, mat_name FROM raw_mats LIMIT 1").fetchone()
+    with repos.db.transaction() as tx:
+        volume_only = index_writes(tx, "UPDATE raw_mats SET mat_volume = mat_volume + 1 WHERE mat_id = ?", (mat_id,))
+        same_name = index_writes(tx, "UPDATE raw_mats SET mat_name = ? WHERE mat_id = ?", (name, mat_id))
+        renamed = index_writes(tx, "UPDATE raw_mats SET mat_name = ? WHERE mat_id = ?", (name + ' x', mat_id))
+    # Only the row itself and its change_log entry; a re-index also writes the FTS shadow tables
+    assert volume_only == same_name == 2
+    assert renamed > 2
+    check_in_sync(conn, 'raw_mats_fts')
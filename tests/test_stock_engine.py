@@ -0,0 +1,70 @@
+import pytest
+
+from conftest import add_material, make_order, make_product
+from stock_engine import InsufficientStockError
+
+
+class RecordingBus:
+    def __init__(self):
+        self.events = []
+
+    def publish(self, event):
+        self.events.append(event)
+
+
+def volumes(repos, *mat_ids):
+    conn = repos.db.get_connection()
+    return [conn.execute("SELECT mat_volume FROM raw_mats WHERE mat_id = ?", (mat_id,)).fetchone()[0]
+            for mat_id in mat_ids]
+
+
+def sales(repos, order_id):
+    return repos.db.get_connection().execute("""
+        SELECT mat_id, quantity, balance_after FROM inventory_transactions
+        WHERE reference_id = ? AND transaction_type = 'sale' ORDER BY mat_id
+    """, (order_id,)).fetchall()
+
+
+def order_status(repos, order_id):
+    return repos.db.get_connection().execute(
+        "SELECT status_quo FROM orders WHERE order_id = ?", (order_id,)).fetchone()[0]
+
+
+def test_approve_order_deducts_every_material_and_logs_it(repos):
+    add_material(repos, 'M-A', 50)
+    add_material(repos, 'M-B', 20)
+    order_id = make_order(repos, make_product(repos, 'Chair', {'M-A': 4, 'M-B': 1}), 5)
+
+    deducted = repos.db.approve_order(order_id, 'nate')
+
+    assert sorted(deducted) == [('M-A', 20, 30), ('M-B', 5, 15)]
+    assert volumes(repos, 'M-A', 'M-B') == [30, 15]
+    assert sales(repos, order_id) == [('M-A', -20, 30), ('M-B', -5, 15)]
+    assert order_status(repos, order_id) == 'Approved'
+
+
+def test_one_short_material_rolls_back_the_whole_approval(repos):
+    add_material(repos, 'M-A', 50)
+    add_material(repos, 'M-B', 2)
+    order_id = make_order(repos, make_product(repos, 'Chair', {'M-A': 4, 'M-B': 1}), 5)
+    repos.db.events = bus = RecordingBus()
+
+    with pytest.raises(InsufficientStockError) as raised:
+        repos.db.approve_order(order_id, 'nate')
+
+    assert raised.value.shortages == [('M-B', 'Test M-B', 5, 2)]
+    # M-A was deducted before M-B came up short; the rollback must undo it
+    assert volumes(repos, 'M-A', 'M-B') == [50, 2]
+    assert sales(repos, order_id) == []
+    assert order_status(repos, order_id) == 'Pending'
+    assert bus.events == []
+
+
+def test_a_second_approval_of_the_same_order_is_refused(repos):
+    add_material(repos, 'M-A', 50)
+    order_id = make_order(repos, make_product(repos, 'Stool', {'M-A': 10}), 1)
+    repos.db.approve_order(order_id, 'nate')
+
+    with pytest.raises(ValueError):
+        repos.db.approve_order(order_id, 'nate')
+    assert volumes(repos, 'M-A') == [40]
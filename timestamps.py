@@ -0,0 +1,112 @@
+import re
+from datetime import datetime, date, timedelta
+import pytz
+
+
+# Canonical storage formats: ISO-8601 text sorts and range-scans correctly in SQLite
+DATE_FORMAT = '%Y-%m-%d'
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+# What the DateEntry widgets show and type (date_pattern='mm/dd/yyyy')
+DISPLAY_DATE_FORMAT = '%m/%d/%Y'
+
+MANILA = pytz.timezone('Asia/Manila')
+
+# Formats still found in older rows or typed by users
+_DATE_INPUTS = (DATE_FORMAT, DISPLAY_DATE_FORMAT, '%Y/%m/%d', '%m-%d-%Y')
+_TIMESTAMP_INPUTS = (TIMESTAMP_FORMAT, '%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M:%S.%f')
+
+_ISO_PREFIX = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+
+def now():
+    """Current time in Manila"""
+    return datetime.now(MANILA)
+
+
+def today():
+    return now().date()
+
+
+def seconds_until_tomorrow():
+    """Seconds left before the Manila date changes"""
+    current = now()
+    midnight = MANILA.localize(datetime.combine(current.date() + timedelta(days=1), datetime.min.time()))
+    return (midnight - current).total_seconds()
+
+
+def now_timestamp():
+    return now().strftime(TIMESTAMP_FORMAT)
+
+
+def parse_date(value):
+    """Turn a date, datetime or date/timestamp string in any known format into a date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    for fmt in _DATE_INPUTS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    return parse_timestamp(text).date()
+
+
+def parse_timestamp(value):
+    """Turn a datetime or timestamp string in any known format into a datetime"""
+    if isinstance(value, datetime):
+        return value
+    text = str(value).strip()
+    for fmt in _TIMESTAMP_INPUTS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    raise ValueError(f"'{value}' is not a recognised date")
+
+
+def to_db_date(value):
+    """Canonical 'YYYY-MM-DD' for storing; ValueError if `value` is not a date"""
+    return parse_date(value).strftime(DATE_FORMAT)
+
+
+def to_db_timestamp(value):
+    """Canonical 'YYYY-MM-DD HH:MM:SS' for storing; ValueError if `value` is not a timestamp"""
+    return parse_timestamp(value).strftime(TIMESTAMP_FORMAT)
+
+
+def as_of_timestamp(value):
+    """Canonical timestamp for an "as of" query: a bare date means the end of that day"""
+    if isinstance(value, datetime):
+        return value.strftime(TIMESTAMP_FORMAT)
+    if not isinstance(value, date):
+        try:
+            return to_db_timestamp(value)
+        except ValueError:
+            pass
+    return parse_date(value).strftime(DATE_FORMAT) + ' 23:59:59'
+
+
+def display_date(value, default='N/A'):
+    """Show a stored date or timestamp as mm/dd/yyyy
+
+    Canonical values are sliced rather than parsed, so list views pay no strptime per row.
+    Anything unrecognised is shown as it is.
+    """
+    if not value:
+        return default
+    text = str(value)
+    if _ISO_PREFIX.match(text):
+        return f"{text[5:7]}/{text[8:10]}/{text[0:4]}"
+    try:
+        return parse_date(text).strftime(DISPLAY_DATE_FORMAT)
+    except ValueError:
+        return text
+
+
+def week_bounds(day=None):
+    """(monday, next monday) of the week containing `day`, as canonical strings"""
+    day = parse_date(day) if day else today()
+    monday = day - timedelta(days=day.weekday())
+    return monday.strftime(DATE_FORMAT), (monday + timedelta(days=7)).strftime(DATE_FORMAT)
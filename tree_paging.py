@@ -0,0 +1,138 @@
+from database import PAGE_SIZE
+
+
+def plain_row(row):
+    return {'values': row}
+
+
+class PagedTreeLoader:
+    """Fills a Treeview one keyset page at a time, fetching the next page as the user scrolls
+
+    `fetch_page(after, limit)` returns rows; `page_key(row)` gives the `after` value for the
+    page that follows `row`; `render_row(row)` returns the insert options for one row
+    (values, tags); `row_key(row)` is the row's primary key. The loader takes over the
+    tree's yscrollcommand and forwards it to `scrollbar`.
+
+    refresh() re-reads what is loaded and only touches the Tk items whose rows were added,
+    removed or changed, so scroll position and selection survive a reload.
+    """
+
+    def __init__(self, tree, scrollbar, fetch_page, page_key, render_row=plain_row,
+                 row_key=lambda row: row[0], page_size=PAGE_SIZE, threshold=0.9):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.fetch_page = fetch_page
+        self.page_key = page_key
+        self.render_row = render_row
+        self.row_key = row_key
+        self.page_size = page_size
+        self.threshold = threshold
+
+        self._after = None
+        self._exhausted = True
+        self._pending = False
+        self._fixed = False  # showing a fixed result set (search hits), not the paged list
+        self._order = []     # primary keys in display order
+        self._items = {}     # primary key -> (tree item id, row hash)
+        tree.configure(yscrollcommand=self._on_scroll)
+
+    def reload(self):
+        """Clear the tree and load the first page"""
+        self._clear()
+        self._after = None
+        self._exhausted = False
+        self._fixed = False
+        self.load_more()
+
+    def refresh(self):
+        """Re-read the rows already loaded and apply only the differences to the tree
+
+        Rows are matched by primary key; a hash of each row is the version used to spot
+        modified rows. Falls back to reload() when nothing is loaded or search hits are shown.
+        """
+        if self._fixed or not self._order:
+            self.reload()
+            return
+
+        wanted = max(len(self._order), self.page_size)
+        rows, after = [], None
+        while True:
+            page = self.fetch_page(after, self.page_size)
+            rows.extend(page)
+            if len(page) < self.page_size:
+                self._exhausted = True
+                break
+            after = self.page_key(page[-1])
+            if len(rows) >= wanted:
+                self._exhausted = False
+                self._after = after
+                break
+        self._apply(rows)
+
+    def load_more(self):
+        """Append the next page; a short page means the end of the table was reached"""
+        self._pending = False
+        if self._exhausted:
+            return
+        rows = self.fetch_page(self._after, self.page_size)
+        for row in rows:
+            self._insert(row)
+        if len(rows) < self.page_size:
+            self._exhausted = True
+        else:
+            self._after = self.page_key(rows[-1])
+
+    def show(self, rows):
+        """Replace the tree with a fixed result set (e.g. search hits) and stop paging"""
+        self._clear()
+        self._exhausted = True
+        self._fixed = True
+        for row in rows:
+            self._insert(row)
+
+    def _clear(self):
+        self.tree.delete(*self.tree.get_children())
+        self._order = []
+        self._items = {}
+
+    def _insert(self, row, index='end'):
+        key = self.row_key(row)
+        iid = self.tree.insert("", index, **self.render_row(row))
+        self._items[key] = (iid, hash(tuple(row)))
+        if index == 'end':
+            self._order.append(key)
+        else:
+            self._order.insert(index, key)
+
+    def _apply(self, rows):
+        new_keys = [self.row_key(row) for row in rows]
+        keep = set(new_keys)
+
+        gone = [key for key in self._order if key not in keep]
+        if gone:
+            self.tree.delete(*(self._items.pop(key)[0] for key in gone))
+            self._order = [key for key in self._order if key in keep]
+
+        # Existing rows only need moving if their relative order changed
+        moved = self._order != [key for key in new_keys if key in self._items]
+
+        for index, row in enumerate(rows):
+            key = new_keys[index]
+            if key not in self._items:
+                self._insert(row, index)
+                continue
+            iid, old_hash = self._items[key]
+            row_hash = hash(tuple(row))
+            if row_hash != old_hash:
+                self.tree.item(iid, **self.render_row(row))
+                self._items[key] = (iid, row_hash)
+            if moved:
+                self.tree.move(iid, "", index)
+        self._order = new_keys
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if not self._exhausted and not self._pending and float(last) >= self.threshold:
+            # Defer so the fetch doesn't run inside Tk's scroll callback
+            self._pending = True
+            self.tree.after_idle(self.load_more)
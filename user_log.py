@@ -5,8 +5,7 @@ import time
 from datetime import datetime
 from tkinter import ttk, messagebox
 import customtkinter as ctk
-from customtkinter import CTkLabel, CTkEntry, CTkButton, CTkFrame, CTkImage
-from PIL import Image
+from customtkinter import CTkLabel, CTkEntry, CTkButton, CTkFrame
 import sqlite3
 import logging
 import traceback
@@ -15,7 +14,10 @@ import sys
 sys.path.append("C:/capstone")
 
 from pages_handler import FrameNames
+from assets import get_image
 from global_func import on_show, handle_logout
+from tree_paging import PagedTreeLoader
+from virtual_tree import VirtualTreeview
 
 class LogsPage(tk.Frame):
     def __init__(self, parent, controller):
@@ -31,9 +33,7 @@ class LogsPage(tk.Frame):
         self.main_desc = CTkFrame(self, fg_color="#84a8db", height=50, corner_radius=0)
         self.main_desc.pack(side="top", fill="x", padx=(0, 0), pady=(0, 10))
 
-        novus_logo = Image.open('C:/capstone/labels/novus_logo1.png')
-        novus_logo = novus_logo.resize((50, 50))
-        self.novus_photo = CTkImage(novus_logo, size=(50, 50))
+        self.novus_photo = get_image('C:/capstone/labels/novus_logo1.png', (50, 50))
 
         # Buttons Images
         self.clients_btn = self._images_buttons('C:/capstone/labels/client_btn.png', size=(100,100))
@@ -67,7 +67,7 @@ class LogsPage(tk.Frame):
         tree_frame = tk.Frame(self)
         tree_frame.place(x=120, y=105, width=1100, height=475)
 
-        self.logs_tree = ttk.Treeview(        
+        self.logs_tree = VirtualTreeview(        
             tree_frame,
             columns=('log_id', 'user_id', 'action', 'timestamp'),
             show='headings',
@@ -96,34 +96,23 @@ class LogsPage(tk.Frame):
         tree_frame.grid_rowconfigure(0, weight=1)
         tree_frame.grid_columnconfigure(0, weight=1)
 
+        logs = self.controller.repos.logs
+        self.log_pages = PagedTreeLoader(self.logs_tree, self.scrollbar, logs.list_page, logs.page_key)
         self.load_user_logs()
 
 
     def load_user_logs(self):
         try:
-            conn = sqlite3.connect("main.db")
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM user_logs")
-            rows = cursor.fetchall()
-
-            # Enumerate loop for getting every single client in the DB & inseting data in each column represented
-            for i in self.logs_tree.get_children():
-                self.logs_tree.delete(i)
-
-            for row in rows:
-                self.logs_tree.insert("", "end", values=row)
+            # Newest first, further pages load as the list is scrolled
+            self.log_pages.refresh()
 
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", str(e))
             logging.error("Error loading user logs: %s", e, exc_info=True)
-        finally:
-            conn.close()
 
 
     def _images_buttons(self, image_path, size=(40, 40)):
-        image = Image.open(image_path)
-        image = image.resize(size)
-        return CTkImage(image)
+        return get_image(image_path, size, display_size=(20, 20))
     
     def add_del_upd(self, text, command):
         button = ctk.CTkButton(self, text=text, width=73, command=command)
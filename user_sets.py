@@ -6,21 +6,21 @@ from tkinter import ttk
 from tkinter import messagebox, filedialog
 import customtkinter
 import customtkinter as ctk
-from customtkinter import CTkLabel, CTkEntry, CTkButton, CTkFrame, CTkImage, CTkToplevel
-from PIL import Image
+from customtkinter import CTkLabel, CTkEntry, CTkButton, CTkFrame, CTkToplevel
 import sqlite3
 import time
 from datetime import datetime
 import pytz
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-import pandas as pd
 import re
+import os
+import hashlib
 import logging
 import sys
 sys.path.append('C:/capstone')
 
 from pages_handler import FrameNames
+from assets import get_image, get_blob_image
+from profile_images import check_upload
 
 class UserSet(tk.Frame):
     def __init__(self, parent, controller):
@@ -55,9 +55,7 @@ class UserSet(tk.Frame):
         logout_handler.setFormatter(logout_formatter)
         self.logout_info.addHandler(logout_handler)
 
-        novus_logo = Image.open('C:/capstone/labels/novus_logo1.png')
-        novus_logo = novus_logo.resize((50, 50))
-        self.novus_photo = CTkImage(novus_logo, size=(50, 50))
+        self.novus_photo = get_image('C:/capstone/labels/novus_logo1.png', (50, 50))
 
         
         user_type = self.controller.session.get('user_type', '')
@@ -199,12 +197,6 @@ class UserSet(tk.Frame):
             return
 
         # Update session
-        #User Profile Image
-        self.profile_image_data = None
-        self.profile_image_label = CTkLabel(self.settings_frame, text="No Image")
-        self.profile_image_label.pack(side="left", padx=(0, 10))
-        CTkButton(self.settings_frame, text="Upload Image", command=self.upload_image).pack(side="left", padx=(0, 10))
-
         #User Profile Information
         self.controller.session['user_id'] = user_id
         self.controller.session['f_name'] = f_name
@@ -218,23 +210,18 @@ class UserSet(tk.Frame):
         self.controller.session['user_type'] = user_type
 
         # Update the database
+        salt = os.urandom(16).hex()
+        hashed_pw = hashlib.sha256((password + salt).encode()).hexdigest()
         try:
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-            c.execute("""
-                UPDATE users SET f_name = ?, m_name = ?, l_name = ?, useremail = ?, phonenum = ?,
-                    username = ?, password = ?, confirmpass = ?, usertype = ? WHERE user_id = ?
-            """, (
-                f_name, m_name, l_name, email, phone, username, password, confirm_pass, user_type, user_id
-            ))
-            conn.commit()
+            repos = self.controller.repos
+            with repos.transaction():
+                repos.users.update_profile(user_id, f_name, m_name, l_name, email, phone, username, user_type)
+                repos.users.set_password(user_id, hashed_pw, salt)
             messagebox.showinfo("Success", "User settings updated!")
             self.sett_info.info(f"User settings updated for user_id: {user_id}, Time: {datetime.now(pytz.timezone('Asia/Manila')).strftime('%Y-%m-%d %H:%M:%S')}")
         except sqlite3.Error as e:
             messagebox.showerror("Database Error", f"An error occurred: {e}")
             self.sett_error.error(f"Database error while updating user settings for user_id: {user_id}, Error: {e}, Time: {datetime.now(pytz.timezone('Asia/Manila')).strftime('%Y-%m-%d %H:%M:%S')}")
-        finally:
-            conn.close()
 
     def on_show(self):
         # Remove all widgets from self.main (sidebar)
@@ -284,22 +271,21 @@ class UserSet(tk.Frame):
         self.user_type_entry.insert(0, self.controller.session.get('user_type', ''))
 
         try:
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
-            c.execute("SELECT profile_image FROM users WHERE user_id = ?", (self.controller.session.get('user_id'),))
-            row = c.fetchone()
-            if row and row[0]:
-                from io import BytesIO
-                img = Image.open(BytesIO(row[0]))
-                img = img.resize((100, 100))
-                self.profile_photo = CTkImage(img, size=(100, 100))
-                self.profile_image_label.configure(image=self.profile_photo, text="")
-            else:
-                self.profile_image_label.configure(image=None, text="No Image")
+            user_id = self.controller.session.get('user_id')
+            self._show_profile_image(self.controller.repos.users.image_version(user_id))
         except Exception as e:
             self.profile_image_label.configure(image=None, text="No Image")
-        finally:
-            conn.close()
+
+    def _show_profile_image(self, version):
+        """Show the 100px thumbnail, decoding it only when `version` differs from the cached one"""
+        user_id = self.controller.session.get('user_id')
+        users = self.controller.repos.users
+        self.profile_photo = get_blob_image(('profile', user_id, 100), version,
+                                            lambda: users.get_thumbnail(user_id, 100), (100, 100))
+        if self.profile_photo:
+            self.profile_image_label.configure(image=self.profile_photo, text="")
+        else:
+            self.profile_image_label.configure(image=None, text="No Image")
 
     def _main_buttons(self, parent, image, text, command):
         button = CTkButton(parent, image=image, text=text, bg_color="#6a9bc3", fg_color="#6a9bc3", hover_color="white",
@@ -307,35 +293,35 @@ class UserSet(tk.Frame):
         button.pack(side="top", padx=5, pady=15)
         
     def _images_buttons(self, image_path, size=(40, 40)):
-        image = Image.open(image_path)
-        size = size
-        return CTkImage(image)
+        return get_image(image_path, size, display_size=(20, 20))
 
         
     def upload_image(self):
         file_path = filedialog.askopenfilename(filetypes=[("Image files", "*.png;*.jpg;*.jpeg;*.gif")])
         if file_path:
             try:
-                image = Image.open(file_path)
-                image = image.resize((100, 100))
-                self.profile_photo = CTkImage(image, size=(100, 100))
-                self.profile_image_label.configure(image=self.profile_photo, text="")
-                # Optionally, store the image data for saving to DB
                 with open(file_path, "rb") as f:
                     self.profile_image_data = f.read()
-
-                # Save the image to the database
-                conn = sqlite3.connect('main.db')
-                c = conn.cursor()
-                c.execute("UPDATE users SET userimage = ? WHERE user_id = ?"
-                          , (self.profile_image_data, self.controller.session.get('user_id')))
-                conn.commit()
-                self.sett_info.info(f"Profile image updated for user_id: {self.controller.session.get('user_id')}, Time: {datetime.now(pytz.timezone('Asia/Manila')).strftime('%Y-%m-%d %H:%M:%S')}")
-                conn.close()
-                
-            except Exception as e:
+                check_upload(self.profile_image_data)
+            except (OSError, ValueError) as e:
                 messagebox.showerror("Error", f"Failed to open image: {e}")
                 self.sett_error.error(f"Error uploading image: {e}, Time: {datetime.now(pytz.timezone('Asia/Manila')).strftime('%Y-%m-%d %H:%M:%S')}")
+                return
+
+            # Thumbnailing and saving run on a worker; the label updates once the new version is stored
+            user_id = self.controller.session.get('user_id')
+            self.controller.executor.submit(
+                self.controller.repos.users.set_image, user_id, self.profile_image_data,
+                on_done=lambda version: self._image_uploaded(user_id, version),
+                on_error=self._image_upload_failed)
+
+    def _image_uploaded(self, user_id, version):
+        self._show_profile_image(version)
+        self.sett_info.info(f"Profile image updated for user_id: {user_id}, Time: {datetime.now(pytz.timezone('Asia/Manila')).strftime('%Y-%m-%d %H:%M:%S')}")
+
+    def _image_upload_failed(self, error):
+        messagebox.showerror("Error", f"Failed to save image: {error}")
+        self.sett_error.error(f"Error uploading image: {error}, Time: {datetime.now(pytz.timezone('Asia/Manila')).strftime('%Y-%m-%d %H:%M:%S')}")
 
 
     def handle_logout(self):
@@ -343,13 +329,9 @@ class UserSet(tk.Frame):
 
         user_id = self.controller.session.get('user_id')
         if user_id:
-            conn = sqlite3.connect('main.db')
-            c = conn.cursor()
             timestamp = datetime.now(pytz.timezone('Asia/Manila')).strftime('%Y-%m-%d %H:%M:%S')
-            c.execute("INSERT INTO user_logs (user_id, action, timestamp) VALUES (?, ?, ?)", (user_id, 'Logout', timestamp))
+            self.controller.repos.logs.add(user_id, 'Logout', timestamp)
             print('DEBUG: User logged out:', user_id, timestamp)
-            conn.commit()
-            conn.close()
             self.logout_info.info(f"User {user_id} logged out, Time: {timestamp}, From: {__name__}")
 
         self.controller.show_frame(FrameNames.LOGIN)
\ No newline at end of file
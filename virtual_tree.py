@@ -0,0 +1,363 @@
+from tkinter import ttk
+
+
+class _Row:
+    __slots__ = ('key', 'values', 'tags')
+
+    def __init__(self, key, values, tags):
+        self.key = key
+        self.values = values
+        self.tags = tags
+
+
+def _sort_value(value):
+    """Numbers sort numerically, everything else case-insensitively, blanks last"""
+    if value is None or value == '':
+        return (2, '')
+    try:
+        return (0, float(value))
+    except (TypeError, ValueError):
+        return (1, str(value).lower())
+
+
+class VirtualTreeview(ttk.Treeview):
+    """A flat ttk.Treeview that only creates Tk items for the rows on screen
+
+    Rows live in a Python list; only the visible window (plus `buffer` rows) exists as Tk
+    items, re-created as the view scrolls, so loading 100k rows costs 100k list appends
+    instead of 100k Tk calls. Each row's item id is its primary key (`values[key_index]`),
+    so focus(), selection(), item() and identify_row() all speak in primary keys and keep
+    working for rows that are scrolled out of view.
+
+    It is meant to be dropped in where a `ttk.Treeview(..., show='headings')` list is built:
+    insert/delete/move/get_children/item/selection/focus/see/yview behave like the Treeview
+    ones for a flat list, and the configured yscrollcommand receives fractions of the
+    whole list, so scrollbars and PagedTreeLoader work unchanged. Clicking a heading
+    sorts the loaded rows by that column.
+    """
+
+    def __init__(self, master=None, key_index=0, buffer=10, sortable=True, **kw):
+        self._user_yscroll = kw.pop('yscrollcommand', None)
+        super().__init__(master, **kw)
+        super().configure(yscrollcommand=self._internal_scrolled)
+
+        self.key_index = key_index
+        self.buffer = buffer
+        self._rows = []
+        self._by_key = {}
+        self._top = 0
+        self._visible = int(self.cget('height') or 10)
+        self._selected = set()
+        self._focus = ''
+        self._sort = None  # (column index, descending)
+        self._sort_dirty = False
+        self._render_pending = False
+        self._rendering = False
+        self._auto_id = 0
+
+        if sortable:
+            for col in self['columns']:
+                self.heading(col, command=lambda c=col: self.sort_by(c))
+
+        self.bind('<Configure>', self._on_resize, add='+')
+        self.bind('<<TreeviewSelect>>', self._on_select, add='+')
+        self.bind('<ButtonPress-1>', self._on_click, add='+')
+        self.bind('<MouseWheel>', self._on_wheel)
+        self.bind('<Button-4>', lambda e: self._scroll_rows(-3))
+        self.bind('<Button-5>', lambda e: self._scroll_rows(3))
+        self.bind('<Up>', lambda e: self._move_focus(-1))
+        self.bind('<Down>', lambda e: self._move_focus(1))
+        self.bind('<Prior>', lambda e: self._scroll_rows(-self._visible))
+        self.bind('<Next>', lambda e: self._scroll_rows(self._visible))
+        self.bind('<Home>', lambda e: self._scroll_to(0))
+        self.bind('<End>', lambda e: self._scroll_to(len(self._rows)))
+
+    # --- Treeview API over the virtual rows ---
+
+    def configure(self, cnf=None, **kw):
+        if isinstance(cnf, dict) and 'yscrollcommand' in cnf:
+            cnf = dict(cnf)
+            self._user_yscroll = cnf.pop('yscrollcommand')
+        if 'yscrollcommand' in kw:
+            self._user_yscroll = kw.pop('yscrollcommand')
+            self._emit_scroll()
+        return super().configure(cnf, **kw)
+
+    config = configure
+
+    def insert(self, parent, index, iid=None, **kw):
+        values = tuple(kw.get('values', ()))
+        tags = kw.get('tags', ())
+        if isinstance(tags, str):
+            tags = (tags,)
+        key = iid if iid is not None else (str(values[self.key_index]) if len(values) > self.key_index else '')
+        if not key or key in self._by_key:
+            self._auto_id += 1
+            key = f"{key}#{self._auto_id}"
+
+        row = _Row(key, values, tuple(tags))
+        self._by_key[key] = row
+        if index == 'end' or index >= len(self._rows):
+            self._rows.append(row)
+        else:
+            self._rows.insert(index, row)
+        if self._sort:
+            self._sort_dirty = True
+        self._schedule_render()
+        return key
+
+    def delete(self, *items):
+        if not items:
+            return
+        if len(items) >= len(self._rows):
+            doomed = set(items)
+            if all(row.key in doomed for row in self._rows):
+                self._rows.clear()
+                self._by_key.clear()
+                self._selected.clear()
+                self._focus = ''
+                self._top = 0
+                self._schedule_render()
+                return
+        doomed = {key for key in items if key in self._by_key}
+        if not doomed:
+            return
+        self._rows = [row for row in self._rows if row.key not in doomed]
+        for key in doomed:
+            del self._by_key[key]
+        self._selected -= doomed
+        if self._focus in doomed:
+            self._focus = ''
+        self._schedule_render()
+
+    def move(self, item, parent, index):
+        row = self._by_key[item]
+        self._rows.remove(row)
+        self._rows.insert(index, row)
+        self._schedule_render()
+
+    def get_children(self, item=None):
+        if item:
+            return ()
+        self._apply_sort()
+        return tuple(row.key for row in self._rows)
+
+    def exists(self, item):
+        return item in self._by_key
+
+    def index(self, item):
+        self._apply_sort()
+        return self._rows.index(self._by_key[item])
+
+    def item(self, item, option=None, **kw):
+        row = self._by_key.get(item)
+        if row is None:
+            return super().item(item, option, **kw)
+        if kw:
+            if 'values' in kw:
+                row.values = tuple(kw.pop('values'))
+            if 'tags' in kw:
+                tags = kw.pop('tags')
+                row.tags = (tags,) if isinstance(tags, str) else tuple(tags)
+            if self._sort:
+                self._sort_dirty = True
+            self._schedule_render()
+            return None
+        info = {'text': '', 'image': '', 'values': row.values, 'open': 0, 'tags': row.tags}
+        return info[option] if option else info
+
+    def set(self, item, column=None, value=None):
+        row = self._by_key[item]
+        columns = list(self['columns'])
+        if column is None:
+            return dict(zip(columns, row.values))
+        idx = columns.index(column) if column in columns else int(str(column).lstrip('#')) - 1
+        if value is None:
+            return row.values[idx]
+        values = list(row.values) + [''] * (len(columns) - len(row.values))
+        values[idx] = value
+        self.item(item, values=values)
+
+    def selection(self):
+        self._apply_sort()
+        return tuple(row.key for row in self._rows if row.key in self._selected)
+
+    def selection_set(self, *items):
+        self._selected = set(self._flatten(items)) & self._by_key.keys()
+        self._after_selection_change()
+
+    def selection_add(self, *items):
+        self._selected |= set(self._flatten(items)) & self._by_key.keys()
+        self._after_selection_change()
+
+    def selection_remove(self, *items):
+        self._selected -= set(self._flatten(items))
+        self._after_selection_change()
+
+    def focus(self, item=None):
+        if item is None:
+            return self._focus
+        if item in self._by_key:
+            self._focus = item
+            self._schedule_render()
+
+    def see(self, item):
+        if item not in self._by_key:
+            return
+        pos = self.index(item)
+        if pos < self._top:
+            self._scroll_to(pos)
+        elif pos >= self._top + self._visible:
+            self._scroll_to(pos - self._visible + 1)
+
+    def yview(self, *args):
+        if not args:
+            return self._fractions()
+        if args[0] == 'moveto':
+            self._scroll_to(int(float(args[1]) * len(self._rows)))
+        elif args[0] == 'scroll':
+            step = self._visible if args[2].startswith('page') else 1
+            self._scroll_rows(int(args[1]) * step)
+
+    def yview_moveto(self, fraction):
+        self.yview('moveto', fraction)
+
+    def yview_scroll(self, number, what):
+        self.yview('scroll', number, what)
+
+    def sort_by(self, column, descending=None):
+        """Sort the loaded rows by `column`; clicking the same heading again reverses it"""
+        idx = list(self['columns']).index(column)
+        if descending is None:
+            descending = bool(self._sort and self._sort[0] == idx and not self._sort[1])
+        self._sort = (idx, descending)
+        self._sort_dirty = True
+        self._top = 0
+        self._schedule_render()
+
+    # --- rendering ---
+
+    def _apply_sort(self):
+        if self._sort and self._sort_dirty:
+            idx, descending = self._sort
+            self._rows.sort(key=lambda row: _sort_value(row.values[idx] if idx < len(row.values) else None),
+                            reverse=descending)
+            self._sort_dirty = False
+
+    def _schedule_render(self):
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self._render)
+
+    def _render(self):
+        self._render_pending = False
+        self._apply_sort()
+        self._top = max(0, min(self._top, len(self._rows) - self._visible))
+        window = self._rows[self._top:self._top + self._visible + self.buffer]
+
+        self._rendering = True
+        try:
+            super().delete(*super().get_children())
+            for row in window:
+                super().insert('', 'end', iid=row.key, values=row.values, tags=row.tags)
+            shown = [row.key for row in window if row.key in self._selected]
+            super().selection_set(shown)
+            if self._focus and super().exists(self._focus):
+                super().focus(self._focus)
+            super().yview_moveto(0)
+        finally:
+            self._rendering = False
+        self._emit_scroll()
+
+    def _fractions(self):
+        total = len(self._rows)
+        if not total:
+            return (0.0, 1.0)
+        first = self._top / total
+        last = min(1.0, (self._top + self._visible) / total)
+        return (first, last)
+
+    def _emit_scroll(self):
+        if self._user_yscroll:
+            first, last = self._fractions()
+            self._user_yscroll(str(first), str(last))
+
+    def _internal_scrolled(self, first, last):
+        # Tk scrolled inside the materialised window (e.g. to show a clicked buffer row);
+        # turn that into a virtual scroll so the window is rebuilt around the new top
+        if self._rendering:
+            return
+        shift = round(float(first) * len(super().get_children()))
+        if shift:
+            self._scroll_rows(shift)
+
+    def _scroll_rows(self, count):
+        self._scroll_to(self._top + count)
+        return 'break'
+
+    def _scroll_to(self, top):
+        top = max(0, min(top, len(self._rows) - self._visible))
+        if top != self._top:
+            self._top = top
+            self._schedule_render()
+        else:
+            self._emit_scroll()
+        return 'break'
+
+    # --- events ---
+
+    def _on_resize(self, event):
+        rowheight = ttk.Style().lookup(self.cget('style') or 'Treeview', 'rowheight') or 20
+        try:
+            rowheight = int(rowheight)
+        except (TypeError, ValueError):
+            rowheight = 20
+        # One row's worth of pixels is taken by the heading
+        visible = max(1, event.height // rowheight - 1)
+        if visible != self._visible:
+            self._visible = visible
+            self._schedule_render()
+
+    def _on_wheel(self, event):
+        return self._scroll_rows(-3 if event.delta > 0 else 3)
+
+    def _on_click(self, event):
+        # A plain click replaces the selection, including rows scrolled out of view
+        if not event.state & 0x0005:  # Shift or Control
+            self._selected.clear()
+
+    def _on_select(self, event):
+        if self._rendering:
+            return
+        shown = set(super().get_children())
+        self._selected = (self._selected - shown) | set(super().selection())
+        focus = super().focus()
+        if focus:
+            self._focus = focus
+
+    def _move_focus(self, step):
+        if not self._rows:
+            return 'break'
+        pos = self.index(self._focus) + step if self._focus in self._by_key else 0
+        pos = max(0, min(pos, len(self._rows) - 1))
+        key = self._rows[pos].key
+        self._focus = key
+        self._selected = {key}
+        self.see(key)
+        self._after_selection_change()
+        return 'break'
+
+    def _after_selection_change(self):
+        # Render now so handlers of the event below read the new selection from Tk
+        self._render()
+        self.event_generate('<<TreeviewSelect>>')
+
+    @staticmethod
+    def _flatten(items):
+        flat = []
+        for item in items:
+            if isinstance(item, (list, tuple)):
+                flat.extend(item)
+            else:
+                flat.append(item)
+        return flat